@@ -0,0 +1,145 @@
+"""
+Idade e faixa etária dos respondentes, calculadas de forma vetorizada.
+
+A idade é a quantidade de dias completos desde o nascimento dividida por
+365.25, truncada. Em vez de calcular a idade de cada data com Python, cada
+limite das faixas (idade >= k anos) é convertido em uma quantidade mínima de
+dias, e a faixa de cada respondente é encontrada com np.searchsorted sobre
+os dias (inteiros) desde o nascimento. A mesma conversão é usada pelas
+consultas SQL (ver queries.py), de modo que as faixas são idênticas nos dois
+casos.
+
+Cada data de nascimento distinta é convertida uma única vez, e nenhum
+DataFrame é copiado: as funções recebem e retornam arrays, e podem ser
+usadas por qualquer gráfico que precise da idade (por exemplo, faixa etária
+cruzada com outra coluna).
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from schema import AGE_BINS, AGE_LABELS
+
+# Duração do ano usada no cálculo da idade
+DAYS_PER_YEAR = 365.25
+
+# Valor de age_group_codes() para datas inválidas ou idades fora das faixas
+NO_GROUP = -1
+
+
+def min_days(age):
+    """
+    Menor quantidade de dias completos para a idade truncada ser >= age.
+
+    Args:
+        age: Idade em anos (inteiro)
+
+    Returns:
+        int: Dias desde o nascimento
+    """
+    if age > 0:
+        return math.ceil(age * DAYS_PER_YEAR)
+    # Idades negativas truncam em direção a zero: até -365 dias a idade é 0
+    return math.floor((age - 1) * DAYS_PER_YEAR) + 1
+
+
+# Dias mínimos de cada limite das faixas (ver AGE_BINS)
+AGE_BIN_DAYS = np.array([min_days(age) for age in AGE_BINS], dtype='int64')
+
+
+def parse_birth_dates(birth_dates):
+    """
+    Converte as datas de nascimento para datetime64, uma vez por valor distinto.
+
+    Args:
+        birth_dates: Datas de nascimento (Série, array ou lista; texto ou datas)
+
+    Returns:
+        ndarray: datetime64[ns], com NaT para datas inválidas
+    """
+    birth_dates = pd.Series(birth_dates)
+    if not pd.api.types.is_datetime64_any_dtype(birth_dates):
+        # pd.to_datetime converte cada valor distinto uma única vez (cache=True)
+        birth_dates = pd.to_datetime(birth_dates, errors='coerce')
+    return birth_dates.to_numpy(dtype='datetime64[ns]')
+
+
+def _days_since(birth_dates, today):
+    """Dias completos desde o nascimento (int64) e máscara das datas válidas."""
+    born = parse_birth_dates(birth_dates)
+    valid = ~np.isnat(born)
+    today = (pd.Timestamp.now() if today is None else pd.Timestamp(today)).to_datetime64()
+    days = np.zeros(len(born), dtype='int64')
+    # Divisão inteira: arredonda para baixo, como Timedelta.days
+    days[valid] = (today - born[valid]) // np.timedelta64(1, 'D')
+    return days, valid
+
+
+def ages(birth_dates, today=None):
+    """
+    Idade, em anos completos, de cada respondente.
+
+    Args:
+        birth_dates: Datas de nascimento
+        today: Data de referência (padrão: agora)
+
+    Returns:
+        ndarray: float64, com NaN para datas inválidas
+    """
+    days, valid = _days_since(birth_dates, today)
+    result = np.full(len(days), np.nan)
+    result[valid] = np.trunc(days[valid] / DAYS_PER_YEAR)
+    return result
+
+
+def age_group_codes(birth_dates, today=None):
+    """
+    Posição da faixa etária de cada respondente em AGE_LABELS.
+
+    Args:
+        birth_dates: Datas de nascimento
+        today: Data de referência (padrão: agora)
+
+    Returns:
+        ndarray: int8, com NO_GROUP para datas inválidas ou fora das faixas
+    """
+    days, valid = _days_since(birth_dates, today)
+    codes = np.searchsorted(AGE_BIN_DAYS, days, side='right') - 1
+    codes[~valid | (codes < 0) | (codes >= len(AGE_LABELS))] = NO_GROUP
+    return codes.astype('int8')
+
+
+def age_groups(birth_dates, today=None):
+    """
+    Faixa etária de cada respondente.
+
+    Args:
+        birth_dates: Datas de nascimento
+        today: Data de referência (padrão: agora)
+
+    Returns:
+        Categorical: Faixa etária (ver schema.AGE_LABELS); nulo para datas inválidas
+    """
+    return pd.Categorical.from_codes(age_group_codes(birth_dates, today), categories=AGE_LABELS)
+
+
+def age_group_counts(birth_date_counts, today=None):
+    """
+    Quantidade de respondentes por faixa etária a partir das contagens por data.
+
+    Args:
+        birth_date_counts: Série data de nascimento -> quantidade de respondentes
+            (ver data_store.count_values)
+        today: Data de referência (padrão: agora)
+
+    Returns:
+        Series: Faixa etária -> quantidade, com todas as faixas de AGE_LABELS
+    """
+    codes = age_group_codes(birth_date_counts.index, today)
+    grouped = codes != NO_GROUP
+    totals = np.bincount(
+        codes[grouped], weights=birth_date_counts.to_numpy(dtype='float64')[grouped], minlength=len(AGE_LABELS)
+    )
+    return pd.Series(totals.astype('int64'), index=AGE_LABELS)
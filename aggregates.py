@@ -0,0 +1,194 @@
+"""
+Tabelas de contagens pré-agregadas, materializadas na ingestão dos dados.
+
+Todos os gráficos e KPIs do dashboard são contagens de valores de uma
+coluna (ou de tópicos das respostas "Impactos"). Este módulo grava essas
+contagens no próprio base.sqlite logo após a ingestão, de modo que o
+dashboard leia algumas centenas de linhas agregadas em vez da tabela de
+respondentes:
+
+    Agregados_Contagens(coluna, valor, contagem, primeira_linha)
+    Agregados_Topicos(topico, contagem, primeira_resposta)
+    Agregados_Meta(chave, valor)
+
+As colunas primeira_linha/primeira_resposta guardam a primeira aparição de
+cada valor, usada como critério de desempate na ordenação (a mesma regra de
+data_store.sort_counts). Agregados_Meta registra a quantidade de linhas e o
+maior rowid de Planilha1 no momento da agregação, o que permite ao
+dashboard saber se as tabelas ainda correspondem aos dados.
+
+Uso:
+    python aggregates.py [base.sqlite] [--sem-topicos]
+"""
+
+import json
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+
+from db import DB_PATH, connect_writer
+from schema import COUNT_COLUMNS, TABLE_NAME
+
+COUNTS_TABLE = 'Agregados_Contagens'
+TOPICS_TABLE = 'Agregados_Topicos'
+META_TABLE = 'Agregados_Meta'
+
+
+def _table_state(conn, table=TABLE_NAME):
+    """Retorna (quantidade de linhas, maior rowid) da tabela de respostas."""
+    rows, max_rowid = conn.execute(f"SELECT COUNT(*), MAX(rowid) FROM {table}").fetchone()
+    return rows, max_rowid or 0
+
+
+def build_aggregates(conn, table=TABLE_NAME, columns=COUNT_COLUMNS, include_topics=True):
+    """
+    Recria as tabelas de contagens a partir da tabela de respostas.
+
+    Args:
+        conn: Conexão SQLite com permissão de escrita
+        table: Tabela com as respostas
+        columns: Colunas cujas contagens devem ser materializadas
+        include_topics: Se deve classificar as respostas "Impactos" e gravar
+            as contagens por tópico (requer o modelo do spaCy)
+
+    Returns:
+        dict: Quantidade de linhas gravadas em cada tabela
+    """
+    topic_rows = []
+    fingerprint = None
+    if include_topics:
+        # Importado aqui para que a agregação das colunas não dependa do spaCy
+        import simple_nlp
+
+        impactos = pd.read_sql(f"SELECT Impactos FROM {table} ORDER BY rowid", conn)['Impactos']
+        totals = simple_nlp.topic_totals(simple_nlp.classify_responses(impactos))
+        topic_rows = [(topic, int(row.contagem), int(row.primeira_resposta))
+                      for topic, row in totals.iterrows()]
+        fingerprint = simple_nlp.classification_fingerprint()
+
+    with conn:
+        conn.execute(f"DROP TABLE IF EXISTS {COUNTS_TABLE}")
+        conn.execute(f"DROP TABLE IF EXISTS {TOPICS_TABLE}")
+        conn.execute(f"DROP TABLE IF EXISTS {META_TABLE}")
+        conn.execute(f"""
+            CREATE TABLE {COUNTS_TABLE} (
+                coluna TEXT NOT NULL,
+                valor,
+                contagem INTEGER NOT NULL,
+                primeira_linha INTEGER NOT NULL
+            )
+        """)
+        conn.execute(f"""
+            CREATE TABLE {TOPICS_TABLE} (
+                topico TEXT PRIMARY KEY,
+                contagem INTEGER NOT NULL,
+                primeira_resposta INTEGER NOT NULL
+            )
+        """)
+        conn.execute(f"CREATE TABLE {META_TABLE} (chave TEXT PRIMARY KEY, valor TEXT)")
+
+        for column in columns:
+            conn.execute(
+                f'INSERT INTO {COUNTS_TABLE} (coluna, valor, contagem, primeira_linha) '
+                f'SELECT ?, "{column}", COUNT(*), MIN(rowid) FROM {table} '
+                f'WHERE "{column}" IS NOT NULL GROUP BY "{column}"',
+                (column,),
+            )
+        conn.execute(f"CREATE INDEX idx_{COUNTS_TABLE}_coluna ON {COUNTS_TABLE} (coluna)")
+
+        conn.executemany(
+            f"INSERT INTO {TOPICS_TABLE} (topico, contagem, primeira_resposta) VALUES (?, ?, ?)",
+            topic_rows,
+        )
+
+        rows, max_rowid = _table_state(conn, table)
+        meta = {
+            'linhas': rows,
+            'max_rowid': max_rowid,
+            'colunas': json.dumps(list(columns), ensure_ascii=False),
+            'gerado_em': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'topicos_fingerprint': fingerprint,
+        }
+        conn.executemany(
+            f"INSERT INTO {META_TABLE} (chave, valor) VALUES (?, ?)",
+            [(key, None if value is None else str(value)) for key, value in meta.items()],
+        )
+
+        written = {
+            COUNTS_TABLE: conn.execute(f"SELECT COUNT(*) FROM {COUNTS_TABLE}").fetchone()[0],
+            TOPICS_TABLE: len(topic_rows),
+        }
+    return written
+
+
+def load_aggregates(conn, table=TABLE_NAME, columns=COUNT_COLUMNS, topics_fingerprint=None):
+    """
+    Lê as contagens materializadas, se ainda corresponderem aos dados.
+
+    Args:
+        conn: Conexão SQLite
+        table: Tabela com as respostas
+        columns: Colunas cujas contagens são necessárias
+        topics_fingerprint: Fingerprint atual da classificação (ver
+            simple_nlp.classification_fingerprint). Os totais por tópico só
+            são retornados se tiverem sido gerados com ele; as contagens por
+            coluna valem de qualquer forma (inclusive com --sem-topicos).
+
+    Returns:
+        tuple: (quantidade de linhas, maior rowid, dicionário coluna -> Série
+        de contagens, DataFrame de totais por tópico ou None se não
+        corresponderem a topics_fingerprint) ou None se os agregados não
+        existirem ou estiverem desatualizados
+    """
+    try:
+        meta = dict(conn.execute(f"SELECT chave, valor FROM {META_TABLE}").fetchall())
+    except sqlite3.OperationalError:
+        return None
+
+    rows, max_rowid = _table_state(conn, table)
+    if meta.get('linhas') != str(rows) or meta.get('max_rowid') != str(max_rowid):
+        return None
+    if not set(columns) <= set(json.loads(meta.get('colunas') or '[]')):
+        return None
+
+    aggregated = pd.read_sql(
+        f"SELECT coluna, valor, contagem FROM {COUNTS_TABLE} "
+        f"ORDER BY coluna, contagem DESC, primeira_linha",
+        conn,
+    )
+    counts = {}
+    by_column = dict(tuple(aggregated.groupby('coluna', sort=False)))
+    for column in columns:
+        # Colunas sem nenhum valor preenchido não têm linhas agregadas
+        if column not in by_column:
+            counts[column] = pd.Series(dtype='int64')
+            continue
+        group = by_column[column]
+        counts[column] = pd.Series(group['contagem'].to_numpy(), index=group['valor'].to_numpy(), dtype='int64')
+
+    if topics_fingerprint is not None and meta.get('topicos_fingerprint') != topics_fingerprint:
+        return rows, max_rowid, counts, None
+
+    totals = pd.read_sql(
+        f"SELECT topico, contagem, primeira_resposta FROM {TOPICS_TABLE} ORDER BY primeira_resposta",
+        conn,
+        index_col='topico',
+    )
+    totals.index.name = None
+    return rows, max_rowid, counts, totals
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    db_path = args[0] if args else DB_PATH
+
+    start = time.perf_counter()
+    conn = connect_writer(db_path)
+    written = build_aggregates(conn, include_topics='--sem-topicos' not in sys.argv)
+    conn.close()
+
+    print(f"Agregados gravados em {db_path} em {time.perf_counter() - start:.2f}s:")
+    for table_name, count in written.items():
+        print(f"- {table_name}: {count} linhas")
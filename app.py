@@ -1,27 +1,30 @@
+import argparse
+import os
+import threading
+import time
+from datetime import date
+
 import dash
-from dash import dcc, html, Input, Output, State
-import plotly.express as px
+import flask
+from dash import dcc, html, ctx, ALL, Input, Output, State
 import pandas as pd
-import sqlite3
 from dash.exceptions import PreventUpdate
-from simple_nlp import get_impact_data_for_graph
-
-# Definir cores e estilo - Nova paleta profissional
-COLORS = {
-    'background': '#f4f6f8',  # Cinza claro para fundo
-    'text': '#2D3436',        # Cor de texto principal
-    'title': '#34495E',       # Cor para títulos
-    'primary': '#2C3E50',     # Azul escuro como cor primária
-    'secondary': '#00C9A7',   # Ciano para destaques
-    'accent': '#F39C12',      # Laranja para acentos
-    'success': '#27AE60',     # Verde para sucesso
-    'warning': '#F1C40F',     # Amarelo para avisos
-    'danger': '#E74C3C',      # Vermelho para erros
-    'chart1': '#3498DB',      # Azul para gráficos
-    'chart2': '#2980B9',      # Azul mais escuro
-    'chart3': '#1ABC9C',      # Verde-água
-    'chart4': '#16A085'       # Verde-água mais escuro
-}
+import simple_nlp
+from simple_nlp import (TOPIC_NAMES, classification_fingerprint, classify_responses, get_impact_data_for_graph,
+                        merge_topic_totals, predefined_topics, topic_totals)
+from charts import (CHART_SPECS, COLORS, COLUMN_LABELS, build_figure, build_figures, click_field, crosstab_figure,
+                    empty_figure)
+from count_cube import CUBE_COLUMNS, get_count_cube
+from data_store import count_values, store
+from figure_cache import FigureCache
+from kpis import get_kpis
+import metrics
+from metrics import phase, timed
+from filter_index import TOPICS_FILTER, filters_key, get_filter_index, toggle_filter
+import queries
+import static_export
+from refresher import DEFAULT_INTERVAL as REFRESH_INTERVAL, BackgroundRefresher, data_version
+from schema import AGE_GROUP_COLUMN, BIRTH_DATE_COLUMN
 
 # Estilo global
 GLOBAL_STYLE = {
@@ -106,46 +109,320 @@ KPI_ICON_STYLE = {
     'color': COLORS['secondary'],
 }
 
-# Connect to the SQLite database
-conn = sqlite3.connect('base.sqlite')
-
-# Load the data
-df = pd.read_sql("SELECT * FROM Planilha1", conn)
-
-# Close the connection
-conn.close()
-
-# Print data info for debugging
-print(f"Loaded {len(df)} rows with {len(df.columns)} columns")
-print(f"Columns: {df.columns.tolist()}")
+# Agregação incremental dos tópicos das respostas "Impactos": a cada
+# atualização apenas as respostas novas são classificadas
+def impact_topic_totals(delta, offset):
+    """Classifica as respostas novas e resume os tópicos encontrados."""
+    return topic_totals(classify_responses(delta['Impactos']), offset)
+
+# O modelo de PLN é carregado em segundo plano a partir da primeira
+# requisição, com o servidor já no ar; só então a agregação dos tópicos é
+# registrada. Até lá, o gráfico de tópicos mostra um aviso de carregamento
+# (a menos que os totais materializados na ingestão estejam disponíveis).
+def on_nlp_ready():
+    """Registra a agregação dos tópicos e publica os dados com os tópicos."""
+    store.add_accumulator('topicos', impact_topic_totals, merge_topic_totals)
+    refresher.request_refresh()
+
+def start_nlp_loading():
+    """Inicia (uma única vez) o carregamento do modelo de PLN."""
+    simple_nlp.start_background_load(on_ready=on_nlp_ready)
+
+# Com os tópicos pré-calculados (python impact_topics.py), o modelo de PLN
+# não é carregado pelo dashboard. A verificação é feita uma única vez por
+# processo (ela lê o snapshot, o que pode consultar o banco); se os tópicos
+# pré-calculados deixarem de valer, a aba de impacto inicia o carregamento
+nlp_loading_checked = threading.Event()
+
+def start_nlp_loading_if_needed():
+    """Inicia o carregamento do modelo de PLN, a menos que os tópicos estejam pré-calculados."""
+    if nlp_loading_checked.is_set():
+        return
+    nlp_loading_checked.set()
+    if not refresher.snapshot().precomputed_topics:
+        start_nlp_loading()
+
+# Usar as contagens materializadas na ingestão (aggregates.py) quando estiverem
+# atualizadas, sem ler a tabela de respondentes
+store.enable_aggregates(classification_fingerprint())
+
+# Origem das contagens filtradas: 'memoria' (índice de filtragem em memória,
+# ver filter_index.py) ou 'sql' (GROUP BY no SQLite, ver queries.py), que usa
+# memória proporcional à quantidade de categorias e não de respondentes
+SQL_BACKEND = os.environ.get('DASHBOARD_BACKEND', 'memoria') == 'sql'
+
+# Cache das figuras já construídas, indexado por (gráfico, versão dos dados).
+# Limite de memória e diretório opcional: FIGURE_CACHE_MB e FIGURE_CACHE_DIR
+figure_cache = FigureCache()
+
+# Gráficos de cada aba (construídos juntos pelas funções create_*_graphs)
+OCUPACIONAIS_CHARTS = ['tempo_escala_6x1', 'contrato_trabalho', 'horas_trabalho',
+                       'occupation', 'cnae', 'estado_trabalho']
+PESSOAIS_CHARTS = ['idade', 'sexo', 'cor_raca', 'estado_civil', 'tem_filhos',
+                   'rendimento', 'escolaridade']
+IMPACTO_CHARTS = ['impacto_familia', 'impacto_fisica', 'impacto_mental', 'impactos']
+
+# Cruzamento exibido ao abrir a aba Cruzamentos (linhas, colunas) e
+# quantidade máxima de categorias por eixo nas colunas sem ordem própria
+CROSSTAB_DEFAULTS = ('ImpactoSaudeMental', 'Sexo')
+CROSSTAB_TOP = 20
+
+# Contêiner de cada gráfico no layout das abas (usado pela exportação estática)
+GRAPH_CONTAINERS = {
+    'tempo_escala_6x1': 'tempo-escala-6x1-container',
+    'contrato_trabalho': 'contrato-trabalho-container',
+    'horas_trabalho': 'horas-trabalho-container',
+    'occupation': 'occupation-container',
+    'cnae': 'cnae-container',
+    'estado_trabalho': 'estado-trabalho-container',
+    'idade': 'data-nascimento-container',
+    'sexo': 'sexo-container',
+    'cor_raca': 'cor-raca-container',
+    'estado_civil': 'estado-civil-container',
+    'tem_filhos': 'tem-filhos-container',
+    'rendimento': 'rendimento-container',
+    'escolaridade': 'escolaridade-container',
+    'impacto_familia': 'impacto-vida-familiar-container',
+    'impacto_fisica': 'impacto-saude-fisica-container',
+    'impacto_mental': 'impacto-saude-mental-container',
+    'impactos': 'impactos-container',
+    'cruzamento': 'cruzamento-container',
+}
 
-# Calcular KPIs
-total_respondentes = len(df)
-escala_6x1_count = df[df['Escala6x1'] == 'Sim'].shape[0]
-escala_6x1_percent = round((escala_6x1_count / total_respondentes) * 100, 1)
+# Filtragem cruzada: tipo do id dos gráficos clicáveis e, para cada gráfico,
+# a coluna filtrada e o campo do clique (clickData) com o valor clicado
+GRAPH_TYPE = 'grafico'
+CHART_FILTERS = {chart: (spec['column'], click_field(chart)) for chart, spec in CHART_SPECS.items()}
+
+# Nomes exibidos dos filtros e dos tópicos (o gráfico de PLN mostra o nome
+# formatado, mas o filtro guarda o identificador do tópico)
+FILTER_LABELS = {AGE_GROUP_COLUMN: 'Faixa Etária', TOPICS_FILTER: 'Tópico'}
+TOPIC_IDS = {TOPIC_NAMES.get(topic, topic.replace('_', ' ').title()): topic for topic in predefined_topics}
+
+
+def chart_columns(charts):
+    """Colunas contadas por um conjunto de gráficos (ver CHART_FILTERS)."""
+    return [CHART_FILTERS[chart][0] for chart in charts if CHART_FILTERS[chart][0] != TOPICS_FILTER]
+
+
+def use_sql(data, filters):
+    """Indica se as contagens devem ser calculadas com GROUP BY no SQLite."""
+    # O filtro por tópico em SQL depende dos tópicos pré-calculados
+    return SQL_BACKEND and (data.precomputed_topics or TOPICS_FILTER not in (filters or {}))
+
+
+def filtered_counts(data, filters, charts=()):
+    """
+    Contagens por coluna dos respondentes selecionados pelos filtros.
+
+    Args:
+        data: DataSnapshot com os dados atuais
+        filters: Filtros (coluna -> lista de valores)
+        charts: Gráficos que usarão as contagens; com DASHBOARD_BACKEND=sql,
+            apenas as colunas deles são consultadas
+
+    Returns:
+        dict: Coluna -> Série com as contagens
+    """
+    if use_sql(data, filters):
+        # As contagens sem filtro continuam vindo do DataStore; a faixa
+        # etária é agrupada no próprio SQLite
+        columns = [column for column in chart_columns(charts) if column != BIRTH_DATE_COLUMN]
+        if not filters:
+            columns = [column for column in columns if column not in data.counts]
+        with phase('banco'), store.pool.connection() as conn:
+            counts = queries.count_columns(conn, filters, columns)
+        return counts if filters else {**data.counts, **counts}
+    if not filters:
+        return data.counts
+    with phase('agregacao'):
+        return get_filter_index(data, classify_impacts).count_values(filters)
+
+
+def topics_available(data, filters):
+    """
+    Indica se os totais por tópico podem ser calculados sem esperar o modelo de PLN.
+
+    Args:
+        data: DataSnapshot com os dados atuais
+        filters: Filtros (coluna -> lista de valores)
+
+    Returns:
+        bool: True se o gráfico de tópicos pode ser construído
+    """
+    if not filters:
+        return data.accumulated.get('topicos') is not None
+    return data.precomputed_topics or simple_nlp.is_ready()
+
+
+def filtered_topic_totals(data, filters):
+    """
+    Totais por tópico dos respondentes selecionados pelos filtros.
+
+    Args:
+        data: DataSnapshot com os dados atuais
+        filters: Filtros (coluna -> lista de valores)
+
+    Returns:
+        DataFrame: Totais por tópico (ver simple_nlp.topic_totals), ou None
+    """
+    if not filters:
+        return data.accumulated.get('topicos')
+    if use_sql(data, filters) and data.precomputed_topics:
+        with phase('banco'), store.pool.connection() as conn:
+            return queries.topic_totals(conn, filters)
+    with phase('agregacao'):
+        index = get_filter_index(data, classify_impacts)
+        # O gráfico de tópicos ignora o próprio filtro, como os demais gráficos
+        mask = index.mask(filters, exclude=(TOPICS_FILTER,))
+        return topic_totals(index.topic_table[mask])
+
+
+def classify_impacts(frame):
+    """Tópicos de todas as respostas "Impactos" (usado pelos filtros por tópico)."""
+    with phase('banco'):
+        topic_table = store.topic_assignments(frame.index, predefined_topics)
+    if topic_table is not None:
+        return topic_table
+    with phase('pln'):
+        return classify_responses(frame['Impactos'])
+
+
+def ocupacionais_figures(data, filters):
+    """Figuras da aba Dados Ocupacionais, do cache ou construídas e guardadas nele."""
+    # Sem filtros, as contagens já vêm prontas do DataStore
+    with phase('figuras'):
+        return figure_cache.get_or_build(
+            OCUPACIONAIS_CHARTS, f"{data.content_key}:{filters_key(filters)}",
+            lambda: create_ocupacionais_graphs(None, filtered_counts(data, filters, OCUPACIONAIS_CHARTS)),
+        )
 
-# Calcular porcentagem de homens e mulheres
-sexo_counts = df['Sexo'].value_counts()
-total_sexo = sexo_counts.sum()
-homens_count = sexo_counts.get('Masculino', 0)
-mulheres_count = sexo_counts.get('Feminino', 0)
-homens_percent = round((homens_count / total_sexo) * 100)
-mulheres_percent = round((mulheres_count / total_sexo) * 100)
 
-# Calcular resposta mais frequente para impacto na vida familiar
-familia_resposta_frequente = df['ImpactoVidaFamiliar'].value_counts().idxmax()
-familia_resposta_count = df['ImpactoVidaFamiliar'].value_counts().max()
-familia_resposta_percent = round((familia_resposta_count / total_respondentes) * 100)
+def pessoais_figures(data, filters):
+    """Figuras da aba Dados Pessoais, do cache ou construídas e guardadas nele."""
+    # As idades dependem da data atual, que também faz parte da versão
+    with phase('figuras'):
+        return figure_cache.get_or_build(
+            PESSOAIS_CHARTS, f"{data.content_key}:{filters_key(filters)}:{date.today().isoformat()}",
+            lambda: create_pessoais_graphs(None, filtered_counts(data, filters, PESSOAIS_CHARTS)),
+        )
 
-# Calcular resposta mais frequente para impacto na saúde física
-fisica_resposta_frequente = df['ImpactoSaudeFisica'].value_counts().idxmax()
-fisica_resposta_count = df['ImpactoSaudeFisica'].value_counts().max()
-fisica_resposta_percent = round((fisica_resposta_count / total_respondentes) * 100)
 
-# Calcular resposta mais frequente para impacto na saúde mental
-mental_resposta_frequente = df['ImpactoSaudeMental'].value_counts().idxmax()
-mental_resposta_count = df['ImpactoSaudeMental'].value_counts().max()
-mental_resposta_percent = round((mental_resposta_count / total_respondentes) * 100)
+def impacto_figures(data, filters):
+    """
+    Figuras da aba Percepção de Impacto, do cache ou construídas e guardadas nele.
+
+    Returns:
+        tuple: (identificador -> figura, se o gráfico de tópicos está pronto,
+        se o modelo de PLN não pôde ser carregado)
+    """
+    # Enquanto o modelo de PLN não estiver pronto, o gráfico de tópicos
+    # mostra um aviso de carregamento; se o carregamento falhou, um aviso
+    # de erro
+    ready = topics_available(data, filters)
+    failed = not ready and simple_nlp.load_error() is not None
+    state = 'pronto' if ready else 'erro' if failed else 'carregando'
+    with phase('figuras'):
+        graphs = figure_cache.get_or_build(
+            IMPACTO_CHARTS, f"{data.content_key}:{filters_key(filters)}:{state}",
+            lambda: {
+                **create_impacto_graphs(None, filtered_counts(data, filters, IMPACTO_CHARTS)),
+                'impactos': create_nlp_graph(filtered_topic_totals(data, filters) if ready else None,
+                                             loading=state == 'carregando', unavailable=failed),
+            },
+        )
+    return graphs, ready, failed
+
+
+def crosstab(data, rows, columns):
+    """Figura do cruzamento de duas colunas, a partir do cubo de contagens."""
+    if rows == columns:
+        return empty_figure(COLUMN_LABELS[rows], "Escolha duas perguntas diferentes")
+    # O cruzamento sai do cubo em microssegundos; montar a figura custa mais,
+    # então ela também é guardada no cache, na versão do cubo
+    with phase('agregacao'):
+        cube = get_count_cube(data)
+    chart = f"cruzamento:{rows}:{columns}"
+    with phase('figuras'):
+        return figure_cache.get_or_build(
+            [chart], cube.key,
+            lambda: {chart: crosstab_figure(cube.crosstab(rows, columns, top=CROSSTAB_TOP),
+                                            COLUMN_LABELS[rows], COLUMN_LABELS[columns])},
+        )[chart]
+
+
+def warm_figures(data):
+    """Constrói no cache as figuras sem filtros de todas as abas."""
+    ocupacionais_figures(data, {})
+    pessoais_figures(data, {})
+    impacto_figures(data, {})
+
+
+def prepare_snapshot(data):
+    """Prepara um novo snapshot antes de publicá-lo: figuras e cubo de contagens."""
+    warm_figures(data)
+    get_count_cube(data)
+
+# Atualização em segundo plano: os callbacks leem o último snapshot
+# publicado, com as figuras sem filtros e o cubo já prontos (ver refresher.py)
+refresher = BackgroundRefresher(store, warm=prepare_snapshot)
+
+# Tempo máximo que o botão de atualização espera por dados novos, em segundos
+REFRESH_WAIT_SECONDS = 3
+
+def current_data():
+    """Último snapshot publicado (ver refresher.py); nos callbacks, conta como leitura do banco."""
+    with phase('banco'):
+        return refresher.snapshot()
+
+# Sinalizado ao final de warm_up(); até lá, /healthz responde 503
+warmed_up = threading.Event()
+
+def warm_up():
+    """
+    Prepara o processo antes de atender requisições.
+
+    Carrega o modelo de PLN (a menos que os tópicos estejam pré-calculados) e
+    as respostas, monta o índice de filtragem e constrói no cache as figuras
+    sem filtros de todas as abas, o cubo de contagens e o cruzamento inicial.
+    No servidor de produção (wsgi.py) é executado uma única vez, no processo
+    principal, antes da criação dos workers.
+
+    Returns:
+        float: Duração do aquecimento, em segundos
+    """
+    start = time.perf_counter()
+    start_nlp_loading_if_needed()
+    simple_nlp.wait_background_load()
+
+    data = store.snapshot()
+    if not SQL_BACKEND:
+        get_filter_index(data, classify_impacts)
+    prepare_snapshot(data)
+    crosstab(data, *CROSSTAB_DEFAULTS)
+
+    elapsed = time.perf_counter() - start
+    warmed_up.set()
+    print(f"Aquecimento concluído em {elapsed:.2f}s: {data.row_count} respondentes, "
+          f"{figure_cache.current_bytes / 1024:.0f} KB de figuras no cache")
+    return elapsed
+
+def close_connections():
+    """
+    Fecha as conexões SQLite do processo (banco e cache de PLN).
+
+    Chamado antes do fork dos workers: conexões SQLite não devem ser
+    compartilhadas entre processos. Cada worker as reabre no primeiro uso.
+    """
+    store.close()
+    simple_nlp.close_classification_cache()
+
+# Load the data (o DataStore é compartilhado pelos KPIs e por todos os callbacks)
+data = store.snapshot()
+counts = data.counts
+
+# Calcular KPIs (valores iniciais; os cards são atualizados por update_kpis)
+kpis = get_kpis(data)
 
 # Define the order of responses for uso futuro
 order = [ "Concordo totalmente" , "Concordo",  "Nem concordo nem discordo", "Discordo",  "Discordo totalmente" ]
@@ -155,6 +432,96 @@ order = [ "Concordo totalmente" , "Concordo",  "Nem concordo nem discordo", "Dis
 
 
 
+# Cards dos KPIs, do texto de resumo do cabeçalho e do quadro "Sobre os Dados"
+def kpi_cards(kpis):
+    """Cards do topo do dashboard com os indicadores (ver kpis.compute_kpis)."""
+    return [
+        # KPI 1 - Trabalhadores na escala 6x1
+        html.Div([
+            html.Div([
+                html.Div("👥", style=KPI_ICON_STYLE),
+                html.Div("Trabalhadores na Escala 6x1", style=KPI_LABEL_STYLE),
+                html.Div(f"{kpis['escala_6x1_percent']}%", style=KPI_VALUE_STYLE),
+                html.Div(f"{kpis['escala_6x1_count']} de {kpis['total_respondentes']} respondentes",
+                         style={'fontSize': '12px', 'color': COLORS['text'], 'opacity': '0.7'})
+            ], style=KPI_CARD_STYLE)
+        ], style={'width': '19%', 'display': 'inline-block', 'marginRight': '1%'}),
+
+        # KPI 2 - Distribuição por sexo
+        html.Div([
+            html.Div([
+                html.Div("👫", style=KPI_ICON_STYLE),
+                html.Div("Distribuição por Sexo", style=KPI_LABEL_STYLE),
+                html.Div([
+                    html.Span(f"H: {kpis['homens_percent']}%", style={'marginRight': '10px'}),
+                    html.Span(f"M: {kpis['mulheres_percent']}%")
+                ], style=KPI_VALUE_STYLE),
+                html.Div(f"{kpis['homens_count']} homens, {kpis['mulheres_count']} mulheres",
+                         style={'fontSize': '12px', 'color': COLORS['text'], 'opacity': '0.7', 'whiteSpace': 'nowrap'})
+            ], style={**KPI_CARD_STYLE, 'whiteSpace': 'nowrap'})
+        ], style={'width': '19%', 'display': 'inline-block', 'marginRight': '1%'}),
+
+        # KPI 3 - Impacto na vida familiar
+        html.Div([
+            html.Div([
+                html.Div("👪", style=KPI_ICON_STYLE),
+                html.Div("Impacto na Vida Familiar", style=KPI_LABEL_STYLE),
+                html.Div(f"{kpis['familia_resposta_percent']}%", style=KPI_VALUE_STYLE),
+                html.Div(f"Resposta mais frequente: {kpis['familia_resposta_frequente']}",
+                         style={'fontSize': '12px', 'color': COLORS['text'], 'opacity': '0.7',
+                                'wordWrap': 'break-word', 'width': '100%'})
+            ], style=KPI_CARD_STYLE)
+        ], style={'width': '19%', 'display': 'inline-block', 'marginRight': '1%'}),
+
+        # KPI 4 - Impacto na saúde física
+        html.Div([
+            html.Div([
+                html.Div("💪", style=KPI_ICON_STYLE),
+                html.Div("Impacto na Saúde Física", style=KPI_LABEL_STYLE),
+                html.Div(f"{kpis['fisica_resposta_percent']}%", style=KPI_VALUE_STYLE),
+                html.Div(f"Resposta mais frequente: {kpis['fisica_resposta_frequente']}",
+                         style={'fontSize': '12px', 'color': COLORS['text'], 'opacity': '0.7',
+                                'wordWrap': 'break-word', 'width': '100%'})
+            ], style=KPI_CARD_STYLE)
+        ], style={'width': '19%', 'display': 'inline-block', 'marginRight': '1%'}),
+
+        # KPI 5 - Impacto na saúde mental
+        html.Div([
+            html.Div([
+                html.Div("🧠", style=KPI_ICON_STYLE),
+                html.Div("Impacto na Saúde Mental", style=KPI_LABEL_STYLE),
+                html.Div(f"{kpis['mental_resposta_percent']}%", style=KPI_VALUE_STYLE),
+                html.Div(f"Resposta mais frequente: {kpis['mental_resposta_frequente']}",
+                         style={'fontSize': '12px', 'color': COLORS['text'], 'opacity': '0.7',
+                                'wordWrap': 'break-word', 'width': '100%'})
+            ], style=KPI_CARD_STYLE)
+        ], style={'width': '19%', 'display': 'inline-block'}),
+    ]
+
+def loaded_at_text(data, time_format):
+    """Momento em que os dados do snapshot foram lidos, formatado."""
+    return time.strftime(time_format, time.localtime(data.loaded_at))
+
+def data_summary(data):
+    """Texto do cabeçalho com a quantidade de respondentes e a data de atualização."""
+    return f"Total de {data.row_count} respondentes • Última atualização: {loaded_at_text(data, '%d/%m/%Y')}"
+
+def about_data_text(data):
+    """Texto do quadro "Sobre os Dados"."""
+    return [
+        f"Total de {data.row_count} respondentes. ",
+        f"Última atualização: {loaded_at_text(data, '%d/%m/%Y %H:%M')}"
+    ]
+
+def about_data_card(data):
+    """Quadro "Sobre os Dados", exibido ao final de cada aba."""
+    return html.Div([
+        html.Div([
+            html.H4("Sobre os Dados", style={'color': COLORS['title'], 'marginBottom': '10px'}),
+            html.P(about_data_text(data), id='sobre-dados', style={'fontSize': '14px', 'color': COLORS['text']}),
+        ], style={'padding': '15px'})
+    ], style={**CARD_STYLE, 'marginTop': '25px', 'backgroundColor': COLORS['background']})
+
 # Initialize the Dash app
 app = dash.Dash(
     __name__,
@@ -162,6 +529,41 @@ app = dash.Dash(
     suppress_callback_exceptions=True,  # Add this to suppress callback exceptions for components not in initial layout
     meta_tags=[{"name": "viewport", "content": "width=device-width, initial-scale=1"}]
 )
+app.server.before_request(start_nlp_loading_if_needed)
+# A thread é iniciada na primeira requisição, já no processo que atende
+app.server.before_request(refresher.start)
+
+@app.server.route('/healthz')
+def healthz():
+    """Health check: responde 200 depois do aquecimento (ver warm_up) e 503 antes."""
+    if not warmed_up.is_set():
+        return flask.jsonify(status='aquecendo'), 503
+    return flask.jsonify(status='pronto', versao=refresher.version())
+
+# Tempo dos callbacks por etapa (ver metrics.py): a serialização da resposta
+# é medida ao final da requisição
+app.server.after_request(metrics.finish_request)
+
+@app.server.route('/metrics')
+def metrics_endpoint():
+    """
+    Métricas no formato de exposição do Prometheus.
+
+    As métricas são do processo que atende a requisição (rótulo pid): com
+    vários workers, cada coleta vê só um deles, e os contadores devem ser
+    somados entre os pids no Prometheus (ver metrics.py).
+    """
+    extra = [
+        *metrics.metric_lines('dashboard_figure_cache_hits_total', 'counter',
+                              'Figuras encontradas no cache', figure_cache.hits),
+        *metrics.metric_lines('dashboard_figure_cache_misses_total', 'counter',
+                              'Figuras construídas por não estarem no cache', figure_cache.misses),
+        *metrics.metric_lines('dashboard_figure_cache_bytes', 'gauge',
+                              'Tamanho das figuras no cache, em bytes', figure_cache.current_bytes),
+        *metrics.metric_lines('dashboard_respondentes', 'gauge',
+                              'Quantidade de respondentes nos dados publicados', refresher.snapshot().row_count),
+    ]
+    return flask.Response(metrics.registry.render(extra), mimetype='text/plain; version=0.0.4')
 
 
 
@@ -225,17 +627,6 @@ tab1_content = html.Div([
                 html.Div(id='estado-trabalho-container', style={'height': '350px'})
             ], style=CARD_STYLE)
         ], style={'width': '48%', 'display': 'inline-block', 'marginBottom': '20px'}),
-
-        # Informações sobre os dados
-        html.Div([
-            html.Div([
-                html.H4("Sobre os Dados", style={'color': COLORS['title'], 'marginBottom': '10px'}),
-                html.P([
-                    f"Total de {total_respondentes} respondentes. ",
-                    f"Última atualização: {pd.Timestamp.now().strftime('%d/%m/%Y %H:%M')}"
-                ], style={'fontSize': '14px', 'color': COLORS['text']}),
-            ], style={'padding': '15px'})
-        ], style={**CARD_STYLE, 'marginTop': '25px', 'backgroundColor': COLORS['background']}),
     ])
 ])
 
@@ -301,17 +692,6 @@ tab2_content = html.Div([
                 html.Div(id='escolaridade-container', style={'height': '300px'})
             ], style=CARD_STYLE)
         ], style={'width': '100%', 'marginBottom': '20px'}),
-
-        # Informações sobre os dados
-        html.Div([
-            html.Div([
-                html.H4("Sobre os Dados", style={'color': COLORS['title'], 'marginBottom': '10px'}),
-                html.P([
-                    f"Total de {total_respondentes} respondentes. ",
-                    f"Última atualização: {pd.Timestamp.now().strftime('%d/%m/%Y %H:%M')}"
-                ], style={'fontSize': '14px', 'color': COLORS['text']}),
-            ], style={'padding': '15px'})
-        ], style={**CARD_STYLE, 'marginTop': '25px', 'backgroundColor': COLORS['background']}),
     ])
 ])
 
@@ -350,20 +730,43 @@ tab3_content = html.Div([
         html.Div([
             html.Div([
                 html.H4("Análise de Tópicos nas Respostas", style={'color': COLORS['title'], 'marginBottom': '15px'}),
-                html.Div(id='impactos-container', style={'height': '500px'})
+                html.Div(id='impactos-container', style={'height': '500px'}),
+                # Verifica periodicamente se o modelo de PLN já foi carregado
+                dcc.Interval(id='nlp-poll', interval=2000, disabled=False)
             ], style=CARD_STYLE)
         ], style={'width': '100%', 'marginBottom': '20px'}),
+    ])
+])
+
+# Aba 4 - Cruzamentos (respondidos pelo cubo de contagens, ver count_cube.py)
+CROSSTAB_OPTIONS = [{'label': COLUMN_LABELS[column], 'value': column} for column in CUBE_COLUMNS]
+tab4_content = html.Div([
+    html.Div([
+
+
+        html.H3("Cruzamentos", style={'color': COLORS['title'], 'marginBottom': '20px', 'textAlign': 'center'}),
 
-        # Informações sobre os dados
         html.Div([
             html.Div([
-                html.H4("Sobre os Dados", style={'color': COLORS['title'], 'marginBottom': '10px'}),
-                html.P([
-                    f"Total de {total_respondentes} respondentes. ",
-                    f"Última atualização: {pd.Timestamp.now().strftime('%d/%m/%Y %H:%M')}"
-                ], style={'fontSize': '14px', 'color': COLORS['text']}),
-            ], style={'padding': '15px'})
-        ], style={**CARD_STYLE, 'marginTop': '25px', 'backgroundColor': COLORS['background']}),
+                # Escolha das colunas (omitida na exportação estática)
+                html.Div(id='cruzamento-escolha', children=[
+                    html.P("Escolha duas perguntas para ver quantos respondentes deram cada combinação de respostas. "
+                           "Os filtros dos gráficos não se aplicam a esta aba.",
+                           style={'fontSize': '14px', 'color': COLORS['text'], 'marginBottom': '15px'}),
+                    html.Div([
+                        html.Label("Linhas", style={'fontWeight': 'bold', 'fontSize': '14px'}),
+                        dcc.Dropdown(id='cruzamento-linhas', options=CROSSTAB_OPTIONS,
+                                     value=CROSSTAB_DEFAULTS[0], clearable=False),
+                    ], style={'width': '48%', 'display': 'inline-block', 'marginRight': '4%'}),
+                    html.Div([
+                        html.Label("Colunas", style={'fontWeight': 'bold', 'fontSize': '14px'}),
+                        dcc.Dropdown(id='cruzamento-colunas', options=CROSSTAB_OPTIONS,
+                                     value=CROSSTAB_DEFAULTS[1], clearable=False),
+                    ], style={'width': '48%', 'display': 'inline-block'}),
+                ], style={'marginBottom': '20px'}),
+                html.Div(id='cruzamento-container', style={'minHeight': '350px'})
+            ], style=CARD_STYLE)
+        ], style={'width': '100%', 'marginBottom': '20px'}),
     ])
 ])
 
@@ -376,7 +779,7 @@ app.layout = html.Div(style=GLOBAL_STYLE, children=[
                 html.H1("Dashboard de Análise da Escala 6x1", style=HEADER_STYLE),
                 html.P("Análise dos impactos na vida dos trabalhadores",
                        style={'textAlign': 'center', 'marginBottom': '5px', 'fontSize': '18px', 'color': COLORS['text']}),
-                html.P(f"Total de {total_respondentes} respondentes • Última atualização: {pd.Timestamp.now().strftime('%d/%m/%Y')}",
+                html.P(data_summary(data), id='resumo-dados',
                        style={'textAlign': 'center', 'fontSize': '14px', 'color': COLORS['text'], 'opacity': '0.7'}),
             ], style={'width': '100%', 'textAlign': 'center'})
         ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'marginBottom': '20px'})
@@ -407,69 +810,34 @@ app.layout = html.Div(style=GLOBAL_STYLE, children=[
         html.Div(style={'clear': 'both'})
     ]),
 
-    # KPI Cards Row
-    html.Div([
-        # KPI 1 - Trabalhadores na escala 6x1
-        html.Div([
-            html.Div([
-                html.Div("👥", style=KPI_ICON_STYLE),
-                html.Div("Trabalhadores na Escala 6x1", style=KPI_LABEL_STYLE),
-                html.Div(f"{escala_6x1_percent}%", style=KPI_VALUE_STYLE),
-                html.Div(f"{escala_6x1_count} de {total_respondentes} respondentes",
-                         style={'fontSize': '12px', 'color': COLORS['text'], 'opacity': '0.7'})
-            ], style=KPI_CARD_STYLE)
-        ], style={'width': '19%', 'display': 'inline-block', 'marginRight': '1%'}),
+    # Versão dos dados exibidos; muda quando a atualização em segundo plano
+    # publica novos dados, o que redesenha os gráficos da aba atual
+    dcc.Store(id='versao-dados', data=data_version(data)),
+    dcc.Interval(id='refresh-poll', interval=max(REFRESH_INTERVAL, 1) * 1000, disabled=REFRESH_INTERVAL <= 0),
 
-        # KPI 2 - Distribuição por sexo
-        html.Div([
-            html.Div([
-                html.Div("👫", style=KPI_ICON_STYLE),
-                html.Div("Distribuição por Sexo", style=KPI_LABEL_STYLE),
-                html.Div([
-                    html.Span(f"H: {homens_percent}%", style={'marginRight': '10px'}),
-                    html.Span(f"M: {mulheres_percent}%")
-                ], style=KPI_VALUE_STYLE),
-                html.Div(f"{homens_count} homens, {mulheres_count} mulheres",
-                         style={'fontSize': '12px', 'color': COLORS['text'], 'opacity': '0.7', 'whiteSpace': 'nowrap'})
-            ], style={**KPI_CARD_STYLE, 'whiteSpace': 'nowrap'})
-        ], style={'width': '19%', 'display': 'inline-block', 'marginRight': '1%'}),
-
-        # KPI 3 - Impacto na vida familiar
-        html.Div([
-            html.Div([
-                html.Div("👪", style=KPI_ICON_STYLE),
-                html.Div("Impacto na Vida Familiar", style=KPI_LABEL_STYLE),
-                html.Div(f"{familia_resposta_percent}%", style=KPI_VALUE_STYLE),
-                html.Div(f"Resposta mais frequente: {familia_resposta_frequente}",
-                         style={'fontSize': '12px', 'color': COLORS['text'], 'opacity': '0.7',
-                                'wordWrap': 'break-word', 'width': '100%'})
-            ], style=KPI_CARD_STYLE)
-        ], style={'width': '19%', 'display': 'inline-block', 'marginRight': '1%'}),
-
-        # KPI 4 - Impacto na saúde física
-        html.Div([
-            html.Div([
-                html.Div("💪", style=KPI_ICON_STYLE),
-                html.Div("Impacto na Saúde Física", style=KPI_LABEL_STYLE),
-                html.Div(f"{fisica_resposta_percent}%", style=KPI_VALUE_STYLE),
-                html.Div(f"Resposta mais frequente: {fisica_resposta_frequente}",
-                         style={'fontSize': '12px', 'color': COLORS['text'], 'opacity': '0.7',
-                                'wordWrap': 'break-word', 'width': '100%'})
-            ], style=KPI_CARD_STYLE)
-        ], style={'width': '19%', 'display': 'inline-block', 'marginRight': '1%'}),
+    # Filtros ativos (filtragem cruzada: clique em uma barra ou fatia)
+    dcc.Store(id='filtros', data={}),
+    html.Div([
+        html.Span(id='filtros-ativos', style={'fontSize': '14px', 'color': COLORS['text']}),
+        html.Button(
+            '✕ Limpar filtros',
+            id='limpar-filtros',
+            n_clicks=0,
+            style={
+                'backgroundColor': 'white',
+                'color': COLORS['primary'],
+                'border': f'1px solid {COLORS["primary"]}',
+                'padding': '6px 14px',
+                'borderRadius': '5px',
+                'cursor': 'pointer',
+                'fontSize': '13px',
+                'marginLeft': '15px',
+            }
+        ),
+    ], style={'marginBottom': '20px', 'display': 'flex', 'alignItems': 'center'}),
 
-        # KPI 5 - Impacto na saúde mental
-        html.Div([
-            html.Div([
-                html.Div("🧠", style=KPI_ICON_STYLE),
-                html.Div("Impacto na Saúde Mental", style=KPI_LABEL_STYLE),
-                html.Div(f"{mental_resposta_percent}%", style=KPI_VALUE_STYLE),
-                html.Div(f"Resposta mais frequente: {mental_resposta_frequente}",
-                         style={'fontSize': '12px', 'color': COLORS['text'], 'opacity': '0.7',
-                                'wordWrap': 'break-word', 'width': '100%'})
-            ], style=KPI_CARD_STYLE)
-        ], style={'width': '19%', 'display': 'inline-block'}),
-    ], style={'marginBottom': '25px'}),
+    # KPI Cards Row (atualizados a cada nova versão dos dados, ver update_kpis)
+    html.Div(id='kpi-cards', children=kpi_cards(kpis), style={'marginBottom': '25px'}),
 
     # Tabs para as diferentes seções de dados
     html.Div([
@@ -477,6 +845,7 @@ app.layout = html.Div(style=GLOBAL_STYLE, children=[
             dcc.Tab(label='Dados Ocupacionais', value='tab-1', style=TAB_STYLE, selected_style=TAB_SELECTED_STYLE),
             dcc.Tab(label='Dados Pessoais', value='tab-2', style=TAB_STYLE, selected_style=TAB_SELECTED_STYLE),
             dcc.Tab(label='Percepção de Impacto', value='tab-3', style=TAB_STYLE, selected_style=TAB_SELECTED_STYLE),
+            dcc.Tab(label='Cruzamentos', value='tab-4', style=TAB_STYLE, selected_style=TAB_SELECTED_STYLE),
         ]),
         html.Div(id='tabs-content')
     ], style={'marginTop': '20px'}),
@@ -500,823 +869,61 @@ app.layout = html.Div(style=GLOBAL_STYLE, children=[
     Output('tabs-content', 'children'),
     [Input('tabs-dashboard', 'value')]
 )
+@timed
 def render_content(tab):
     if tab == 'tab-1':
-        return tab1_content
+        content = tab1_content
     elif tab == 'tab-2':
-        return tab2_content
+        content = tab2_content
     elif tab == 'tab-3':
-        return tab3_content
-    return html.Div([html.H3("Conteúdo não encontrado")])
-
-# Função para criar os gráficos da aba Dados Ocupacionais
-def create_ocupacionais_graphs(df):
-    graphs = {}
-
-    # Gráfico 1: Tempo na Escala 6x1 - Barras verticais ordenadas
-    # Definir a ordem correta para TempoEscala6x1
-    tempo_order = [
-        'menos de um ano',
-        'entre um e dois anos',
-        'entre dois e três anos',
-        'entre três e quatro anos',
-        'entre quatro e cinco anos',
-        'mais de cinco anos'
-    ]
-
-    tempo_counts = df['TempoEscala6x1'].value_counts().reset_index()
-    tempo_counts.columns = ['tempo', 'contagem']
-    tempo_counts['tempo'] = pd.Categorical(tempo_counts['tempo'], categories=tempo_order, ordered=True)
-    tempo_counts = tempo_counts.sort_values('tempo')
-
-    tempo_fig = px.bar(
-        tempo_counts,
-        x='tempo',
-        y='contagem',
-        title="Tempo na Escala 6x1",
-        color_discrete_sequence=[COLORS['chart1']],
-        text='contagem',
-        labels={'tempo': 'Tempo', 'contagem': 'Quantidade'},
-        height=300,
-    )
-    tempo_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        xaxis_title="Tempo",
-        yaxis_title="Quantidade",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=40, b=50),
-        xaxis=dict(tickangle=45),  # Rotacionar os rótulos para melhor visualização
-    )
-    # Definir limites para posicionamento interno/externo baseado no valor
-    max_value = tempo_counts['contagem'].max()
-    threshold = max_value * 0.8  # 80% do valor máximo como limite
-
-    # Criar uma lista para armazenar as posições dos textos
-    text_positions = []
-    text_colors = []
-
-    # Determinar a posição e cor para cada barra
-    for value in tempo_counts['contagem']:
-        if value > threshold:
-            text_positions.append('inside')
-            text_colors.append('white')
-        else:
-            text_positions.append('outside')
-            text_colors.append('black')
-
-    tempo_fig.update_traces(
-        marker_color=COLORS['chart1'],
-        marker_line_color='rgba(0,0,0,0)',
-        opacity=0.8,
-        texttemplate='%{y}',
-        textposition=text_positions,  # Lista de posições específicas
-        textfont=dict(color=text_colors),  # Lista de cores específicas
-    )
-    graphs['tempo_escala_6x1'] = tempo_fig
-
-    # Gráfico 2: Tipo de Contrato de Trabalho - Barras horizontais
-    contrato_counts = df['ContratoTrabalho'].value_counts().reset_index()
-    contrato_counts.columns = ['contrato', 'contagem']
-    contrato_counts = contrato_counts.sort_values('contagem', ascending=True)  # Ascendente para barras horizontais
-
-    contrato_fig = px.bar(
-        contrato_counts,
-        y='contrato',
-        x='contagem',
-        title="Tipo de Contrato de Trabalho",
-        color_discrete_sequence=[COLORS['chart2']],
-        orientation='h',  # Horizontal
-        text='contagem',
-        labels={'contrato': 'Tipo de Contrato', 'contagem': 'Quantidade'},
-        height=300,
-    )
-    contrato_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        xaxis_title="Quantidade",
-        yaxis_title="",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=40, b=10),
-    )
-    # Definir limites para posicionamento interno/externo baseado no valor
-    max_value = contrato_counts['contagem'].max()
-    threshold = max_value * 0.8  # 80% do valor máximo como limite
-
-    # Criar uma lista para armazenar as posições dos textos
-    text_positions = []
-    text_colors = []
-
-    # Determinar a posição e cor para cada barra
-    for value in contrato_counts['contagem']:
-        if value > threshold:
-            text_positions.append('inside')
-            text_colors.append('white')
-        else:
-            text_positions.append('outside')
-            text_colors.append('black')
-
-    contrato_fig.update_traces(
-        marker_color=COLORS['chart2'],
-        marker_line_color='rgba(0,0,0,0)',
-        opacity=0.8,
-        texttemplate='%{x}',
-        textposition=text_positions,  # Lista de posições específicas
-        textfont=dict(color=text_colors),  # Lista de cores específicas
-    )
-    graphs['contrato_trabalho'] = contrato_fig
-
-    # Gráfico 3: Horas de Trabalho - Barras verticais ordenadas
-    # Definir a ordem correta para HorasTrabalho
-    horas_order = [
-        'Menos de 6 horas',
-        '6 horas até menos de 7 horas',
-        '7 horas até menos de 8 horas',
-        '8 horas até menos de 9 horas',
-        '9 horas até menos de 10 horas',
-        '10 horas ou mais'
-    ]
+        content = tab3_content
+    elif tab == 'tab-4':
+        content = tab4_content
+    else:
+        return html.Div([html.H3("Conteúdo não encontrado")])
+    # O quadro "Sobre os Dados" mostra os dados atuais, e não os da importação
+    return html.Div([content, about_data_card(current_data())])
 
-    horas_counts = df['HorasTrabalho'].value_counts().reset_index()
-    horas_counts.columns = ['horas', 'contagem']
-    horas_counts['horas'] = pd.Categorical(horas_counts['horas'], categories=horas_order, ordered=True)
-    horas_counts = horas_counts.sort_values('horas')
-
-    horas_fig = px.bar(
-        horas_counts,
-        x='horas',
-        y='contagem',
-        title="Horas de Trabalho",
-        color_discrete_sequence=[COLORS['chart3']],
-        text='contagem',
-        labels={'horas': 'Horas', 'contagem': 'Quantidade'},
-        height=300,
-    )
-    horas_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        xaxis_title="Horas",
-        yaxis_title="Quantidade",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=40, b=10),
-        xaxis=dict(tickangle=45),  # Rotacionar os rótulos para melhor visualização
-    )
-    # Definir limites para posicionamento interno/externo baseado no valor
-    max_value = horas_counts['contagem'].max()
-    threshold = max_value * 0.8  # 80% do valor máximo como limite
-
-    # Criar uma lista para armazenar as posições dos textos
-    text_positions = []
-    text_colors = []
-
-    # Determinar a posição e cor para cada barra
-    for value in horas_counts['contagem']:
-        if value > threshold:
-            text_positions.append('inside')
-            text_colors.append('white')
-        else:
-            text_positions.append('outside')
-            text_colors.append('black')
-
-    horas_fig.update_traces(
-        marker_color=COLORS['chart3'],
-        marker_line_color='rgba(0,0,0,0)',
-        opacity=0.8,
-        texttemplate='%{y}',
-        textposition=text_positions,  # Lista de posições específicas
-        textfont=dict(color=text_colors),  # Lista de cores específicas
-    )
-    graphs['horas_trabalho'] = horas_fig
-
-    # Gráfico 4: Ocupações - Top 10 com barra de rolagem
-    occupation_counts = df['Occupation_Respostas'].value_counts().reset_index()
-    occupation_counts.columns = ['ocupacao', 'contagem']
-    # Armazenar todos os dados para a barra de rolagem
-    occupation_all = occupation_counts.sort_values('contagem', ascending=False).copy()
-    # Pegar os top 10 para o gráfico inicial
-    occupation_counts = occupation_counts.sort_values('contagem', ascending=False).head(10)
-
-    # Ordenar por contagem para barras horizontais (ascendente)
-    occupation_counts = occupation_counts.sort_values('contagem', ascending=True)
-
-    occupation_fig = px.bar(
-        occupation_counts,
-        y='ocupacao',
-        x='contagem',
-        title="Top 10 Ocupações",
-        color_discrete_sequence=[COLORS['chart4']],
-        orientation='h',  # Horizontal
-        text='contagem',
-        labels={'ocupacao': 'Ocupação', 'contagem': 'Quantidade'},
-        height=350,
-    )
-    occupation_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        xaxis_title="Quantidade",
-        yaxis_title="",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=40, b=10),
-        # Truncar textos longos
-        yaxis=dict(
-            tickmode='array',
-            tickvals=occupation_counts['ocupacao'],
-            ticktext=[f"{x[:30]}..." if len(x) > 30 else x for x in occupation_counts['ocupacao']]
-        ),
-        height=400  # Aumentar a altura para acomodar mais itens
-    )
-    # Definir limites para posicionamento interno/externo baseado no valor
-    max_value = occupation_counts['contagem'].max()
-    threshold = max_value * 0.8  # 80% do valor máximo como limite
-
-    # Criar uma lista para armazenar as posições dos textos
-    text_positions = []
-    text_colors = []
-
-    # Determinar a posição e cor para cada barra
-    for value in occupation_counts['contagem']:
-        if value > threshold:
-            text_positions.append('inside')
-            text_colors.append('white')
-        else:
-            text_positions.append('outside')
-            text_colors.append('black')
-
-    occupation_fig.update_traces(
-        marker_color=COLORS['chart4'],
-        marker_line_color='rgba(0,0,0,0)',
-        opacity=0.8,
-        texttemplate='%{x}',
-        textposition=text_positions,  # Lista de posições específicas
-        textfont=dict(color=text_colors),  # Lista de cores específicas
-    )
-    graphs['occupation'] = occupation_fig
-
-    # Gráfico 5: CNAE - Top 10 com barra de rolagem e barras horizontais
-    cnae_counts = df['CnaeDivision_Respostas'].value_counts().reset_index()
-    cnae_counts.columns = ['cnae', 'contagem']
-    # Armazenar todos os dados para a barra de rolagem
-    cnae_all = cnae_counts.sort_values('contagem', ascending=False).copy()
-    # Pegar os top 10 para o gráfico inicial
-    cnae_counts = cnae_counts.sort_values('contagem', ascending=True).tail(10)  # Pegando os 10 maiores em ordem ascendente
-
-    cnae_fig = px.bar(
-        cnae_counts,
-        y='cnae',
-        x='contagem',
-        title="Top 10 CNAEs",
-        color_discrete_sequence=[COLORS['chart1']],
-        orientation='h',  # Horizontal
-        text='contagem',
-        labels={'cnae': 'CNAE', 'contagem': 'Quantidade'},
-        height=300,
-    )
-    cnae_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        xaxis_title="Quantidade",
-        yaxis_title="",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=40, b=10),
-        # Truncar textos longos
-        yaxis=dict(
-            tickmode='array',
-            tickvals=cnae_counts['cnae'],
-            ticktext=[f"{x[:30]}..." if len(x) > 30 else x for x in cnae_counts['cnae']]
-        ),
-        height=400  # Aumentar a altura para acomodar mais itens
-    )
-    # Definir limites para posicionamento interno/externo baseado no valor
-    max_value = cnae_counts['contagem'].max()
-    threshold = max_value * 0.8  # 80% do valor máximo como limite
-
-    # Criar uma lista para armazenar as posições dos textos
-    text_positions = []
-    text_colors = []
-
-    # Determinar a posição e cor para cada barra
-    for value in cnae_counts['contagem']:
-        if value > threshold:
-            text_positions.append('inside')
-            text_colors.append('white')
-        else:
-            text_positions.append('outside')
-            text_colors.append('black')
-
-    cnae_fig.update_traces(
-        marker_color=COLORS['chart1'],
-        marker_line_color='rgba(0,0,0,0)',
-        opacity=0.8,
-        texttemplate='%{x}',
-        textposition=text_positions,  # Lista de posições específicas
-        textfont=dict(color=text_colors),  # Lista de cores específicas
-    )
-    graphs['cnae'] = cnae_fig
-
-    # Gráfico 6: Estado de Trabalho - Top 10 com barra de rolagem
-    estado_counts = df['EstadoTrabalho'].value_counts().reset_index()
-    estado_counts.columns = ['estado', 'contagem']
-    # Armazenar todos os dados para a barra de rolagem
-    estado_all = estado_counts.sort_values('contagem', ascending=False).copy()
-    # Pegar os top 10 para o gráfico inicial
-    estado_counts = estado_counts.sort_values('contagem', ascending=False).head(10)
-
-    estado_fig = px.bar(
-        estado_counts,
-        x='estado',
-        y='contagem',
-        title="Top 10 Estados",
-        color_discrete_sequence=[COLORS['chart2']],
-        text='contagem',
-        labels={'estado': 'Estado', 'contagem': 'Quantidade'},
-        height=300,
-    )
-    estado_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        xaxis_title="Estado",
-        yaxis_title="Quantidade",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=40, b=10),
-    )
-    # Definir limites para posicionamento interno/externo baseado no valor
-    max_value = estado_counts['contagem'].max()
-    threshold = max_value * 0.8  # 80% do valor máximo como limite
-
-    # Criar uma lista para armazenar as posições dos textos
-    text_positions = []
-    text_colors = []
-
-    # Determinar a posição e cor para cada barra
-    for value in estado_counts['contagem']:
-        if value > threshold:
-            text_positions.append('inside')
-            text_colors.append('white')
-        else:
-            text_positions.append('outside')
-            text_colors.append('black')
-
-    estado_fig.update_traces(
-        marker_color=COLORS['chart2'],
-        marker_line_color='rgba(0,0,0,0)',
-        opacity=0.8,
-        texttemplate='%{y}',
-        textposition=text_positions,  # Lista de posições específicas
-        textfont=dict(color=text_colors),  # Lista de cores específicas
-    )
-    graphs['estado_trabalho'] = estado_fig
+# Callback dos KPIs e do resumo do cabeçalho: recalculados apenas quando a
+# versão dos dados muda (ver kpis.get_kpis); também na abertura da página,
+# que pode ter sido carregada com o layout de uma versão anterior
+@app.callback(
+    [Output('kpi-cards', 'children'),
+     Output('resumo-dados', 'children')],
+    [Input('versao-dados', 'data')]
+)
+@timed
+def update_kpis(version):
+    data = current_data()
+    with phase('agregacao'):
+        current_kpis = get_kpis(data)
+    return kpi_cards(current_kpis), data_summary(data)
+
+# Callback do quadro "Sobre os Dados" da aba aberta quando chegam dados novos
+@app.callback(
+    Output('sobre-dados', 'children'),
+    [Input('versao-dados', 'data')],
+    prevent_initial_call=True
+)
+@timed
+def update_about_data(version):
+    return about_data_text(current_data())
 
-    return graphs
+# Função para criar os gráficos da aba Dados Ocupacionais
+def create_ocupacionais_graphs(df, counts=None):
+    """Gráficos da aba Dados Ocupacionais (ver charts.py)."""
+    # Contagens por coluna (podem vir prontas do carregador incremental)
+    if counts is None:
+        counts = count_values(df)
+    return build_figures(OCUPACIONAIS_CHARTS, counts)
 
 # Função para criar os gráficos da aba Dados Pessoais
-def create_pessoais_graphs(df):
-    graphs = {}
-
-    # Gráfico 1: Sexo - Gráfico de Pizza
-    sexo_counts = df['Sexo'].value_counts().reset_index()
-    sexo_counts.columns = ['sexo', 'contagem']
-
-    sexo_fig = px.pie(
-        sexo_counts,
-        values='contagem',
-        names='sexo',
-        title="Distribuição por Sexo",
-        color_discrete_sequence=[COLORS['chart1'], COLORS['chart2'], COLORS['chart3']],
-    )
-    sexo_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=40, b=10),
-        legend=dict(
-            orientation="v",
-            yanchor="top",
-            y=1.0,
-            xanchor="left",
-            x=1.05,
-            font=dict(size=12)  # Fonte menor para a legenda
-        ),
-        height=300,
-        width=400,   # Largura aumentada para 400px
-    )
-
-    # Calcular percentuais para determinar posição dos rótulos
-    total = sexo_counts['contagem'].sum()
-    sexo_counts['percentual'] = sexo_counts['contagem'] / total * 100
-
-    # Criar lista para posições dos rótulos
-    text_positions = []
-
-    # Determinar posição do texto para cada fatia
-    for percentual in sexo_counts['percentual']:
-        if percentual < 10:  # Valores pequenos (menos de 5%)
-            text_positions.append('outside')
-        else:  # Valores maiores
-            text_positions.append('inside')
-
-    sexo_fig.update_traces(
-        textinfo='percent+label',  # Usar uma única string para todos
-        textposition=text_positions,
-        insidetextfont=dict(color='white'),
-        outsidetextfont=dict(color='black'),
-        pull=[0.05 if p < 5 else 0 for p in sexo_counts['percentual']],  # Destacar fatias pequenas
-    )
-    graphs['sexo'] = sexo_fig
-
-    # Gráfico 2: Idade - Cálculo e agrupamento de 10 em 10 anos
-    # Converter a coluna de data de nascimento para datetime
-    df['DataNascimento'] = pd.to_datetime(df['DataNascimento'], errors='coerce')
-
-    # Calcular a idade
-    hoje = pd.Timestamp.now()
-    # Criar uma cópia do dataframe para evitar warnings
-    df_idade = df.copy()
-    # Calcular a idade apenas para datas válidas
-    df_idade['Idade'] = df_idade['DataNascimento'].apply(
-        lambda x: int((hoje - x).days / 365.25) if pd.notna(x) else None
-    )
-
-    # Criar faixas etárias de 10 em 10 anos até 60 anos
-    bins = [0, 20, 30, 40, 50, 60, 150]  # Último bin vai até 150 para capturar todas as idades
-
-    # Criar rótulos para as faixas etárias
-    labels = [
-        'Até 19 anos',
-        'Entre 20 e 29 anos',
-        'Entre 30 e 39 anos',
-        'Entre 40 e 49 anos',
-        'Entre 50 e 59 anos',
-        'Acima de 60 anos'
-    ]
-
-    # Aplicar o corte apenas para idades válidas (não nulas)
-    # Remover linhas com idade nula para evitar erros
-    df_idade = df_idade.dropna(subset=['Idade'])
-    df_idade['FaixaEtaria'] = pd.cut(df_idade['Idade'], bins=bins, labels=labels, right=False)
-
-    # Contar por faixa etária
-    idade_counts = df_idade['FaixaEtaria'].value_counts().reset_index()
-    idade_counts.columns = ['faixa', 'contagem']
-
-    # Criar uma coluna para ordenação personalizada
-    ordem_faixas = {faixa: i for i, faixa in enumerate(labels)}
-    idade_counts['ordem'] = idade_counts['faixa'].map(ordem_faixas)
-
-    # Ordenar em ordem inversa (menores idades primeiro)
-    idade_counts = idade_counts.sort_values('ordem', ascending=False)
-
-    idade_fig = px.bar(
-        idade_counts,
-        x='contagem',
-        y='faixa',
-        title="Distribuição por Faixa Etária",
-        color_discrete_sequence=[COLORS['chart2']],
-        orientation='h',
-        text='contagem',
-        labels={'faixa': 'Faixa Etária', 'contagem': 'Quantidade'},
-        height=350,
-    )
-    idade_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        xaxis_title="Quantidade",
-        yaxis_title="",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=40, b=10),
-    )
-
-    # Definir limites para posicionamento interno/externo baseado no valor
-    max_value = idade_counts['contagem'].max()
-    threshold = max_value * 0.8  # 80% do valor máximo como limite
-
-    # Criar uma lista para armazenar as posições dos textos
-    text_positions = []
-    text_colors = []
-
-    # Determinar a posição e cor para cada barra
-    for value in idade_counts['contagem']:
-        if value > threshold:
-            text_positions.append('inside')
-            text_colors.append('white')
-        else:
-            text_positions.append('outside')
-            text_colors.append('black')
-
-    idade_fig.update_traces(
-        marker_color=COLORS['chart2'],
-        marker_line_color='rgba(0,0,0,0)',
-        opacity=0.8,
-        texttemplate='%{x}',
-        textposition=text_positions,
-        textfont=dict(color=text_colors),
-    )
-    graphs['idade'] = idade_fig
-
-    # Gráfico 3: Cor/Raça - Gráfico de Pizza
-    cor_raca_counts = df['CorRaca'].value_counts().reset_index()
-    cor_raca_counts.columns = ['cor_raca', 'contagem']
-
-    cor_raca_fig = px.pie(
-        cor_raca_counts,
-        values='contagem',
-        names='cor_raca',
-        title="Distribuição por Cor/Raça",
-        color_discrete_sequence=[COLORS['chart1'], COLORS['chart2'], COLORS['chart3'], COLORS['chart4'], COLORS['success']],
-    )
-    cor_raca_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=40, b=10),
-        legend=dict(
-            orientation="v",
-            yanchor="top",
-            y=1.0,
-            xanchor="left",
-            x=1.05,
-            font=dict(size=12)  # Fonte menor para a legenda
-        ),
-        height=300,
-        width=400,   # Largura aumentada para 400px
-    )
-
-    # Calcular percentuais para determinar posição dos rótulos
-    total = cor_raca_counts['contagem'].sum()
-    cor_raca_counts['percentual'] = cor_raca_counts['contagem'] / total * 100
-
-    # Criar lista para posições dos rótulos
-    text_positions = []
-
-    # Determinar posição do texto para cada fatia
-    for percentual in cor_raca_counts['percentual']:
-        if percentual < 10:  # Valores pequenos (menos de 5%)
-            text_positions.append('outside')
-        else:  # Valores maiores
-            text_positions.append('inside')
-
-    cor_raca_fig.update_traces(
-        textinfo='percent+label',  # Usar uma única string para todos
-        textposition=text_positions,
-        insidetextfont=dict(color='white'),
-        outsidetextfont=dict(color='black'),
-        pull=[0.05 if p < 5 else 0 for p in cor_raca_counts['percentual']],  # Destacar fatias pequenas
-    )
-    graphs['cor_raca'] = cor_raca_fig
-
-    # Gráfico 4: Escolaridade - Gráfico de barras horizontais ordenadas
-    # Definir a ordem de escolaridade com base nos valores reais do banco de dados
-    escolaridade_order = [
-        'Ensino Fundamental Incompleto',
-        'Ensino Fundamental Completo',
-        'Ensino Médio Incompleto',
-        'Ensino Médio Completo',
-        'Ensino Superior Incompleto',
-        'Ensino Superior Completo',
-        'Pós-Graduação Incompleto',
-        'Pós-Graduação'  # Mantido para compatibilidade com dados existentes
-    ]
-
-    escolaridade_counts = df['Escolaridade'].value_counts().reset_index()
-    escolaridade_counts.columns = ['escolaridade', 'contagem']
-
-    # Criar uma coluna para ordenação
-    escolaridade_counts['ordem'] = escolaridade_counts['escolaridade'].apply(
-        lambda x: escolaridade_order.index(x) if x in escolaridade_order else 999
-    )
-    # Ordenar em ordem inversa (menor escolaridade no topo)
-    escolaridade_counts = escolaridade_counts.sort_values('ordem', ascending=False)
-
-    escolaridade_fig = px.bar(
-        escolaridade_counts,
-        y='escolaridade',
-        x='contagem',
-        title="Distribuição por Escolaridade",
-        color_discrete_sequence=[COLORS['chart3']],
-        orientation='h',
-        text='contagem',
-        labels={'escolaridade': 'Escolaridade', 'contagem': 'Quantidade'},
-        height=350,
-    )
-    escolaridade_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        xaxis_title="Quantidade",
-        yaxis_title="",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=40, b=10),
-    )
-
-    # Definir limites para posicionamento interno/externo baseado no valor
-    max_value = escolaridade_counts['contagem'].max()
-    threshold = max_value * 0.8  # 80% do valor máximo como limite
-
-    # Criar uma lista para armazenar as posições dos textos
-    text_positions = []
-    text_colors = []
-
-    # Determinar a posição e cor para cada barra
-    for value in escolaridade_counts['contagem']:
-        if value > threshold:
-            text_positions.append('inside')
-            text_colors.append('white')
-        else:
-            text_positions.append('outside')
-            text_colors.append('black')
-
-    escolaridade_fig.update_traces(
-        marker_color=COLORS['chart3'],
-        marker_line_color='rgba(0,0,0,0)',
-        opacity=0.8,
-        texttemplate='%{x}',
-        textposition=text_positions,
-        textfont=dict(color=text_colors),
-    )
-    graphs['escolaridade'] = escolaridade_fig
-
-    # Gráfico 5: Rendimento - Gráfico de barras horizontais ordenadas
-    # Definir a ordem de rendimento com base nos valores reais do banco de dados
-    rendimento_order = [
-        '1,00 A 500,00',
-        '501,00 A 1.000,00',
-        '1.001,00 A 2.000,00',
-        '2.001,00 A 3.000,00',
-        '3.001,00 A 5.000,00',
-        '5.001,00 A 10.000,00',
-        '10.001,00 OU MAIS'
-    ]
-
-    rendimento_counts = df['Rendimento'].value_counts().reset_index()
-    rendimento_counts.columns = ['rendimento', 'contagem']
-
-    # Criar uma coluna para ordenação
-    rendimento_counts['ordem'] = rendimento_counts['rendimento'].apply(
-        lambda x: rendimento_order.index(x) if x in rendimento_order else 999
-    )
-    # Ordenar em ordem inversa (menores rendimentos primeiro)
-    rendimento_counts = rendimento_counts.sort_values('ordem', ascending=False)
-
-    rendimento_fig = px.bar(
-        rendimento_counts,
-        y='rendimento',
-        x='contagem',
-        title="Distribuição por Rendimento",
-        color_discrete_sequence=[COLORS['chart4']],
-        orientation='h',
-        text='contagem',
-        labels={'rendimento': 'Rendimento', 'contagem': 'Quantidade'},
-        height=350,
-    )
-    rendimento_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        xaxis_title="Quantidade",
-        yaxis_title="",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=40, b=10),
-    )
-
-    # Definir limites para posicionamento interno/externo baseado no valor
-    max_value = rendimento_counts['contagem'].max()
-    threshold = max_value * 0.8  # 80% do valor máximo como limite
-
-    # Criar uma lista para armazenar as posições dos textos
-    text_positions = []
-    text_colors = []
-
-    # Determinar a posição e cor para cada barra
-    for value in rendimento_counts['contagem']:
-        if value > threshold:
-            text_positions.append('inside')
-            text_colors.append('white')
-        else:
-            text_positions.append('outside')
-            text_colors.append('black')
-
-    rendimento_fig.update_traces(
-        marker_color=COLORS['chart4'],
-        marker_line_color='rgba(0,0,0,0)',
-        opacity=0.8,
-        texttemplate='%{x}',
-        textposition=text_positions,
-        textfont=dict(color=text_colors),
-    )
-    graphs['rendimento'] = rendimento_fig
-
-    # Gráfico 6: Estado Civil - Gráfico de pizza
-    estado_civil_counts = df['EstadoCivil'].value_counts().reset_index()
-    estado_civil_counts.columns = ['estado_civil', 'contagem']
-
-    estado_civil_fig = px.pie(
-        estado_civil_counts,
-        values='contagem',
-        names='estado_civil',
-        title="Distribuição por Estado Civil",
-        color_discrete_sequence=[COLORS['chart1'], COLORS['chart2'], COLORS['chart3'], COLORS['chart4']],
-    )
-    estado_civil_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=10, b=10),
-        legend=dict(
-            orientation="v",
-            yanchor="middle",
-            y=0.5,
-            xanchor="left",
-            font=dict(size=9)
-        ),
-        height=300,
-        width=430,  # Largura aumentada para 400px
-    )
-
-    # Calcular percentuais para determinar posição dos rótulos
-    total = estado_civil_counts['contagem'].sum()
-    estado_civil_counts['percentual'] = estado_civil_counts['contagem'] / total * 100
-
-    # Criar lista para posições dos rótulos
-    text_positions = []
-
-    # Determinar posição do texto para cada fatia
-    for percentual in estado_civil_counts['percentual']:
-        if percentual < 10:  # Valores pequenos (menos de 5%)
-            text_positions.append('outside')
-        else:  # Valores maiores
-            text_positions.append('inside')
-
-    estado_civil_fig.update_traces(
-        textinfo='percent+label',  # Usar uma única string para todos
-        textposition=text_positions,
-        insidetextfont=dict(color='white'),
-        outsidetextfont=dict(color='black'),
-        pull=[0.05 if p < 5 else 0 for p in estado_civil_counts['percentual']],  # Destacar fatias pequenas
-    )
-    graphs['estado_civil'] = estado_civil_fig
-
-    # Gráfico 7: Tem Filhos - Gráfico de pizza
-    tem_filhos_counts = df['TemFilhos'].value_counts().reset_index()
-    tem_filhos_counts.columns = ['tem_filhos', 'contagem']
-
-    tem_filhos_fig = px.pie(
-        tem_filhos_counts,
-        values='contagem',
-        names='tem_filhos',
-        title="Distribuição por Tem Filhos",
-        color_discrete_sequence=[COLORS['chart2'], COLORS['chart3']],
-    )
-    tem_filhos_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=40, b=10),
-        legend=dict(
-            orientation="v",
-            yanchor="top",
-            y=1.0,
-            xanchor="left",
-            x=1.05,
-            font=dict(size=10)  # Fonte menor para a legenda
-        ),
-        height=300,
-        width=400,   # Largura aumentada para 400px
-    )
-
-    # Calcular percentuais para determinar posição dos rótulos
-    total = tem_filhos_counts['contagem'].sum()
-    tem_filhos_counts['percentual'] = tem_filhos_counts['contagem'] / total * 100
-
-    # Criar lista para posições dos rótulos
-    text_positions = []
-
-    # Determinar posição do texto para cada fatia
-    for percentual in tem_filhos_counts['percentual']:
-        if percentual < 10:  # Valores pequenos (menos de 5%)
-            text_positions.append('outside')
-        else:  # Valores maiores
-            text_positions.append('inside')
-
-    tem_filhos_fig.update_traces(
-        textinfo='percent+label',  # Usar uma única string para todos
-        textposition=text_positions,
-        insidetextfont=dict(color='white'),
-        outsidetextfont=dict(color='black'),
-        pull=[0.05 if p < 5 else 0 for p in tem_filhos_counts['percentual']],  # Destacar fatias pequenas
-    )
-    graphs['tem_filhos'] = tem_filhos_fig
-
-    return graphs
+def create_pessoais_graphs(df, counts=None):
+    """Gráficos da aba Dados Pessoais (ver charts.py)."""
+    # Contagens por coluna (podem vir prontas do carregador incremental)
+    if counts is None:
+        counts = count_values(df)
+    return build_figures(PESSOAIS_CHARTS, counts)
 
 # Callback para atualizar os gráficos da aba Dados Ocupacionais
 @app.callback(
@@ -1326,223 +933,41 @@ def create_pessoais_graphs(df):
      Output('occupation-container', 'children'),
      Output('cnae-container', 'children'),
      Output('estado-trabalho-container', 'children')],
-    [Input('refresh-button', 'n_clicks'),
-     Input('tabs-dashboard', 'value')]
+    [Input('versao-dados', 'data'),
+     Input('tabs-dashboard', 'value'),
+     Input('filtros', 'data')]
 )
-def update_ocupacionais_graphs(n_clicks, tab):
+@timed
+def update_ocupacionais_graphs(version, tab, filters):
     # Só atualiza se estiver na aba de Dados Ocupacionais
     if tab != 'tab-1':
         raise PreventUpdate
 
-    # Conectar ao banco de dados
-    conn = sqlite3.connect('base.sqlite')
-
-    # Carregar os dados
-    updated_df = pd.read_sql("SELECT * FROM Planilha1", conn)
+    # Obter os dados publicados pela atualização em segundo plano
+    data = current_data()
 
-    # Fechar a conexão
-    conn.close()
-
-    # Criar os gráficos
-    graphs = create_ocupacionais_graphs(updated_df)
+    # Criar os gráficos, ou reaproveitá-los do cache se os dados e os filtros
+    # não mudaram (sem filtros, já foram construídos em segundo plano)
+    graphs = ocupacionais_figures(data, filters)
 
     # Retornar os gráficos como componentes Dash
     return [
-        dcc.Graph(figure=graphs['tempo_escala_6x1'], config={'displayModeBar': False}),
-        dcc.Graph(figure=graphs['contrato_trabalho'], config={'displayModeBar': False}),
-        dcc.Graph(figure=graphs['horas_trabalho'], config={'displayModeBar': False}),
-        dcc.Graph(figure=graphs['occupation'], config={'displayModeBar': False}),
-        dcc.Graph(figure=graphs['cnae'], config={'displayModeBar': False}),
-        dcc.Graph(figure=graphs['estado_trabalho'], config={'displayModeBar': False})
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'tempo_escala_6x1'}, figure=graphs['tempo_escala_6x1'], config={'displayModeBar': False}),
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'contrato_trabalho'}, figure=graphs['contrato_trabalho'], config={'displayModeBar': False}),
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'horas_trabalho'}, figure=graphs['horas_trabalho'], config={'displayModeBar': False}),
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'occupation'}, figure=graphs['occupation'], config={'displayModeBar': False}),
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'cnae'}, figure=graphs['cnae'], config={'displayModeBar': False}),
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'estado_trabalho'}, figure=graphs['estado_trabalho'], config={'displayModeBar': False})
     ]
 
 # Função para criar os gráficos da aba Percepção de Impacto
-def create_impacto_graphs(df):
-    graphs = {}
-
-    # Definir a ordem das respostas para os gráficos de impacto na saúde (física e mental)
-    # Ordem invertida conforme solicitado
-    impacto_saude_order = [
-        'Discordo totalmente',
-        'Discordo',
-        'Nem concordo nem discordo',
-        'Concordo',
-        'Concordo totalmente'
-    ]
-
-    # Gráfico 1: Impacto na Vida Familiar
-    impacto_familia_counts = df['ImpactoVidaFamiliar'].value_counts().reset_index()
-    impacto_familia_counts.columns = ['resposta', 'contagem']
-
-    # Ordenar por contagem (decrescente) para que os maiores valores apareçam em cima
-    # Usando ascending=True porque no gráfico horizontal, a primeira linha é a de baixo
-    impacto_familia_counts = impacto_familia_counts.sort_values('contagem', ascending=True)
-
-    impacto_familia_fig = px.bar(
-        impacto_familia_counts,
-        y='resposta',
-        x='contagem',
-        title="Impacto na Vida Familiar",
-        color_discrete_sequence=[COLORS['chart1']],
-        orientation='h',
-        text='contagem',
-        labels={'resposta': 'Resposta', 'contagem': 'Quantidade'},
-        height=300,
-    )
-    impacto_familia_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=40, b=10),
-        xaxis_title="Quantidade",
-        yaxis_title="",
-    )
-
-    # Definir limites para posicionamento interno/externo baseado no valor
-    max_value = impacto_familia_counts['contagem'].max()
-    threshold = max_value * 0.8  # 80% do valor máximo como limite
-
-    # Criar uma lista para armazenar as posições dos textos
-    text_positions = []
-    text_colors = []
-
-    # Determinar a posição e cor para cada barra
-    for value in impacto_familia_counts['contagem']:
-        if value > threshold:
-            text_positions.append('inside')
-            text_colors.append('white')
-        else:
-            text_positions.append('outside')
-            text_colors.append('black')
-
-    impacto_familia_fig.update_traces(
-        marker_color=COLORS['chart1'],
-        marker_line_color='rgba(0,0,0,0)',
-        opacity=0.8,
-        texttemplate='%{x}',
-        textposition=text_positions,
-        textfont=dict(color=text_colors),
-    )
-    graphs['impacto_familia'] = impacto_familia_fig
-
-    # Gráfico 2: Impacto na Saúde Física
-    impacto_fisica_counts = df['ImpactoSaudeFisica'].value_counts().reset_index()
-    impacto_fisica_counts.columns = ['resposta', 'contagem']
-
-    # Criar uma coluna para ordenação com a nova ordem solicitada
-    impacto_fisica_counts['ordem'] = impacto_fisica_counts['resposta'].apply(
-        lambda x: impacto_saude_order.index(x) if x in impacto_saude_order else 999
-    )
-    impacto_fisica_counts = impacto_fisica_counts.sort_values('ordem')
-
-    impacto_fisica_fig = px.bar(
-        impacto_fisica_counts,
-        y='resposta',
-        x='contagem',
-        title="Impacto na Saúde Física",
-        color_discrete_sequence=[COLORS['chart2']],
-        orientation='h',
-        text='contagem',
-        labels={'resposta': 'Resposta', 'contagem': 'Quantidade'},
-        height=300,
-    )
-    impacto_fisica_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=40, b=10),
-        xaxis_title="Quantidade",
-        yaxis_title="",
-    )
-
-    # Definir limites para posicionamento interno/externo baseado no valor
-    max_value = impacto_fisica_counts['contagem'].max()
-    threshold = max_value * 0.8  # 80% do valor máximo como limite
-
-    # Criar uma lista para armazenar as posições dos textos
-    text_positions = []
-    text_colors = []
-
-    # Determinar a posição e cor para cada barra
-    for value in impacto_fisica_counts['contagem']:
-        if value > threshold:
-            text_positions.append('inside')
-            text_colors.append('white')
-        else:
-            text_positions.append('outside')
-            text_colors.append('black')
-
-    impacto_fisica_fig.update_traces(
-        marker_color=COLORS['chart2'],
-        marker_line_color='rgba(0,0,0,0)',
-        opacity=0.8,
-        texttemplate='%{x}',
-        textposition=text_positions,
-        textfont=dict(color=text_colors),
-    )
-    graphs['impacto_fisica'] = impacto_fisica_fig
-
-    # Gráfico 3: Impacto na Saúde Mental
-    impacto_mental_counts = df['ImpactoSaudeMental'].value_counts().reset_index()
-    impacto_mental_counts.columns = ['resposta', 'contagem']
-
-    # Criar uma coluna para ordenação com a nova ordem solicitada
-    impacto_mental_counts['ordem'] = impacto_mental_counts['resposta'].apply(
-        lambda x: impacto_saude_order.index(x) if x in impacto_saude_order else 999
-    )
-    impacto_mental_counts = impacto_mental_counts.sort_values('ordem')
-
-    impacto_mental_fig = px.bar(
-        impacto_mental_counts,
-        y='resposta',
-        x='contagem',
-        title="Impacto na Saúde Mental",
-        color_discrete_sequence=[COLORS['chart3']],
-        orientation='h',
-        text='contagem',
-        labels={'resposta': 'Resposta', 'contagem': 'Quantidade'},
-        height=300,
-    )
-    impacto_mental_fig.update_layout(
-        title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-        font=dict(family="Segoe UI"),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=40, b=10),
-        xaxis_title="Quantidade",
-        yaxis_title="",
-    )
-
-    # Definir limites para posicionamento interno/externo baseado no valor
-    max_value = impacto_mental_counts['contagem'].max()
-    threshold = max_value * 0.8  # 80% do valor máximo como limite
-
-    # Criar uma lista para armazenar as posições dos textos
-    text_positions = []
-    text_colors = []
-
-    # Determinar a posição e cor para cada barra
-    for value in impacto_mental_counts['contagem']:
-        if value > threshold:
-            text_positions.append('inside')
-            text_colors.append('white')
-        else:
-            text_positions.append('outside')
-            text_colors.append('black')
-
-    impacto_mental_fig.update_traces(
-        marker_color=COLORS['chart3'],
-        marker_line_color='rgba(0,0,0,0)',
-        opacity=0.8,
-        texttemplate='%{x}',
-        textposition=text_positions,
-        textfont=dict(color=text_colors),
-    )
-    graphs['impacto_mental'] = impacto_mental_fig
-
-    return graphs
+def create_impacto_graphs(df, counts=None):
+    """Gráficos de contagens da aba Percepção de Impacto (ver charts.py)."""
+    # Contagens por coluna (podem vir prontas do carregador incremental)
+    if counts is None:
+        counts = count_values(df)
+    # O gráfico de tópicos é construído à parte (ver create_nlp_graph)
+    return build_figures([chart for chart in IMPACTO_CHARTS if chart != 'impactos'], counts)
 
 # Callback para atualizar os gráficos da aba Dados Pessoais
 @app.callback(
@@ -1553,157 +978,230 @@ def create_impacto_graphs(df):
      Output('tem-filhos-container', 'children'),
      Output('rendimento-container', 'children'),
      Output('escolaridade-container', 'children')],
-    [Input('refresh-button', 'n_clicks'),
-     Input('tabs-dashboard', 'value')]
+    [Input('versao-dados', 'data'),
+     Input('tabs-dashboard', 'value'),
+     Input('filtros', 'data')]
 )
-def update_pessoais_graphs(n_clicks, tab):
+@timed
+def update_pessoais_graphs(version, tab, filters):
     # Só atualiza se estiver na aba de Dados Pessoais
     if tab != 'tab-2':
         raise PreventUpdate
 
-    # Conectar ao banco de dados
-    conn = sqlite3.connect('base.sqlite')
-
-    # Carregar os dados
-    updated_df = pd.read_sql("SELECT * FROM Planilha1", conn)
-
-    # Fechar a conexão
-    conn.close()
+    # Obter os dados publicados pela atualização em segundo plano
+    data = current_data()
 
-    # Criar os gráficos
-    graphs = create_pessoais_graphs(updated_df)
+    # Criar os gráficos, ou reaproveitá-los do cache se os dados e os filtros
+    # não mudaram (sem filtros, já foram construídos em segundo plano)
+    graphs = pessoais_figures(data, filters)
 
     # Retornar os gráficos como componentes Dash
     return [
-        dcc.Graph(figure=graphs['idade'], config={'displayModeBar': False}),
-        dcc.Graph(figure=graphs['sexo'], config={'displayModeBar': False}),
-        dcc.Graph(figure=graphs['cor_raca'], config={'displayModeBar': False}),
-        dcc.Graph(figure=graphs['estado_civil'], config={'displayModeBar': False}),
-        dcc.Graph(figure=graphs['tem_filhos'], config={'displayModeBar': False}),
-        dcc.Graph(figure=graphs['rendimento'], config={'displayModeBar': False}),
-        dcc.Graph(figure=graphs['escolaridade'], config={'displayModeBar': False})
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'idade'}, figure=graphs['idade'], config={'displayModeBar': False}),
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'sexo'}, figure=graphs['sexo'], config={'displayModeBar': False}),
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'cor_raca'}, figure=graphs['cor_raca'], config={'displayModeBar': False}),
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'estado_civil'}, figure=graphs['estado_civil'], config={'displayModeBar': False}),
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'tem_filhos'}, figure=graphs['tem_filhos'], config={'displayModeBar': False}),
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'rendimento'}, figure=graphs['rendimento'], config={'displayModeBar': False}),
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'escolaridade'}, figure=graphs['escolaridade'], config={'displayModeBar': False})
     ]
 
+# Função para criar o gráfico da análise de tópicos (PLN) das respostas "Impactos"
+def create_nlp_graph(totals, loading=False, unavailable=False):
+    """Gráfico dos tópicos identificados nas respostas "Impactos" (ver charts.py)."""
+    if totals is None:
+        title = CHART_SPECS['impactos']['title']
+        if unavailable:
+            return empty_figure(title, "Modelo de linguagem indisponível")
+        return empty_figure(title, "Carregando o modelo de linguagem..." if loading else "Sem dados disponíveis")
+    topics, counts = get_impact_data_for_graph(None, totals=totals)
+    return build_figure('impactos', {TOPICS_FILTER: pd.Series(counts, index=topics, dtype='int64')})
+
 # Callback para atualizar os gráficos da aba Percepção de Impacto
 @app.callback(
     [Output('impacto-vida-familiar-container', 'children'),
      Output('impacto-saude-fisica-container', 'children'),
      Output('impacto-saude-mental-container', 'children'),
-     Output('impactos-container', 'children')],
-    [Input('refresh-button', 'n_clicks'),
-     Input('tabs-dashboard', 'value')]
+     Output('impactos-container', 'children'),
+     Output('nlp-poll', 'disabled')],
+    [Input('versao-dados', 'data'),
+     Input('tabs-dashboard', 'value'),
+     Input('filtros', 'data'),
+     Input('nlp-poll', 'n_intervals')]
 )
-def update_impacto_graphs(n_clicks, tab):
+@timed
+def update_impacto_graphs(version, tab, filters, n_intervals=None):
     # Só atualiza se estiver na aba de Percepção de Impacto
     if tab != 'tab-3':
         raise PreventUpdate
 
-    # Conectar ao banco de dados
-    conn = sqlite3.connect('base.sqlite')
-
-    # Carregar os dados
-    updated_df = pd.read_sql("SELECT * FROM Planilha1", conn)
-
-    # Fechar a conexão
-    conn.close()
-
-    # Criar os gráficos
-    graphs = create_impacto_graphs(updated_df)
-
-    # Obter os dados para o gráfico de análise de PLN
-    topics, counts = get_impact_data_for_graph(updated_df)
-
-    # Criar DataFrame para o gráfico
-    nlp_df = pd.DataFrame({
-        'Tópico': topics,
-        'Contagem': counts
-    })
-
-    # Ordenar o DataFrame para que os maiores valores apareçam no topo
-    # Para gráficos de barras horizontais, a primeira linha (índice 0) aparece na parte inferior
-    # Então, para ter os maiores valores no topo, ordenamos em ordem decrescente
-    nlp_df = nlp_df.sort_values('Contagem', ascending=False)
-
-    # Criar o gráfico de barras horizontais
-    if len(nlp_df) > 0:
-        nlp_fig = px.bar(
-            nlp_df,
-            y='Tópico',
-            x='Contagem',
-            title="Análise de Tópicos nas Respostas",
-            color_discrete_sequence=[COLORS['success']],  # Verde
-            orientation='h',
-            text='Contagem',
-            labels={'Tópico': 'Tópico Identificado', 'Contagem': 'Número de Ocorrências'},
-            height=450,
-        )
+    # Obter os dados publicados pela atualização em segundo plano
+    data = current_data()
 
-        # Configurar o layout
-        nlp_fig.update_layout(
-            title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-            font=dict(family="Segoe UI"),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(l=10, r=10, t=40, b=10),
-            xaxis_title="Número de Ocorrências",
-            yaxis_title="",
-        )
+    # Criar os gráficos, ou reaproveitá-los do cache se os dados e os filtros
+    # não mudaram (sem filtros, já foram construídos em segundo plano)
+    graphs, ready, failed = impacto_figures(data, filters)
 
-        # Definir limites para posicionamento interno/externo baseado no valor
-        max_value = nlp_df['Contagem'].max() if len(nlp_df) > 0 else 0
-        threshold = max_value * 0.8  # 80% do valor máximo como limite
-
-        # Criar uma lista para armazenar as posições dos textos
-        text_positions = []
-        text_colors = []
-
-        # Determinar a posição e cor para cada barra
-        for value in nlp_df['Contagem']:
-            if value > threshold:
-                text_positions.append('inside')
-                text_colors.append('white')
-            else:
-                text_positions.append('outside')
-                text_colors.append('black')
-
-        # Atualizar as barras
-        nlp_fig.update_traces(
-            marker_color=COLORS['success'],
-            marker_line_color='rgba(0,0,0,0)',
-            opacity=0.8,
-            texttemplate='%{x}',
-            textposition=text_positions,
-            textfont=dict(color=text_colors),
-        )
-    else:
-        # Se não houver dados, criar um gráfico vazio
-        nlp_fig = px.bar(x=[0], y=[0], title="Análise de Tópicos nas Respostas")
-        nlp_fig.update_layout(
-            title_font=dict(size=16, family="Segoe UI", color=COLORS['title']),
-            font=dict(family="Segoe UI"),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            xaxis=dict(visible=False),
-            yaxis=dict(visible=False),
-            annotations=[dict(
-                text="Sem dados disponíveis",
-                showarrow=False,
-                font=dict(size=16, color=COLORS['text']),
-                xref="paper",
-                yref="paper",
-                x=0.5,
-                y=0.5
-            )]
-        )
+    # Enquanto o modelo de PLN não estiver pronto, o gráfico de tópicos mostra
+    # um aviso e a aba continua verificando (nlp-poll) até ele ficar pronto;
+    # se o carregamento falhou, a verificação é desligada
+    if not ready and not failed:
+        start_nlp_loading()
 
     # Retornar os gráficos como componentes Dash
     return [
-        dcc.Graph(figure=graphs['impacto_familia'], config={'displayModeBar': False}),
-        dcc.Graph(figure=graphs['impacto_fisica'], config={'displayModeBar': False}),
-        dcc.Graph(figure=graphs['impacto_mental'], config={'displayModeBar': False}),
-        dcc.Graph(figure=nlp_fig, config={'displayModeBar': False})
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'impacto_familia'}, figure=graphs['impacto_familia'], config={'displayModeBar': False}),
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'impacto_fisica'}, figure=graphs['impacto_fisica'], config={'displayModeBar': False}),
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'impacto_mental'}, figure=graphs['impacto_mental'], config={'displayModeBar': False}),
+        dcc.Graph(id={'type': GRAPH_TYPE, 'chart': 'impactos'}, figure=graphs['impactos'], config={'displayModeBar': False}),
+        ready or failed
     ]
 
+# Callback da aba Cruzamentos: o cruzamento é lido do cubo de contagens,
+# calculado uma vez por versão dos dados
+@app.callback(
+    Output('cruzamento-container', 'children'),
+    [Input('versao-dados', 'data'),
+     Input('tabs-dashboard', 'value'),
+     Input('cruzamento-linhas', 'value'),
+     Input('cruzamento-colunas', 'value')]
+)
+@timed
+def update_crosstab(version, tab, rows, columns):
+    if tab != 'tab-4' or not rows or not columns:
+        raise PreventUpdate
+    figure = crosstab(current_data(), rows, columns)
+    return dcc.Graph(figure=figure, config={'displayModeBar': False})
+
+# Callback da versão dos dados: verifica periodicamente se há dados novos
+# publicados; o botão de atualização pede uma verificação imediata
+@app.callback(
+    Output('versao-dados', 'data'),
+    [Input('refresh-poll', 'n_intervals'),
+     Input('refresh-button', 'n_clicks')],
+    State('versao-dados', 'data'),
+    prevent_initial_call=True
+)
+@timed
+def update_data_version(n_intervals, n_clicks, current):
+    if ctx.triggered_id == 'refresh-button':
+        # Espera pouco: se os dados novos demorarem mais, o próximo
+        # refresh-poll os mostra
+        refresher.request_refresh(timeout=REFRESH_WAIT_SECONDS)
+    version = refresher.version()
+    if version == current:
+        raise PreventUpdate
+    return version
+
+# Callback da filtragem cruzada: um clique em uma barra ou fatia adiciona o
+# valor ao filtro (ou o remove, se já estiver filtrado)
+@app.callback(
+    Output('filtros', 'data'),
+    [Input({'type': GRAPH_TYPE, 'chart': ALL}, 'clickData'),
+     Input('limpar-filtros', 'n_clicks')],
+    State('filtros', 'data'),
+    prevent_initial_call=True
+)
+@timed
+def update_filters(click_data, n_clicks, filters):
+    if ctx.triggered_id == 'limpar-filtros':
+        return {}
+
+    # Gráficos recém-criados também disparam o callback, sem clique
+    click = ctx.triggered[0]['value'] if ctx.triggered else None
+    if not isinstance(ctx.triggered_id, dict) or not click:
+        raise PreventUpdate
+
+    column, field = CHART_FILTERS[ctx.triggered_id['chart']]
+    value = click['points'][0].get(field)
+    if value is None:
+        raise PreventUpdate
+    if column == TOPICS_FILTER:
+        value = TOPIC_IDS.get(value, value)
+    return toggle_filter(filters, column, value)
+
+# Callback para mostrar os filtros ativos
+@app.callback(
+    Output('filtros-ativos', 'children'),
+    [Input('filtros', 'data')]
+)
+@timed
+def show_filters(filters):
+    if not filters:
+        return "Clique em uma barra ou fatia para filtrar os demais gráficos"
+
+    descriptions = []
+    for column, values in filters.items():
+        if column == TOPICS_FILTER:
+            values = [TOPIC_NAMES.get(value, value) for value in values]
+        descriptions.append(f"{FILTER_LABELS.get(column, column)}: {', '.join(map(str, values))}")
+    return "Filtros: " + " • ".join(descriptions)
+
+# Exportação do dashboard sem filtros como HTML estático (ver static_export.py)
+def export_static(directory):
+    """
+    Exporta os KPIs, as abas e todas as figuras para um pacote estático.
+
+    Args:
+        directory: Diretório de destino
+
+    Returns:
+        dict: Conteúdo do manifest.json gravado
+    """
+    start = time.perf_counter()
+    data = store.snapshot()
+
+    # Sem os totais materializados ou pré-calculados, os tópicos são
+    # classificados aqui mesmo, sem a thread de carregamento do servidor
+    if not topics_available(data, {}):
+        try:
+            simple_nlp.get_stop_words()
+            simple_nlp.get_nlp()
+        except simple_nlp.LOAD_ERRORS as nlp_error:
+            print(f"PLN indisponível ({nlp_error}); o gráfico de tópicos será exportado vazio")
+        else:
+            store.add_accumulator('topicos', impact_topic_totals, merge_topic_totals)
+            data = store.snapshot()
+
+    figures = {
+        **create_ocupacionais_graphs(None, data.counts),
+        **create_pessoais_graphs(None, data.counts),
+        **create_impacto_graphs(None, data.counts),
+        'impactos': create_nlp_graph(data.accumulated.get('topicos')),
+        # A aba Cruzamentos é exportada com o cruzamento inicial
+        'cruzamento': crosstab(data, *CROSSTAB_DEFAULTS),
+    }
+    build_time = time.perf_counter() - start
+
+    # Os botões, o aviso da filtragem cruzada e a escolha do cruzamento só
+    # funcionam no Dash
+    skip = ('refresh-button', 'limpar-filtros', 'filtros-ativos', 'cruzamento-escolha')
+    slots = {GRAPH_CONTAINERS[chart]: static_export.graph_placeholder(chart) for chart in figures}
+    tabs = static_export.find_component(app.layout, 'tabs-dashboard')
+    contents = {tab.value: render_content(tab.value) for tab in tabs.children}
+    slots['tabs-dashboard'], slots['tabs-content'] = static_export.render_tabs(tabs, contents, slots, skip)
+
+    manifest = static_export.write_bundle(
+        directory, app.layout, figures, slots, app.title, data.content_key, tabs.value, skip,
+        metadata={'respondentes': data.row_count, 'tempo_figuras_s': round(build_time, 3)},
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Dashboard exportado para {directory} em {elapsed:.2f}s "
+          f"({len(figures)} figuras, {manifest['tamanho_total_bytes'] / 1024:.0f} KB)")
+    for name, size in manifest['arquivos'].items():
+        print(f"  {name}: {size / 1024:.1f} KB")
+    return manifest
+
 # Run the app
 if __name__ == '__main__':
-    app.run(debug=False, host='0.0.0.0', port=8050)
+    parser = argparse.ArgumentParser(description="Dashboard de Análise da Escala 6x1")
+    parser.add_argument('--export', metavar='DIR',
+                        help="Exporta o dashboard sem filtros como HTML estático em DIR, em vez de iniciar o servidor")
+    args = parser.parse_args()
+
+    if args.export:
+        export_static(args.export)
+    else:
+        # Servidor de desenvolvimento: atende enquanto aquece (em produção, ver wsgi.py)
+        threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+        app.run(debug=False, host='0.0.0.0', port=8050)
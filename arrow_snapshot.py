@@ -0,0 +1,233 @@
+"""
+Cópia colunar da tabela de respostas em um arquivo Arrow (IPC/Feather).
+
+Ao iniciar, cada processo do servidor lia a tabela Planilha1 inteira do
+SQLite: as linhas passam pelo driver como objetos Python, o pandas monta
+colunas de texto e as colunas de múltipla escolha são convertidas em
+Categorical. Com vários workers, esse trabalho e a memória resultante se
+repetem em cada um.
+
+A ingestão (utils/excel_to_sqlite.py) grava também um arquivo Arrow, sem
+compressão, ao lado do banco. As colunas de múltipla escolha são gravadas
+com dicionário (códigos inteiros e a lista de valores, na mesma ordem das
+categorias usadas pelo IncrementalLoader), e as demais como texto. O
+IncrementalLoader mapeia esse arquivo em memória somente leitura: o início
+passa a ser um mmap em vez de uma leitura seguida de conversões, as colunas
+de texto continuam dentro do arquivo mapeado (pd.ArrowDtype, sem cópia) e as
+páginas são compartilhadas pelo cache do sistema entre todos os workers.
+Depois de carregado, o arquivo é conferido com o banco como qualquer outro
+bloco de linhas (ver IncrementalLoader._is_consistent); se estiver
+desatualizado, é descartado e a tabela é lida do SQLite como antes.
+
+O pyarrow é opcional: sem ele, nada é gravado nem lido e o dashboard lê
+apenas o SQLite.
+
+Variáveis de ambiente:
+    ARROW_SNAPSHOT_PATH: arquivo Arrow (padrão: base.arrow, ao lado do
+        banco). Vazio desativa o arquivo.
+
+Uso:
+    python arrow_snapshot.py   (grava o arquivo a partir do banco atual)
+"""
+
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from db import DB_PATH, connect_readonly
+from schema import CATEGORICAL_COLUMNS, CATEGORY_ORDERS, TABLE_NAME
+
+# Versão do formato gravado nos metadados do arquivo
+SNAPSHOT_FORMAT = 1
+
+# Linhas lidas do SQLite por bloco gravado
+DEFAULT_BATCH_SIZE = 50000
+
+# Nome da coluna (e do índice) com o rowid do SQLite, como em data_store.py
+ROWID_COLUMN = 'rowid'
+
+
+def snapshot_path(db_path=DB_PATH):
+    """
+    Caminho do arquivo Arrow de um banco.
+
+    Args:
+        db_path: Caminho do banco
+
+    Returns:
+        str: Caminho do arquivo, ou None se ARROW_SNAPSHOT_PATH estiver vazio
+    """
+    configured = os.environ.get('ARROW_SNAPSHOT_PATH')
+    if configured is not None:
+        return configured or None
+    return f"{os.path.splitext(db_path)[0]}.arrow"
+
+
+def _import_pyarrow():
+    """Retorna o módulo pyarrow, ou None se não estiver instalado."""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def _categories(conn, table, column):
+    """Categorias de uma coluna: schema.CATEGORY_ORDERS e os demais valores na ordem em que aparecem."""
+    categories = list(CATEGORY_ORDERS.get(column, []))
+    known = set(categories)
+    rows = conn.execute(
+        f'SELECT "{column}" FROM {table} WHERE "{column}" IS NOT NULL '
+        f'GROUP BY "{column}" ORDER BY MIN(rowid)'
+    )
+    categories.extend(value for (value,) in rows if value not in known)
+    return categories
+
+
+def _column_type(pa, declared):
+    """Tipo Arrow de uma coluna, pela afinidade do tipo declarado no SQLite."""
+    declared = (declared or '').upper()
+    if 'INT' in declared:
+        return pa.int64()
+    if any(name in declared for name in ('REAL', 'FLOA', 'DOUB')):
+        return pa.float64()
+    # TEXT, TIMESTAMP (gravado como texto pela ingestão) e os demais
+    return pa.string()
+
+
+def write_snapshot(conn, path, table=TABLE_NAME, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Grava a tabela de respostas em um arquivo Arrow (de forma atômica).
+
+    Args:
+        conn: Conexão com o banco
+        path: Caminho do arquivo
+        table: Tabela de respostas
+        batch_size: Linhas lidas e gravadas por bloco
+
+    Returns:
+        int: Quantidade de linhas gravadas, ou None se o pyarrow não estiver
+        instalado
+
+    Raises:
+        ValueError: Se uma coluna numérica tiver valores que não são números
+    """
+    pa = _import_pyarrow()
+    if pa is None:
+        return None
+
+    declared = {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({table})")}
+    columns = list(declared)
+    # Cada coluna de múltipla escolha usa um único dicionário em todo o arquivo
+    dictionaries = {
+        column: pa.array(_categories(conn, table, column), type=pa.string())
+        for column in columns if column in CATEGORICAL_COLUMNS
+    }
+    fields = [pa.field(ROWID_COLUMN, pa.int64())]
+    for column in columns:
+        if column in dictionaries:
+            fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(column, _column_type(pa, declared[column])))
+    schema = pa.schema(fields, metadata={'dashboard': json.dumps({'formato': SNAPSHOT_FORMAT, 'tabela': table})})
+
+    batches = pd.read_sql(f"SELECT rowid AS {ROWID_COLUMN}, * FROM {table} ORDER BY rowid", conn, chunksize=batch_size)
+    rows = 0
+
+    # Escrita atômica: um processo lendo o arquivo nunca vê um arquivo pela
+    # metade, e os que já o mapearam continuam com a versão anterior
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f, pa.ipc.new_file(f, schema) as writer:
+            for batch in batches:
+                arrays = [pa.array(batch[ROWID_COLUMN], type=pa.int64())]
+                for column in columns:
+                    if column in dictionaries:
+                        dictionary = dictionaries[column]
+                        codes = pd.Categorical(batch[column], categories=dictionary.to_pylist()).codes
+                        indices = pa.array(codes, type=pa.int32(), mask=codes < 0)
+                        arrays.append(pa.DictionaryArray.from_arrays(indices, dictionary))
+                    else:
+                        arrays.append(_column_array(pa, batch[column], schema.field(column)))
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                rows += len(batch)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return rows
+
+
+def _column_array(pa, values, field):
+    """Converte uma coluna de um bloco para o tipo do campo (nulos como null)."""
+    try:
+        return pa.array(values, type=field.type, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as error:
+        # O SQLite aceita texto em colunas declaradas como numéricas
+        raise ValueError(f"Coluna {field.name} não pode ser gravada como {field.type}: {error}") from error
+
+
+def _pandas_type(arrow_type):
+    """Mantém as colunas de texto no formato do Arrow (sem cópia); as demais usam a conversão padrão."""
+    if str(arrow_type) == 'string':
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def read_snapshot(path, table=TABLE_NAME):
+    """
+    Mapeia em memória um arquivo gravado com write_snapshot().
+
+    As colunas com dicionário viram pandas.Categorical (com as categorias na
+    ordem do dicionário) e as de texto ficam como pd.ArrowDtype, apontando
+    para o arquivo mapeado.
+
+    Args:
+        path: Caminho do arquivo
+        table: Tabela esperada
+
+    Returns:
+        DataFrame: Respostas indexadas pelo rowid, ou None se o pyarrow não
+        estiver instalado, ou se o arquivo não existir, for inválido, de
+        outra tabela ou não tiver linhas
+    """
+    if not path or not os.path.exists(path):
+        return None
+    pa = _import_pyarrow()
+    if pa is None:
+        return None
+
+    try:
+        with pa.memory_map(path, 'r') as source:
+            arrow_table = pa.ipc.open_file(source).read_all()
+        meta = json.loads(arrow_table.schema.metadata[b'dashboard'])
+    except (pa.ArrowException, OSError, KeyError, TypeError, ValueError) as error:
+        print(f"Arquivo Arrow {path} ignorado: {error}")
+        return None
+    if meta.get('formato') != SNAPSHOT_FORMAT or meta.get('tabela') != table or arrow_table.num_rows == 0:
+        return None
+
+    frame = arrow_table.to_pandas(types_mapper=_pandas_type, split_blocks=True)
+    return frame.set_index(ROWID_COLUMN)
+
+
+if __name__ == '__main__':
+    path = snapshot_path()
+    if path is None:
+        raise SystemExit("ARROW_SNAPSHOT_PATH está vazio: nenhum arquivo a gravar")
+    start = time.perf_counter()
+    conn = connect_readonly()
+    try:
+        rows = write_snapshot(conn, path)
+    finally:
+        conn.close()
+    if rows is None:
+        raise SystemExit("pyarrow não está instalado")
+    print(f"Arquivo Arrow gravado em {path} em {time.perf_counter() - start:.2f}s "
+          f"({rows} respondentes, {os.path.getsize(path) / 1024:.0f} KB)")
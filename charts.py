@@ -0,0 +1,458 @@
+"""
+Gráficos do dashboard: registro das especificações e construção das figuras.
+
+Cada gráfico é descrito por uma especificação em CHART_SPECS (coluna
+contada, tipo, título, ordem das categorias, orientação, cor, top N...), e
+todas as figuras são construídas pelo mesmo código a partir das contagens
+por coluna (ver data_store.count_values, filter_index.FilterIndex e
+queries.py). Para adicionar um gráfico basta registrar a sua especificação e
+incluí-lo em uma aba.
+
+As figuras são montadas diretamente com plotly.graph_objects, sem o
+plotly.express (que custa dezenas de milissegundos por figura para
+reorganizar um DataFrame que aqui já está pronto), e as posições e cores dos
+rótulos de todas as barras são calculadas de forma vetorizada.
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from ages import age_group_counts
+from filter_index import TOPICS_FILTER
+from schema import (AGE_GROUP_COLUMN, AGE_LABELS, BIRTH_DATE_COLUMN, ESCOLARIDADE_ORDER, HORAS_ORDER,
+                    IMPACTO_SAUDE_ORDER, RENDIMENTO_ORDER, TEMPO_ORDER)
+
+# Definir cores e estilo - Nova paleta profissional
+COLORS = {
+    'background': '#f4f6f8',  # Cinza claro para fundo
+    'text': '#2D3436',        # Cor de texto principal
+    'title': '#34495E',       # Cor para títulos
+    'primary': '#2C3E50',     # Azul escuro como cor primária
+    'secondary': '#00C9A7',   # Ciano para destaques
+    'accent': '#F39C12',      # Laranja para acentos
+    'success': '#27AE60',     # Verde para sucesso
+    'warning': '#F1C40F',     # Amarelo para avisos
+    'danger': '#E74C3C',      # Vermelho para erros
+    'chart1': '#3498DB',      # Azul para gráficos
+    'chart2': '#2980B9',      # Azul mais escuro
+    'chart3': '#1ABC9C',      # Verde-água
+    'chart4': '#16A085'       # Verde-água mais escuro
+}
+
+# Valores padrão das especificações de cada tipo de gráfico
+BAR_DEFAULTS = {
+    'orientation': 'h',
+    'value_label': 'Quantidade',
+    'height': 300,
+    'margin': dict(l=10, r=10, t=40, b=10),
+}
+PIE_DEFAULTS = {
+    'value_label': 'Quantidade',
+    'height': 300,
+    'width': 400,
+    'margin': dict(l=10, r=10, t=40, b=10),
+    'legend': dict(orientation="v", yanchor="top", y=1.0, xanchor="left", x=1.05, font=dict(size=12)),
+}
+DEFAULTS = {'bar': BAR_DEFAULTS, 'pie': PIE_DEFAULTS}
+
+# Especificação de cada gráfico:
+#   column: coluna contada (AGE_GROUP_COLUMN e TOPICS_FILTER são derivadas)
+#   type: 'bar' ou 'pie'
+#   title, label: título do gráfico e nome da categoria (eixo e dica)
+#   value_label: nome da quantidade (eixo e dica)
+#   orientation: 'v' (barras verticais) ou 'h' (horizontais)
+#   color / colors: cor das barras / cores das fatias
+#   order: ordem fixa das categorias (desconhecidas vão para o final);
+#       reverse inverte a ordem e complete inclui as categorias sem respostas
+#   top: mostra apenas as N categorias com mais respostas
+#   sort: 'asc' ou 'desc' para ordenar pela quantidade
+#   truncate: tamanho máximo do rótulo das categorias no eixo
+#   empty_message: aviso exibido quando não há dados
+# As barras horizontais são desenhadas de baixo para cima: a primeira
+# categoria fica na base do gráfico.
+CHART_SPECS = {
+    # Dados Ocupacionais
+    'tempo_escala_6x1': dict(
+        column='TempoEscala6x1', type='bar', title="Tempo na Escala 6x1", label='Tempo',
+        orientation='v', color=COLORS['chart1'], order=TEMPO_ORDER, tickangle=45,
+        margin=dict(l=10, r=10, t=40, b=50),
+    ),
+    'contrato_trabalho': dict(
+        column='ContratoTrabalho', type='bar', title="Tipo de Contrato de Trabalho", label='Tipo de Contrato',
+        color=COLORS['chart2'], sort='asc',
+    ),
+    'horas_trabalho': dict(
+        column='HorasTrabalho', type='bar', title="Horas de Trabalho", label='Horas',
+        orientation='v', color=COLORS['chart3'], order=HORAS_ORDER, tickangle=45,
+    ),
+    'occupation': dict(
+        column='Occupation_Respostas', type='bar', title="Top 10 Ocupações", label='Ocupação',
+        color=COLORS['chart4'], top=10, sort='asc', truncate=30, height=400,
+    ),
+    'cnae': dict(
+        column='CnaeDivision_Respostas', type='bar', title="Top 10 CNAEs", label='CNAE',
+        color=COLORS['chart1'], top=10, sort='asc', truncate=30, height=400,
+    ),
+    'estado_trabalho': dict(
+        column='EstadoTrabalho', type='bar', title="Top 10 Estados", label='Estado',
+        orientation='v', color=COLORS['chart2'], top=10,
+    ),
+
+    # Dados Pessoais
+    'idade': dict(
+        column=AGE_GROUP_COLUMN, type='bar', title="Distribuição por Faixa Etária", label='Faixa Etária',
+        color=COLORS['chart2'], order=AGE_LABELS, reverse=True, complete=True, height=350,
+    ),
+    'sexo': dict(
+        column='Sexo', type='pie', title="Distribuição por Sexo", label='Sexo',
+        colors=[COLORS['chart1'], COLORS['chart2'], COLORS['chart3']],
+    ),
+    'cor_raca': dict(
+        column='CorRaca', type='pie', title="Distribuição por Cor/Raça", label='Cor/Raça',
+        colors=[COLORS['chart1'], COLORS['chart2'], COLORS['chart3'], COLORS['chart4'], COLORS['success']],
+    ),
+    'estado_civil': dict(
+        column='EstadoCivil', type='pie', title="Distribuição por Estado Civil", label='Estado Civil',
+        colors=[COLORS['chart1'], COLORS['chart2'], COLORS['chart3'], COLORS['chart4']],
+        width=430, margin=dict(l=10, r=10, t=10, b=10),
+        legend=dict(orientation="v", yanchor="middle", y=0.5, xanchor="left", font=dict(size=9)),
+    ),
+    'tem_filhos': dict(
+        column='TemFilhos', type='pie', title="Distribuição por Tem Filhos", label='Tem Filhos',
+        colors=[COLORS['chart2'], COLORS['chart3']],
+        legend=dict(orientation="v", yanchor="top", y=1.0, xanchor="left", x=1.05, font=dict(size=10)),
+    ),
+    'rendimento': dict(
+        column='Rendimento', type='bar', title="Distribuição por Rendimento", label='Rendimento',
+        color=COLORS['chart4'], order=RENDIMENTO_ORDER, reverse=True, height=350,
+    ),
+    'escolaridade': dict(
+        column='Escolaridade', type='bar', title="Distribuição por Escolaridade", label='Escolaridade',
+        color=COLORS['chart3'], order=ESCOLARIDADE_ORDER, reverse=True, height=350,
+    ),
+
+    # Percepção de Impacto
+    'impacto_familia': dict(
+        column='ImpactoVidaFamiliar', type='bar', title="Impacto na Vida Familiar", label='Resposta',
+        color=COLORS['chart1'], sort='asc',
+    ),
+    'impacto_fisica': dict(
+        column='ImpactoSaudeFisica', type='bar', title="Impacto na Saúde Física", label='Resposta',
+        color=COLORS['chart2'], order=IMPACTO_SAUDE_ORDER,
+    ),
+    'impacto_mental': dict(
+        column='ImpactoSaudeMental', type='bar', title="Impacto na Saúde Mental", label='Resposta',
+        color=COLORS['chart3'], order=IMPACTO_SAUDE_ORDER,
+    ),
+    'impactos': dict(
+        column=TOPICS_FILTER, type='bar', title="Análise de Tópicos nas Respostas", label='Tópico Identificado',
+        value_label='Número de Ocorrências', color=COLORS['success'], sort='desc', height=450,
+        empty_message="Sem dados disponíveis",
+    ),
+}
+
+
+# Nome de cada coluna nos cruzamentos (ver crosstab_figure)
+COLUMN_LABELS = {
+    'Escala6x1': "Trabalha na Escala 6x1",
+    'TempoEscala6x1': "Tempo na Escala 6x1",
+    'ContratoTrabalho': "Tipo de Contrato",
+    'HorasTrabalho': "Horas de Trabalho",
+    'Occupation_Respostas': "Ocupação",
+    'CnaeDivision_Respostas': "CNAE",
+    'EstadoTrabalho': "Estado de Trabalho",
+    AGE_GROUP_COLUMN: "Faixa Etária",
+    'Sexo': "Sexo",
+    'CorRaca': "Cor/Raça",
+    'EstadoCivil': "Estado Civil",
+    'TemFilhos': "Tem Filhos",
+    'Rendimento': "Rendimento",
+    'Escolaridade': "Escolaridade",
+    'ImpactoVidaFamiliar': "Impacto na Vida Familiar",
+    'ImpactoSaudeFisica': "Impacto na Saúde Física",
+    'ImpactoSaudeMental': "Impacto na Saúde Mental",
+}
+
+# Tamanho máximo dos rótulos dos eixos do cruzamento e quantidade máxima de
+# células com o valor escrito
+CROSSTAB_TRUNCATE = 30
+CROSSTAB_MAX_TEXT_CELLS = 400
+
+
+def chart_spec(chart):
+    """
+    Especificação completa de um gráfico (com os valores padrão do tipo).
+
+    Args:
+        chart: Identificador do gráfico (chave de CHART_SPECS)
+
+    Returns:
+        dict: Especificação
+    """
+    spec = CHART_SPECS[chart]
+    return {**DEFAULTS[spec['type']], **spec}
+
+
+def click_field(chart):
+    """Campo do clique (clickData) com a categoria clicada em um gráfico."""
+    spec = chart_spec(chart)
+    if spec['type'] == 'pie':
+        return 'label'
+    return 'x' if spec['orientation'] == 'v' else 'y'
+
+
+def column_counts(counts, column):
+    """
+    Contagens de uma coluna, calculando as colunas derivadas se necessário.
+
+    Args:
+        counts: Dicionário coluna -> Série com as contagens
+        column: Coluna desejada
+
+    Returns:
+        Series: Contagens (vazia se a coluna não estiver disponível)
+    """
+    if column in counts:
+        return counts[column]
+    if column == AGE_GROUP_COLUMN and BIRTH_DATE_COLUMN in counts:
+        # A faixa é calculada uma vez por data de nascimento distinta e
+        # ponderada pela quantidade de respondentes com aquela data
+        return age_group_counts(counts[BIRTH_DATE_COLUMN])
+    return pd.Series([], dtype='int64')
+
+
+def chart_data(spec, counts):
+    """
+    Categorias e quantidades de um gráfico, na ordem em que são desenhadas.
+
+    Args:
+        spec: Especificação do gráfico (ver chart_spec)
+        counts: Série categoria -> quantidade, em ordem decrescente
+
+    Returns:
+        tuple: (categorias, quantidades), como arrays
+    """
+    labels = counts.index.to_numpy(dtype=object)
+    values = counts.to_numpy(dtype='int64')
+
+    order = spec.get('order')
+    if order is not None:
+        if spec.get('complete'):
+            missing = [label for label in order if label not in counts.index]
+            labels = np.concatenate([labels, np.array(missing, dtype=object)])
+            values = np.concatenate([values, np.zeros(len(missing), dtype='int64')])
+        positions = pd.Index(order).get_indexer(labels)
+        positions[positions < 0] = len(order)
+        keys = -positions if spec.get('reverse') else positions
+        sorter = np.argsort(keys, kind='stable')
+        labels, values = labels[sorter], values[sorter]
+
+    if spec.get('top'):
+        labels, values = labels[:spec['top']], values[:spec['top']]
+
+    sort = spec.get('sort')
+    if sort is not None:
+        sorter = np.argsort(values if sort == 'asc' else -values, kind='stable')
+        labels, values = labels[sorter], values[sorter]
+    return labels, values
+
+
+def _truncated_axis(labels, limit):
+    """Eixo categórico com os rótulos longos truncados (o texto completo fica na dica)."""
+    return dict(
+        tickmode='array',
+        tickvals=labels,
+        ticktext=[f"{text[:limit]}..." if len(text) > limit else text for text in map(str, labels)],
+    )
+
+
+def _layout(spec):
+    """Layout comum a todos os gráficos."""
+    return dict(
+        title=dict(text=spec['title'], font=dict(size=16, family="Segoe UI", color=COLORS['title'])),
+        font=dict(family="Segoe UI"),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        margin=spec['margin'],
+        height=spec['height'],
+    )
+
+
+def _bar_figure(spec, labels, values):
+    """Gráfico de barras com os rótulos dentro das barras grandes e fora das pequenas."""
+    vertical = spec['orientation'] == 'v'
+    label, value_label = spec['label'], spec['value_label']
+
+    # Barras acima de 80% da maior têm o rótulo dentro (em branco)
+    threshold = (values.max() if len(values) else 0) * 0.8
+    inside = values > threshold
+
+    if vertical:
+        x, y = labels, values
+        hovertemplate = f"{label}=%{{x}}<br>{value_label}=%{{text}}<extra></extra>"
+    else:
+        x, y = values, labels
+        hovertemplate = f"{value_label}=%{{text}}<br>{label}=%{{y}}<extra></extra>"
+    trace = go.Bar(
+        x=x,
+        y=y,
+        orientation=spec['orientation'],
+        text=values,
+        texttemplate='%{y}' if vertical else '%{x}',
+        textposition=np.where(inside, 'inside', 'outside').tolist(),
+        textfont=dict(color=np.where(inside, 'white', 'black').tolist()),
+        marker=dict(color=spec['color'], line=dict(color='rgba(0,0,0,0)')),
+        opacity=0.8,
+        hovertemplate=hovertemplate,
+        name='',
+        showlegend=False,
+    )
+
+    category_axis = {'title': label if vertical else ""}
+    if spec.get('tickangle') is not None:
+        category_axis['tickangle'] = spec['tickangle']
+    if spec.get('truncate'):
+        category_axis.update(_truncated_axis(labels, spec['truncate']))
+    value_axis = {'title': value_label}
+
+    figure = go.Figure(trace)
+    figure.update_layout(
+        **_layout(spec),
+        xaxis=category_axis if vertical else value_axis,
+        yaxis=value_axis if vertical else category_axis,
+    )
+    return figure
+
+
+def _pie_figure(spec, labels, values):
+    """Gráfico de pizza com os rótulos das fatias pequenas (menos de 10%) do lado de fora."""
+    total = values.sum()
+    percentual = values / total * 100 if total else np.zeros(len(values))
+    trace = go.Pie(
+        labels=labels,
+        values=values,
+        textinfo='percent+label',
+        textposition=np.where(percentual < 10, 'outside', 'inside').tolist(),
+        insidetextfont=dict(color='white'),
+        outsidetextfont=dict(color='black'),
+        # Destacar fatias pequenas
+        pull=np.where(percentual < 5, 0.05, 0).tolist(),
+        hovertemplate=f"{spec['label']}=%{{label}}<br>{spec['value_label']}=%{{value}}<extra></extra>",
+        name='',
+    )
+    figure = go.Figure(trace)
+    figure.update_layout(**_layout(spec), piecolorway=spec['colors'], legend=spec['legend'], width=spec['width'])
+    return figure
+
+
+def empty_figure(title, message):
+    """
+    Gráfico vazio com um aviso no centro.
+
+    Args:
+        title: Título do gráfico
+        message: Texto do aviso
+
+    Returns:
+        Figure: Figura do Plotly
+    """
+    figure = go.Figure(go.Bar(x=[0], y=[0], showlegend=False))
+    figure.update_layout(
+        title=dict(text=title, font=dict(size=16, family="Segoe UI", color=COLORS['title'])),
+        font=dict(family="Segoe UI"),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False),
+        annotations=[dict(
+            text=message,
+            showarrow=False,
+            font=dict(size=16, color=COLORS['text']),
+            xref="paper",
+            yref="paper",
+            x=0.5,
+            y=0.5
+        )]
+    )
+    return figure
+
+
+def crosstab_figure(table, row_label, column_label):
+    """
+    Mapa de calor com as contagens de uma coluna por outra.
+
+    Args:
+        table: DataFrame de contagens (ver count_cube.CountCube.crosstab)
+        row_label: Nome da coluna das linhas
+        column_label: Nome da coluna das colunas
+
+    Returns:
+        Figure: Figura do Plotly
+    """
+    title = f"{row_label} por {column_label}"
+    if table.empty:
+        return empty_figure(title, "Sem dados disponíveis")
+
+    values = table.to_numpy()
+    # Porcentagem de cada célula no total da linha, exibida na dica
+    row_totals = values.sum(axis=1, keepdims=True)
+    share = np.divide(values * 100.0, row_totals, out=np.zeros(values.shape), where=row_totals > 0)
+    x = [str(label) for label in table.columns]
+    y = [str(label) for label in table.index]
+    trace = go.Heatmap(
+        z=values,
+        x=x,
+        y=y,
+        customdata=np.round(share, 1),
+        colorscale=[[0, 'white'], [1, COLORS['primary']]],
+        texttemplate='%{z}' if values.size <= CROSSTAB_MAX_TEXT_CELLS else None,
+        hovertemplate=(f"{row_label}=%{{y}}<br>{column_label}=%{{x}}<br>Quantidade=%{{z}}"
+                       f"<br>%{{customdata}}% de {row_label}=%{{y}}<extra></extra>"),
+        colorbar=dict(title='Quantidade'),
+        name='',
+    )
+    figure = go.Figure(trace)
+    spec = {'title': title, 'margin': dict(l=10, r=10, t=40, b=10), 'height': max(350, 28 * len(y) + 200)}
+    figure.update_layout(
+        **_layout(spec),
+        xaxis={**_truncated_axis(x, CROSSTAB_TRUNCATE), 'title': column_label, 'automargin': True,
+               'tickangle': 45 if len(x) > 6 else 0},
+        yaxis={**_truncated_axis(y, CROSSTAB_TRUNCATE), 'title': row_label, 'automargin': True,
+               'autorange': 'reversed'},
+    )
+    return figure
+
+
+def build_figure(chart, counts):
+    """
+    Constrói a figura de um gráfico a partir das contagens por coluna.
+
+    Args:
+        chart: Identificador do gráfico (chave de CHART_SPECS)
+        counts: Dicionário coluna -> Série com as contagens
+
+    Returns:
+        Figure: Figura do Plotly
+    """
+    spec = chart_spec(chart)
+    labels, values = chart_data(spec, column_counts(counts, spec['column']))
+    if not len(labels) and spec.get('empty_message'):
+        return empty_figure(spec['title'], spec['empty_message'])
+    if spec['type'] == 'pie':
+        return _pie_figure(spec, labels, values)
+    return _bar_figure(spec, labels, values)
+
+
+def build_figures(charts, counts):
+    """
+    Constrói as figuras de vários gráficos a partir das mesmas contagens.
+
+    Args:
+        charts: Identificadores dos gráficos
+        counts: Dicionário coluna -> Série com as contagens
+
+    Returns:
+        dict: Identificador do gráfico -> figura
+    """
+    return {chart: build_figure(chart, counts) for chart in charts}
@@ -0,0 +1,353 @@
+"""
+Cubo de contagens para os cruzamentos entre colunas.
+
+Cruzar duas colunas (por exemplo, Impacto na Saúde Mental por Sexo) com
+pd.crosstab a cada requisição percorre todas as respostas. O CountCube
+calcula de uma vez, por versão dos dados, as contagens marginais de cada
+coluna e de cada par de colunas (e, opcionalmente, de combinações de três
+colunas), como arrays densos do NumPy indexados pelos códigos das
+categorias:
+
+    cube.marginal('Sexo', 'ImpactoSaudeMental')[i, j]
+
+é a quantidade de respondentes com a i-ésima categoria de Sexo e a j-ésima
+de ImpactoSaudeMental. Cada marginal é um único np.bincount sobre os códigos
+combinados das colunas, e um cruzamento passa a ser a leitura de um array
+já pronto.
+
+O cubo é gravado em um arquivo .npz ao lado do banco, de modo que reinícios
+e outros processos do servidor o reaproveitam sem ler as respostas enquanto
+os dados não mudam.
+
+Variáveis de ambiente:
+    COUNT_CUBE_PATH: arquivo do cubo (padrão: base_cubo.npz, ao lado do banco)
+    COUNT_CUBE_3D: combinações de três colunas, separadas por ';', com as
+        colunas separadas por ',' (padrão: nenhuma). Exemplo:
+        "Sexo,HorasTrabalho,ImpactoSaudeMental"
+
+Uso:
+    python count_cube.py   (constrói e grava o cubo dos dados atuais)
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from ages import age_group_codes
+from db import DB_PATH
+from schema import AGE_GROUP_COLUMN, AGE_LABELS, BIRTH_DATE_COLUMN, CATEGORY_ORDERS, COUNT_COLUMNS
+
+# Colunas do cubo: as contadas pelo dashboard, com a faixa etária no lugar
+# da data de nascimento
+CUBE_COLUMNS = [AGE_GROUP_COLUMN if column == BIRTH_DATE_COLUMN else column for column in COUNT_COLUMNS]
+
+# Colunas com ordem própria das categorias (as demais são ordenadas pela quantidade)
+ORDERED_COLUMNS = set(CATEGORY_ORDERS) | {AGE_GROUP_COLUMN}
+
+
+def parse_triples(text):
+    """
+    Lê as combinações de três colunas no formato de COUNT_CUBE_3D.
+
+    Args:
+        text: Texto como "a,b,c;d,e,f"
+
+    Returns:
+        list: Tuplas de colunas
+    """
+    return [tuple(column.strip() for column in group.split(','))
+            for group in (text or '').split(';') if group.strip()]
+
+
+# Arquivo do cubo e combinações de três colunas
+DEFAULT_PATH = os.environ.get('COUNT_CUBE_PATH') or f"{os.path.splitext(DB_PATH)[0]}_cubo.npz"
+DEFAULT_TRIPLES = parse_triples(os.environ.get('COUNT_CUBE_3D'))
+
+
+def column_codes(frame, column, today=None):
+    """
+    Códigos inteiros das respostas de uma coluna e as categorias correspondentes.
+
+    Args:
+        frame: DataFrame com as respostas
+        column: Coluna (ou AGE_GROUP_COLUMN, calculada a partir da data de nascimento)
+        today: Data de referência para as faixas etárias
+
+    Returns:
+        tuple: (ndarray int64 com -1 para nulos, lista de categorias)
+    """
+    if column == AGE_GROUP_COLUMN:
+        return age_group_codes(frame[BIRTH_DATE_COLUMN], today).astype('int64'), list(AGE_LABELS)
+    values = frame[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # As colunas do IncrementalLoader já são categóricas, com as
+        # categorias na ordem de schema.CATEGORY_ORDERS
+        return values.cat.codes.to_numpy().astype('int64'), values.cat.categories.tolist()
+    codes, categories = pd.factorize(values)
+    return codes.astype('int64'), categories.tolist()
+
+
+def cube_key(snapshot, today=None, columns=CUBE_COLUMNS, triples=DEFAULT_TRIPLES):
+    """
+    Versão do cubo para os dados de um snapshot.
+
+    Depende apenas das contagens (e não dos tópicos, como
+    DataSnapshot.content_key), da data e das combinações de colunas.
+
+    Returns:
+        str: Hash SHA-1 em hexadecimal
+    """
+    digest = hashlib.sha1(str(snapshot.row_count).encode('utf-8'))
+    for column in sorted(snapshot.counts):
+        digest.update(column.encode('utf-8'))
+        values = snapshot.counts[column]
+        if len(values) > 0:
+            digest.update(pd.util.hash_pandas_object(values, index=True).to_numpy().tobytes())
+    digest.update(json.dumps([(today or date.today()).isoformat(), list(columns), [list(triple) for triple in triples]],
+                             ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class CountCube:
+    """
+    Contagens marginais de 1, 2 e (opcionalmente) 3 colunas.
+
+    Args:
+        key: Versão dos dados (ver cube_key)
+        categories: Coluna -> lista de categorias (a posição é o código)
+        marginals: Tupla de colunas -> array de contagens, com um eixo por
+            coluna, na ordem da tupla
+    """
+
+    def __init__(self, key, categories, marginals):
+        self.key = key
+        self.categories = categories
+        self.columns = list(categories)
+        self._marginals = marginals
+
+    @classmethod
+    def build(cls, frame, key, columns=CUBE_COLUMNS, triples=DEFAULT_TRIPLES, today=None):
+        """
+        Calcula o cubo a partir das respostas.
+
+        Args:
+            frame: DataFrame com as respostas
+            key: Versão dos dados (ver cube_key)
+            columns: Colunas do cubo
+            triples: Combinações de três colunas a incluir
+            today: Data de referência para as faixas etárias
+
+        Returns:
+            CountCube: Cubo com todas as marginais de 1 e 2 colunas
+        """
+        columns = list(columns)
+        for triple in triples:
+            unknown = [column for column in triple if column not in columns]
+            if len(triple) != 3 or len(set(triple)) != 3 or unknown:
+                raise ValueError(f"Combinação inválida para o cubo: {triple}")
+
+        codes = {}
+        categories = {}
+        for column in columns:
+            codes[column], categories[column] = column_codes(frame, column, today)
+        valid = {column: codes[column] >= 0 for column in columns}
+
+        def count(combination):
+            # Código combinado (como em np.ravel_multi_index) das linhas sem nulos
+            shape = tuple(len(categories[column]) for column in combination)
+            mask = np.logical_and.reduce([valid[column] for column in combination])
+            combined = np.zeros(int(mask.sum()), dtype='int64')
+            for column, size in zip(combination, shape):
+                combined = combined * size + codes[column][mask]
+            return np.bincount(combined, minlength=int(np.prod(shape))).reshape(shape)
+
+        combinations = [(column,) for column in columns]
+        combinations += list(itertools.combinations(columns, 2))
+        combinations += [tuple(triple) for triple in triples]
+        return cls(key, categories, {combination: count(combination) for combination in combinations})
+
+    @property
+    def combinations(self):
+        """Combinações de colunas guardadas no cubo."""
+        return list(self._marginals)
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelos arrays de contagens, em bytes."""
+        return sum(array.nbytes for array in self._marginals.values())
+
+    def marginal(self, *columns):
+        """
+        Contagens de uma combinação de colunas.
+
+        Combinações não guardadas diretamente são obtidas somando os eixos
+        extras de uma marginal maior que as contenha.
+
+        Args:
+            *columns: Colunas (distintas), na ordem dos eixos desejada
+
+        Returns:
+            ndarray: Contagens, com um eixo por coluna
+
+        Raises:
+            KeyError: Se a combinação não puder ser obtida do cubo
+        """
+        wanted = set(columns)
+        if len(wanted) != len(columns):
+            raise KeyError(f"Colunas repetidas: {columns}")
+        for stored in sorted(self._marginals, key=len):
+            if wanted <= set(stored):
+                array = self._marginals[stored]
+                extra = tuple(axis for axis, column in enumerate(stored) if column not in wanted)
+                if extra:
+                    array = array.sum(axis=extra)
+                remaining = [column for column in stored if column in wanted]
+                return np.transpose(array, [remaining.index(column) for column in columns])
+        raise KeyError(f"Combinação não disponível no cubo: {columns}")
+
+    def _axis_positions(self, column, totals, top):
+        """Categorias de um eixo com respostas, na ordem de exibição."""
+        positions = np.flatnonzero(totals > 0)
+        if column in ORDERED_COLUMNS:
+            return positions
+        # Demais colunas: da maior para a menor quantidade, limitadas a top
+        positions = positions[np.argsort(-totals[positions], kind='stable')]
+        return positions[:top] if top else positions
+
+    def crosstab(self, rows, columns, top=None):
+        """
+        Tabela de contagens de uma coluna por outra, como pd.crosstab.
+
+        As categorias sem respostas são omitidas. As colunas com ordem
+        própria (schema.CATEGORY_ORDERS e faixa etária) mantêm essa ordem; as
+        demais são ordenadas pela quantidade.
+
+        Args:
+            rows: Coluna das linhas
+            columns: Coluna das colunas
+            top: Quantidade máxima de categorias das colunas sem ordem própria
+
+        Returns:
+            DataFrame: Contagens (categorias de rows x categorias de columns)
+        """
+        table = self.marginal(rows, columns)
+        row_positions = self._axis_positions(rows, table.sum(axis=1), top)
+        column_positions = self._axis_positions(columns, table.sum(axis=0), top)
+        return pd.DataFrame(
+            table[np.ix_(row_positions, column_positions)],
+            index=pd.Index([self.categories[rows][position] for position in row_positions], name=rows),
+            columns=pd.Index([self.categories[columns][position] for position in column_positions], name=columns),
+        )
+
+    def save(self, path):
+        """
+        Grava o cubo em um arquivo .npz (de forma atômica).
+
+        Args:
+            path: Caminho do arquivo
+        """
+        combinations = list(self._marginals)
+        meta = json.dumps({
+            'chave': self.key,
+            'categorias': self.categories,
+            'marginais': [list(combination) for combination in combinations],
+        }, ensure_ascii=False)
+        arrays = {f'marginal_{position}': self._marginals[combination]
+                  for position, combination in enumerate(combinations)}
+
+        # Escrita atômica: outros processos nunca leem um arquivo pela metade
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, meta=np.array(meta), **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path, key=None):
+        """
+        Lê um cubo gravado com save().
+
+        Args:
+            path: Caminho do arquivo
+            key: Versão esperada dos dados (None aceita qualquer versão)
+
+        Returns:
+            CountCube: Cubo lido, ou None se o arquivo não existir, for
+            inválido ou for de outra versão dos dados
+        """
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data['meta']))
+                if key is not None and meta['chave'] != key:
+                    return None
+                marginals = {tuple(combination): data[f'marginal_{position}']
+                             for position, combination in enumerate(meta['marginais'])}
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(meta['chave'], meta['categorias'], marginals)
+
+
+# Cubo dos dados atuais; é recriado quando os dados ou a data mudam
+_current_key = None
+_current_cube = None
+_current_lock = threading.Lock()
+
+
+def get_count_cube(snapshot, path=DEFAULT_PATH, today=None):
+    """
+    Retorna o cubo de contagens dos dados de um snapshot do DataStore.
+
+    O cubo é lido do arquivo, se for da mesma versão dos dados; caso
+    contrário, é calculado a partir das respostas e gravado.
+
+    Args:
+        snapshot: DataSnapshot com os dados atuais
+        path: Arquivo do cubo (None não lê nem grava o arquivo)
+        today: Data de referência para as faixas etárias (padrão: hoje)
+
+    Returns:
+        CountCube: Cubo (compartilhado enquanto os dados não mudarem)
+    """
+    global _current_key, _current_cube
+
+    today = today or date.today()
+    key = cube_key(snapshot, today)
+    with _current_lock:
+        if key != _current_key:
+            cube = CountCube.load(path, key) if path else None
+            if cube is None:
+                start = time.perf_counter()
+                cube = CountCube.build(snapshot.frame, key, today=today)
+                print(f"Cubo de contagens calculado em {time.perf_counter() - start:.2f}s "
+                      f"({len(cube.combinations)} marginais, {cube.nbytes / 1024:.0f} KB)")
+                if path:
+                    try:
+                        cube.save(path)
+                    except OSError as save_error:
+                        print(f"Não foi possível gravar o cubo em {path}: {save_error}")
+            _current_cube = cube
+            _current_key = key
+        return _current_cube
+
+
+if __name__ == '__main__':
+    from data_store import store
+
+    snapshot = store.snapshot()
+    start = time.perf_counter()
+    cube = CountCube.build(snapshot.frame, cube_key(snapshot))
+    cube.save(DEFAULT_PATH)
+    print(f"Cubo de contagens gravado em {DEFAULT_PATH} em {time.perf_counter() - start:.2f}s "
+          f"({snapshot.row_count} respondentes, {cube.nbytes / 1024:.0f} KB)")
@@ -0,0 +1,583 @@
+"""
+Acesso compartilhado aos dados da tabela Planilha1.
+
+Em vez de reler a tabela inteira a cada atualização do dashboard, o
+IncrementalLoader guarda em memória as linhas já lidas e o maior rowid
+visto (high-water mark). A cada atualização só as linhas novas são lidas do
+SQLite, e as contagens usadas pelos gráficos são atualizadas somando as
+contagens das linhas novas às já existentes.
+
+O DataStore é o ponto único de acesso do processo: ele detecta mudanças no
+arquivo base.sqlite (PRAGMA data_version e metadados do arquivo) e só
+consulta o banco quando algo mudou, uma única vez por mudança, não importa
+quantos callbacks ou usuários peçam os dados ao mesmo tempo.
+"""
+
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from aggregates import load_aggregates
+from arrow_snapshot import read_snapshot, snapshot_path
+from db import DB_PATH, ConnectionPool, connect_readonly
+from impact_topics import load_topic_table, load_topic_totals
+from schema import CATEGORICAL_COLUMNS, CATEGORY_ORDERS, COUNT_COLUMNS, TABLE_NAME
+
+# Nome da coluna (e do índice) com o rowid do SQLite
+ROWID_COLUMN = 'rowid'
+
+
+def sort_counts(counter):
+    """
+    Converte um Counter em uma Série ordenada por contagem (decrescente).
+
+    Empates mantêm a ordem de inserção do Counter, que é a ordem da primeira
+    aparição de cada valor nos dados.
+
+    Args:
+        counter: Counter valor -> contagem
+
+    Returns:
+        Series: Contagens no mesmo formato de value_counts()
+    """
+    counts = pd.Series(dict(counter), dtype='int64')
+    return counts.sort_values(ascending=False, kind='stable')
+
+
+def count_values(df, columns=COUNT_COLUMNS):
+    """
+    Conta os valores de cada coluna, como value_counts(), com desempate estável.
+
+    Args:
+        df: DataFrame com as respostas
+        columns: Colunas a serem contadas
+
+    Returns:
+        dict: Coluna -> Série com as contagens
+    """
+    return {column: sort_counts(_counter(df[column])) for column in columns}
+
+
+def _counter(series):
+    """Conta os valores não nulos de uma Série, na ordem da primeira aparição."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Contagem direta sobre os códigos inteiros das categorias
+        codes = series.cat.codes.to_numpy()
+        codes = codes[codes >= 0]
+        present, first = np.unique(codes, return_index=True)
+        totals = np.bincount(codes, minlength=len(series.cat.categories))
+        categories = series.cat.categories
+        return Counter({categories[code]: int(totals[code]) for code in present[np.argsort(first, kind='stable')]})
+    return Counter(series.value_counts(sort=False).to_dict())
+
+
+def _comparable(frame):
+    """Converte as colunas para object (nulos como None), para comparar conteúdos."""
+    values = frame.astype(object)
+    return values.where(values.notna(), None)
+
+
+class IncrementalLoader:
+    """
+    Mantém em memória as linhas de Planilha1 e as contagens por coluna.
+
+    A cada refresh() apenas as linhas com rowid maior que o high-water mark
+    são lidas. Se a tabela tiver sido reescrita (por exemplo, por
+    utils/excel_to_sqlite.py com if_exists='replace') ou tiver linhas
+    removidas, o estado é descartado e a tabela é relida por completo.
+
+    As colunas de múltipla escolha (schema.CATEGORICAL_COLUMNS) são guardadas
+    como pandas.Categorical, com as categorias na ordem de
+    schema.CATEGORY_ORDERS seguidas dos demais valores na ordem em que
+    aparecem, e contadas diretamente sobre os códigos inteiros. A resposta
+    livre (Impactos) continua como texto.
+
+    Com snapshot_path, a primeira carga (e a recarga depois de a tabela ser
+    reescrita) começa pelo arquivo Arrow gravado na ingestão (ver
+    arrow_snapshot.py), mapeado em memória; do SQLite são lidas só as linhas
+    posteriores a ele. O arquivo é descartado se não corresponder ao banco.
+
+    Além das contagens por coluna, outras agregações podem ser mantidas
+    incrementalmente com add_accumulator().
+    """
+
+    def __init__(self, db_path, table=TABLE_NAME, count_columns=COUNT_COLUMNS,
+                 categorical_columns=CATEGORICAL_COLUMNS, pool=None, snapshot_path=None):
+        self.db_path = db_path
+        self.pool = pool or ConnectionPool(db_path)
+        self.snapshot_path = snapshot_path
+        self.table = table
+        self.count_columns = list(count_columns)
+        self.categorical_columns = list(categorical_columns)
+        self._lock = threading.RLock()
+        self._accumulators = {}
+        self._reset()
+
+    def _reset(self):
+        self.high_water_mark = 0
+        self.row_count = 0
+        self._chunks = []
+        self._frame = None
+        self._counters = {column: Counter() for column in self.count_columns}
+        self._counts = None
+        self._values = {name: None for name in self._accumulators}
+        self._categories = {column: list(CATEGORY_ORDERS.get(column, [])) for column in self.categorical_columns}
+
+    def add_accumulator(self, name, compute, merge):
+        """
+        Registra uma agregação mantida incrementalmente.
+
+        Args:
+            name: Nome da agregação (ver accumulated())
+            compute: Função (linhas_novas, deslocamento) -> valor parcial, onde
+                deslocamento é a quantidade de linhas já carregadas antes delas
+            merge: Função (valor_atual, valor_parcial) -> valor combinado
+        """
+        with self._lock:
+            self._accumulators[name] = (compute, merge)
+            self._values[name] = None
+            if self.row_count:
+                self._values[name] = compute(self.frame, 0)
+
+    def refresh(self):
+        """
+        Lê do banco as linhas adicionadas desde a última atualização.
+
+        Returns:
+            DataFrame: Linhas novas (indexadas pelo rowid)
+        """
+        with self._lock:
+            with self.pool.connection() as conn:
+                if not self._is_consistent(conn):
+                    self._reset()
+                if self.row_count == 0 and self.snapshot_path:
+                    self._load_snapshot(conn)
+                delta = pd.read_sql(
+                    f"SELECT rowid AS {ROWID_COLUMN}, * FROM {self.table} "
+                    f"WHERE rowid > ? ORDER BY rowid",
+                    conn,
+                    params=(self.high_water_mark,),
+                    index_col=ROWID_COLUMN,
+                )
+
+            if len(delta) > 0:
+                self._append(delta)
+            return delta
+
+    def _load_snapshot(self, conn):
+        """Carrega as linhas do arquivo Arrow, se existir e corresponder ao banco."""
+        start = time.perf_counter()
+        frame = read_snapshot(self.snapshot_path, self.table)
+        if frame is None:
+            return
+        # Conferido antes de carregar: as agregações registradas (como a
+        # classificação dos tópicos) não são calculadas para um arquivo descartado
+        if not self._matches(conn, len(frame), int(frame.index[-1]), frame.tail(1)):
+            print(f"Arquivo Arrow {self.snapshot_path} desatualizado, lendo a tabela do banco")
+            return
+        self._append(frame)
+        print(f"{self.row_count} respostas carregadas de {self.snapshot_path} "
+              f"em {time.perf_counter() - start:.2f}s")
+
+    def _is_consistent(self, conn):
+        """
+        Verifica se as linhas já carregadas continuam no banco sem alterações.
+
+        Compara a quantidade de linhas até o high-water mark e o conteúdo da
+        última linha carregada, o que detecta tabelas recriadas e remoções.
+        """
+        if self.row_count == 0:
+            return True
+        return self._matches(conn, self.row_count, self.high_water_mark, self._chunks[-1].tail(1))
+
+    def _matches(self, conn, row_count, high_water_mark, last_row):
+        """
+        Verifica se o banco tem row_count linhas até high_water_mark e a última igual a last_row.
+
+        Args:
+            conn: Conexão com o banco
+            row_count: Quantidade de linhas esperada
+            high_water_mark: Maior rowid das linhas
+            last_row: DataFrame com a linha de rowid high_water_mark
+        """
+        known = conn.execute(
+            f"SELECT COUNT(*) FROM {self.table} WHERE rowid <= ?", (high_water_mark,)
+        ).fetchone()[0]
+        if known != row_count:
+            return False
+        current = pd.read_sql(
+            f"SELECT rowid AS {ROWID_COLUMN}, * FROM {self.table} WHERE rowid = ?",
+            conn,
+            params=(high_water_mark,),
+            index_col=ROWID_COLUMN,
+        )
+        return _comparable(current).equals(_comparable(last_row))
+
+    def _compact(self, delta):
+        """
+        Converte as colunas de múltipla escolha das linhas novas em Categorical.
+
+        Todos os blocos carregados compartilham as mesmas categorias, para
+        que a concatenação continue categórica. Valores nunca vistos são
+        acrescentados ao final das categorias (o que não altera os códigos
+        já atribuídos).
+
+        As colunas de texto seguem o tipo do primeiro bloco: depois de uma
+        carga do arquivo Arrow, as linhas lidas do SQLite também usam
+        pd.ArrowDtype, para que a concatenação mantenha o tipo.
+        """
+        delta = delta.copy()
+        added = {}
+        for column in self.categorical_columns:
+            if column not in delta:
+                continue
+            categories = self._categories[column]
+            known = set(categories)
+            values = delta[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Blocos do arquivo Arrow já vêm com as categorias na ordem certa
+                present = values.cat.categories
+            else:
+                present = pd.unique(values.dropna())
+            new = [value for value in present if value not in known]
+            if new:
+                categories.extend(new)
+                added[column] = new
+            delta[column] = pd.Categorical(values, categories=categories)
+
+        if self._chunks:
+            for column in delta.columns:
+                dtype = self._chunks[0][column].dtype
+                if isinstance(dtype, pd.ArrowDtype) and delta[column].dtype != dtype:
+                    delta[column] = delta[column].astype(dtype)
+
+        # Os blocos já carregados podem estar em uso por snapshots anteriores,
+        # então recebem as novas categorias em cópias
+        if added:
+            self._chunks = [
+                chunk.assign(**{column: chunk[column].cat.add_categories(new) for column, new in added.items()})
+                for chunk in self._chunks
+            ]
+        return delta
+
+    def _append(self, delta):
+        delta = self._compact(delta)
+        offset = self.row_count
+        self._chunks.append(delta)
+        self._frame = None
+        self.row_count += len(delta)
+        self.high_water_mark = int(delta.index[-1])
+
+        for column in self.count_columns:
+            self._counters[column].update(_counter(delta[column]))
+        self._counts = None
+
+        for name, (compute, merge) in self._accumulators.items():
+            partial = compute(delta, offset)
+            current = self._values[name]
+            self._values[name] = partial if current is None else merge(current, partial)
+
+    @property
+    def frame(self):
+        """DataFrame com todas as linhas carregadas (indexado pelo rowid)."""
+        with self._lock:
+            if self._frame is None:
+                if not self._chunks:
+                    return pd.DataFrame()
+                if len(self._chunks) > 1:
+                    self._chunks = [pd.concat(self._chunks)]
+                self._frame = self._chunks[0]
+            return self._frame
+
+    @property
+    def counts(self):
+        """Dicionário coluna -> Série de contagens (ver count_values())."""
+        with self._lock:
+            if self._counts is None:
+                self._counts = {column: sort_counts(counter) for column, counter in self._counters.items()}
+            return self._counts
+
+    def accumulated(self, name):
+        """Valor atual da agregação registrada com add_accumulator()."""
+        with self._lock:
+            return self._values[name]
+
+    def accumulated_values(self):
+        """Dicionário nome -> valor atual de todas as agregações registradas."""
+        with self._lock:
+            return dict(self._values)
+
+
+class DataSnapshot:
+    """
+    Estado dos dados em um determinado momento.
+
+    Attributes:
+        version: Número que muda sempre que os dados mudam
+        row_count: Quantidade de respostas
+        counts: Dicionário coluna -> Série de contagens
+        accumulated: Dicionário nome -> valor das agregações registradas
+        loaded_at: Momento (time.time()) em que os dados foram lidos
+        frame: DataFrame com as respostas; quando o snapshot veio dos
+            agregados materializados, é lido do banco só no primeiro acesso
+        content_key: Hash das contagens e agregações; ao contrário de
+            version, é o mesmo em qualquer processo para os mesmos dados
+        precomputed_topics: Se os tópicos de todas as respostas estão
+            gravados em ImpactosTopicos (ver impact_topics.py)
+    """
+
+    def __init__(self, version, row_count, counts, accumulated, loaded_at, frame=None, load_frame=None):
+        self.version = version
+        self.row_count = row_count
+        self.counts = counts
+        self.accumulated = accumulated
+        self.loaded_at = loaded_at
+        self._frame = frame
+        self._load_frame = load_frame
+        self._frame_lock = threading.Lock()
+        self._content_key = None
+        self.precomputed_topics = False
+
+    @property
+    def frame(self):
+        if self._frame is None:
+            with self._frame_lock:
+                if self._frame is None:
+                    self._frame = self._load_frame()
+        return self._frame
+
+    @property
+    def content_key(self):
+        if self._content_key is None:
+            digest = hashlib.sha1(str(self.row_count).encode('utf-8'))
+            for name, value in sorted({**self.counts, **self.accumulated}.items()):
+                digest.update(name.encode('utf-8'))
+                if value is not None and len(value) > 0:
+                    digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+            self._content_key = digest.hexdigest()
+        return self._content_key
+
+
+class DataStore:
+    """
+    Dono único, no processo, dos dados carregados de Planilha1.
+
+    Cada chamada a snapshot() verifica, de forma barata, se o banco mudou
+    desde a última leitura (metadados do arquivo e PRAGMA data_version de uma
+    conexão persistente). As leituras usam o pool de conexões somente
+    leitura de db.py. Só quando há mudança os dados são relidos;
+    chamadas concorrentes esperam essa única leitura e recebem o mesmo
+    resultado.
+
+    Com enable_aggregates(), as contagens são lidas das tabelas
+    materializadas na ingestão (ver aggregates.py) sempre que elas
+    corresponderem aos dados atuais, sem ler a tabela de respostas. Caso
+    contrário, o IncrementalLoader é usado. Os totais por tópico que não
+    vierem dos agregados nem de uma agregação registrada são calculados a
+    partir dos tópicos pré-calculados (ver impact_topics.py), se estiverem
+    completos.
+    """
+
+    def __init__(self, db_path, table=TABLE_NAME):
+        self.db_path = db_path
+        self.table = table
+        self.pool = ConnectionPool(db_path)
+        self.loader = IncrementalLoader(db_path, table, pool=self.pool, snapshot_path=snapshot_path(db_path))
+        self.version = 0
+        self._lock = threading.Lock()
+        self._probe = None
+        self._probe_inode = None
+        self._signature = None
+        self._snapshot = None
+        self._use_aggregates = False
+        self._topics_fingerprint = None
+
+    def add_accumulator(self, name, compute, merge):
+        """
+        Registra uma agregação incremental (ver IncrementalLoader.add_accumulator).
+
+        Pode ser chamado com os dados já carregados: o próximo snapshot()
+        recebe uma nova versão que inclui a agregação.
+        """
+        with self._lock:
+            self.loader.add_accumulator(name, compute, merge)
+            self._snapshot = None
+
+    def enable_aggregates(self, topics_fingerprint=None):
+        """
+        Passa a usar as contagens materializadas na ingestão, quando atualizadas.
+
+        Args:
+            topics_fingerprint: Fingerprint da classificação de tópicos atual;
+                os totais por tópico materializados e os tópicos
+                pré-calculados só são usados se tiverem sido gerados com ele,
+                e os totais ficam disponíveis como a agregação 'topicos'
+        """
+        with self._lock:
+            self._use_aggregates = True
+            self._topics_fingerprint = topics_fingerprint
+            self._snapshot = None
+
+    def _current_signature(self):
+        """
+        Calcula a assinatura atual do banco.
+
+        Os metadados do arquivo detectam substituições e escritas diretas; o
+        PRAGMA data_version detecta transações confirmadas por outras
+        conexões, inclusive as que ainda estão só no arquivo WAL.
+
+        Returns:
+            tuple: (inode, tamanho, mtime, data_version)
+        """
+        stat = os.stat(self.db_path)
+        # Um arquivo substituído precisa de uma nova conexão de verificação
+        if self._probe is None or self._probe_inode != stat.st_ino:
+            if self._probe is not None:
+                self._probe.close()
+            self._probe = connect_readonly(self.db_path)
+            self._probe_inode = stat.st_ino
+        data_version = self._probe.execute("PRAGMA data_version").fetchone()[0]
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns, data_version)
+
+    def close(self):
+        """
+        Fecha as conexões abertas com o banco; são reabertas na próxima consulta.
+
+        Usado antes de criar processos com fork (ver wsgi.py): uma conexão
+        SQLite não deve ser compartilhada entre processos. Os dados em memória
+        são mantidos.
+        """
+        with self._lock:
+            if self._probe is not None:
+                self._probe.close()
+                self._probe = None
+            self.pool.close()
+
+    def _load_from_aggregates(self):
+        """Monta o snapshot a partir dos agregados, ou retorna None se estiverem desatualizados."""
+        with self.pool.connection() as conn:
+            aggregated = load_aggregates(conn, self.table, self.loader.count_columns,
+                                         topics_fingerprint=self._topics_fingerprint)
+        if aggregated is None:
+            return None
+
+        row_count, max_rowid, counts, topic_totals = aggregated
+        if topic_totals is None and self._topics_fingerprint is not None and 'topicos' in self.loader.accumulated_values():
+            # Agregados sem os totais por tópico (gerados com --sem-topicos ou
+            # com outra classificação): as contagens continuam valendo, e os
+            # totais vêm da agregação registrada, se as linhas lidas forem
+            # exatamente as cobertas pelos agregados
+            self.loader.refresh()
+            if self.loader.row_count != row_count or self.loader.high_water_mark != max_rowid:
+                return None
+            topic_totals = self.loader.accumulated('topicos')
+        accumulated = {'topicos': topic_totals} if self._topics_fingerprint is not None else {}
+        return DataSnapshot(
+            version=self.version,
+            row_count=row_count,
+            counts=counts,
+            accumulated=accumulated,
+            loaded_at=time.time(),
+            load_frame=functools.partial(self._load_frame, max_rowid),
+        )
+
+    def _load_frame(self, max_rowid):
+        """
+        Lê as respostas sob demanda (usado por snapshots vindos dos agregados).
+
+        As linhas acrescentadas depois da leitura dos agregados ficam de fora:
+        pertencem à próxima versão, e as contagens filtradas deste snapshot
+        não podem incluir respondentes que os totais não incluem.
+
+        Args:
+            max_rowid: Maior rowid coberto pelos agregados do snapshot
+        """
+        self.loader.refresh()
+        frame = self.loader.frame
+        if len(frame) > 0 and frame.index[-1] > max_rowid:
+            frame = frame.loc[:max_rowid]
+        return frame
+
+    def _load_from_loader(self):
+        """Monta o snapshot lendo as linhas novas com o IncrementalLoader."""
+        self.loader.refresh()
+        return DataSnapshot(
+            version=self.version,
+            row_count=self.loader.row_count,
+            counts=self.loader.counts,
+            accumulated=self.loader.accumulated_values(),
+            loaded_at=time.time(),
+            frame=self.loader.frame,
+        )
+
+    def _add_precomputed_topics(self, snapshot):
+        """Usa os tópicos pré-calculados em ImpactosTopicos, se estiverem completos."""
+        with self.pool.connection() as conn:
+            totals = load_topic_totals(conn, self._topics_fingerprint, self.table)
+        if totals is None:
+            return
+        snapshot.precomputed_topics = True
+        if snapshot.accumulated.get('topicos') is None:
+            snapshot.accumulated['topicos'] = totals
+
+    def topic_assignments(self, rowids, topics):
+        """
+        Lê os tópicos pré-calculados de um conjunto de respostas.
+
+        Args:
+            rowids: Rowids das respostas
+            topics: Tópicos (colunas da tabela)
+
+        Returns:
+            DataFrame: Tabela no formato de simple_nlp.classify_responses, ou
+            None se os tópicos pré-calculados estiverem incompletos
+        """
+        if self._topics_fingerprint is None:
+            return None
+        with self.pool.connection() as conn:
+            return load_topic_table(conn, self._topics_fingerprint, rowids, topics, self.table)
+
+    def sync(self):
+        """
+        Atualiza os dados em memória se o banco tiver mudado.
+
+        Returns:
+            bool: True se os dados foram relidos
+        """
+        with self._lock:
+            signature = self._current_signature()
+            if signature == self._signature and self._snapshot is not None:
+                return False
+
+            self.version += 1
+            snapshot = self._load_from_aggregates() if self._use_aggregates else None
+            if snapshot is None:
+                snapshot = self._load_from_loader()
+            if self._topics_fingerprint is not None:
+                self._add_precomputed_topics(snapshot)
+
+            # A assinatura é a de antes da leitura: mudanças feitas durante a
+            # leitura serão vistas na próxima verificação
+            self._signature = signature
+            self._snapshot = snapshot
+            return True
+
+    def snapshot(self):
+        """
+        Retorna os dados atuais, lendo do banco apenas o que mudou.
+
+        Returns:
+            DataSnapshot: Versão, contagens, agregações e linhas dos dados
+        """
+        self.sync()
+        return self._snapshot
+
+
+# Instância compartilhada por todo o processo
+store = DataStore(DB_PATH)
@@ -0,0 +1,136 @@
+"""
+Conexões com o banco de dados do dashboard (base.sqlite).
+
+As leituras do dashboard usam conexões somente leitura (URI com mode=ro),
+reaproveitadas por um pool: cada thread pega uma conexão livre (ou abre uma
+nova), usa e devolve, sem abrir e fechar o arquivo a cada callback. As
+conexões são ajustadas para leitura (mmap, cache de páginas e tabelas
+temporárias em memória).
+
+Os scripts que escrevem no banco (ingestão, agregados, tópicos pré-calculados)
+usam connect_writer(), que coloca o banco em modo WAL. O modo WAL fica
+gravado no próprio arquivo, de modo que a ingestão pode escrever enquanto o
+dashboard continua lendo a versão anterior dos dados.
+
+Variáveis de ambiente:
+    DASHBOARD_DB: caminho do banco (padrão: base.sqlite ao lado deste arquivo)
+    SQLITE_MMAP_MB: tamanho do mapeamento em memória por conexão (padrão: 256)
+    SQLITE_CACHE_MB: cache de páginas por conexão (padrão: 64)
+    SQLITE_POOL_SIZE: conexões livres mantidas pelo pool (padrão: 8)
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+# Caminho do banco de dados usado pelo dashboard
+DB_PATH = os.environ.get(
+    'DASHBOARD_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'base.sqlite')
+)
+
+MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_MB', '256')) * 1024 * 1024
+CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_MB', '64')) * 1024
+POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', '8'))
+
+# Tempo máximo de espera por um bloqueio de outra conexão (milissegundos)
+BUSY_TIMEOUT_MS = 5000
+
+
+def connect_readonly(path=DB_PATH):
+    """
+    Abre uma conexão somente leitura ajustada para as consultas do dashboard.
+
+    Args:
+        path: Caminho do banco
+
+    Returns:
+        sqlite3.Connection: Conexão (pode ser usada por outra thread)
+    """
+    uri = f"file:{quote(os.path.abspath(path))}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    # Valor negativo: tamanho em KB, e não em páginas
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    return conn
+
+
+def connect_writer(path=DB_PATH):
+    """
+    Abre uma conexão de escrita e coloca o banco em modo WAL.
+
+    Args:
+        path: Caminho do banco
+
+    Returns:
+        sqlite3.Connection: Conexão de escrita
+    """
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    return conn
+
+
+class ConnectionPool:
+    """
+    Pool de conexões somente leitura com um banco.
+
+    Uma conexão é usada por uma única thread de cada vez (ver connection()).
+    Se o arquivo do banco for substituído (outro inode), as conexões abertas
+    para o arquivo antigo são descartadas.
+
+    Args:
+        path: Caminho do banco
+        size: Quantidade máxima de conexões livres mantidas abertas
+    """
+
+    def __init__(self, path=DB_PATH, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = []
+        self._inode = None
+        self._lock = threading.Lock()
+
+    def _current_inode(self):
+        return os.stat(self.path).st_ino
+
+    @contextmanager
+    def connection(self):
+        """
+        Empresta uma conexão do pool enquanto o bloco with é executado.
+
+        Yields:
+            sqlite3.Connection: Conexão somente leitura
+        """
+        inode = self._current_inode()
+        with self._lock:
+            if inode != self._inode:
+                stale, self._idle = self._idle, []
+                self._inode = inode
+            else:
+                stale = []
+            conn = self._idle.pop() if self._idle else None
+        for old in stale:
+            old.close()
+        if conn is None:
+            conn = connect_readonly(self.path)
+
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                keep = inode == self._inode and len(self._idle) < self.size
+                if keep:
+                    self._idle.append(conn)
+            if not keep:
+                conn.close()
+
+    def close(self):
+        """Fecha todas as conexões livres."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
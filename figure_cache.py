@@ -0,0 +1,149 @@
+"""
+Cache das figuras do Plotly já construídas pelo dashboard.
+
+Construir uma figura (contagens + go.Bar/go.Pie + update_layout) custa muito
+mais do que devolver o JSON de uma figura pronta. Como as figuras só mudam
+quando os dados mudam, o FigureCache guarda o JSON serializado de cada
+figura, indexado por (identificador do gráfico, versão dos dados).
+
+A memória é limitada pelo tamanho total dos JSONs (política LRU). Opcionalmente
+as figuras também são gravadas em um diretório, o que permite reaproveitá-las
+entre reinícios e entre processos do servidor.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Limite padrão de memória do cache, em megabytes
+DEFAULT_MAX_MB = float(os.environ.get('FIGURE_CACHE_MB', '64'))
+
+# Diretório opcional para persistir as figuras
+DEFAULT_DIRECTORY = os.environ.get('FIGURE_CACHE_DIR') or None
+
+
+class FigureCache:
+    """
+    Cache LRU de figuras serializadas, limitado em bytes.
+
+    As figuras são devolvidas como dicionários (o formato aceito por
+    dcc.Graph) e devem ser tratadas como somente leitura.
+    """
+
+    def __init__(self, max_bytes=int(DEFAULT_MAX_MB * 1024 * 1024), directory=DEFAULT_DIRECTORY):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _disk_path(self, key):
+        name = hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{name}.json")
+
+    def get(self, chart_key, version):
+        """
+        Busca uma figura no cache (memória e, se configurado, disco).
+
+        Args:
+            chart_key: Identificador do gráfico
+            version: Versão dos dados usada para construir a figura
+
+        Returns:
+            dict: Figura serializada, ou None se não estiver no cache
+        """
+        key = (chart_key, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        if self.directory:
+            try:
+                with open(self._disk_path(key), encoding='utf-8') as f:
+                    serialized = f.read()
+            except FileNotFoundError:
+                pass
+            else:
+                figure = json.loads(serialized)
+                self._store(key, figure, len(serialized))
+                with self._lock:
+                    self.hits += 1
+                return figure
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, chart_key, version, figure):
+        """
+        Guarda uma figura no cache.
+
+        Args:
+            chart_key: Identificador do gráfico
+            version: Versão dos dados usada para construir a figura
+            figure: Figura do Plotly (go.Figure) ou dicionário equivalente
+
+        Returns:
+            dict: Figura serializada, como será devolvida por get()
+        """
+        serialized = figure.to_json() if hasattr(figure, 'to_json') else json.dumps(figure)
+        stored = json.loads(serialized)
+        key = (chart_key, version)
+        self._store(key, stored, len(serialized))
+
+        if self.directory:
+            # Escrita atômica: outros processos nunca leem um arquivo pela metade
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(serialized)
+            os.replace(tmp_path, self._disk_path(key))
+        return stored
+
+    def _store(self, key, figure, size):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            # Figuras maiores que o limite inteiro não ficam em memória
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (figure, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def get_or_build(self, chart_keys, version, build):
+        """
+        Busca um grupo de figuras construídas juntas, construindo-as se preciso.
+
+        Args:
+            chart_keys: Identificadores dos gráficos do grupo
+            version: Versão dos dados
+            build: Função sem argumentos que retorna um dicionário
+                identificador -> figura com todos os gráficos do grupo
+
+        Returns:
+            dict: Identificador -> figura serializada
+        """
+        figures = {key: self.get(key, version) for key in chart_keys}
+        if any(figure is None for figure in figures.values()):
+            built = build()
+            figures = {key: self.put(key, version, built[key]) for key in chart_keys}
+        return figures
+
+    def clear(self):
+        """Remove todas as figuras da memória."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
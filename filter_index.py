@@ -0,0 +1,227 @@
+"""
+Índice para a filtragem cruzada (cross-filtering) do dashboard.
+
+Ao clicar em uma barra ou fatia, os demais gráficos passam a mostrar apenas
+os respondentes com aquele valor. Para que isso continue rápido, cada coluna
+é convertida uma única vez em códigos inteiros (pd.factorize) e as máscaras
+booleanas de cada valor filtrado são guardadas. Aplicar N filtros é uma
+interseção de máscaras, e as contagens dos gráficos são np.bincount sobre os
+códigos das linhas selecionadas.
+
+Os filtros são um dicionário coluna -> lista de valores: valores da mesma
+coluna são combinados com OU, colunas diferentes com E. Cada gráfico ignora
+o filtro da sua própria coluna, de modo que ele continua mostrando todas as
+opções e outras podem ser adicionadas ao filtro.
+"""
+
+import json
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from ages import age_groups
+from schema import AGE_GROUP_COLUMN, BIRTH_DATE_COLUMN, COUNT_COLUMNS
+
+# Nome do filtro pelos tópicos identificados nas respostas "Impactos"
+TOPICS_FILTER = 'topicos'
+
+# Filtros sobre colunas derivadas pertencem ao gráfico da coluna de origem
+FILTER_SOURCES = {AGE_GROUP_COLUMN: BIRTH_DATE_COLUMN}
+
+
+def toggle_filter(filters, column, value):
+    """
+    Adiciona um valor ao filtro de uma coluna, ou o remove se já estiver lá.
+
+    Args:
+        filters: Filtros atuais (coluna -> lista de valores)
+        column: Coluna do valor clicado
+        value: Valor clicado
+
+    Returns:
+        dict: Novos filtros (o dicionário original não é alterado)
+    """
+    filters = {key: list(values) for key, values in (filters or {}).items()}
+    values = filters.setdefault(column, [])
+    if value in values:
+        values.remove(value)
+    else:
+        values.append(value)
+    return {key: values for key, values in filters.items() if values}
+
+
+def filters_key(filters):
+    """
+    Representação canônica dos filtros, usada como parte da chave de caches.
+
+    Args:
+        filters: Filtros (coluna -> lista de valores)
+
+    Returns:
+        str: JSON com colunas e valores ordenados
+    """
+    canonical = {column: sorted(map(str, values)) for column, values in (filters or {}).items() if values}
+    return json.dumps(canonical, sort_keys=True, ensure_ascii=False)
+
+
+class FilterIndex:
+    """
+    Códigos por coluna e máscaras por valor sobre as linhas de Planilha1.
+
+    Args:
+        frame: DataFrame com as respostas
+        columns: Colunas filtráveis e contáveis
+        today: Data de referência para as faixas etárias
+        topic_table: Função sem argumentos que retorna a tabela de tópicos por
+            resposta (ver simple_nlp.classify_responses), alinhada com frame.
+            Só é chamada quando os tópicos são usados.
+    """
+
+    def __init__(self, frame, columns=COUNT_COLUMNS, today=None, topic_table=None):
+        self.row_count = len(frame)
+        self.columns = list(columns)
+        self._codes = {}
+        self._categories = {}
+        self._lookup = {}
+        self._masks = {}
+        self._lock = threading.Lock()
+        self._topic_table_source = topic_table
+        self._topic_table = None
+
+        for column in self.columns:
+            self._add_column(column, frame[column])
+        if BIRTH_DATE_COLUMN in frame:
+            today = pd.Timestamp.now() if today is None else today
+            self._add_column(AGE_GROUP_COLUMN, age_groups(frame[BIRTH_DATE_COLUMN], today))
+
+    def _add_column(self, column, values):
+        # Colunas categóricas são fatoradas sobre os próprios códigos; os
+        # valores voltam a ser um índice comum para os gráficos
+        codes, categories = pd.factorize(values)
+        self._codes[column] = codes
+        self._categories[column] = pd.Index(np.asarray(categories, dtype=object))
+        self._lookup[column] = {value: code for code, value in enumerate(categories)}
+
+    @property
+    def topic_table(self):
+        """Tabela de tópicos por resposta (uint8), calculada no primeiro acesso."""
+        with self._lock:
+            if self._topic_table is None:
+                self._topic_table = self._topic_table_source()
+            return self._topic_table
+
+    def value_mask(self, column, value):
+        """
+        Máscara booleana das linhas com um valor em uma coluna.
+
+        Args:
+            column: Coluna (ou TOPICS_FILTER, para um tópico)
+            value: Valor da coluna (ou identificador do tópico)
+
+        Returns:
+            ndarray: Máscara com uma posição por linha
+        """
+        key = (column, value)
+        mask = self._masks.get(key)
+        if mask is None:
+            if column == TOPICS_FILTER:
+                table = self.topic_table
+                if value in table:
+                    mask = table[value].to_numpy() != 0
+                else:
+                    mask = np.zeros(self.row_count, dtype=bool)
+            else:
+                code = self._lookup[column].get(value)
+                if code is None:
+                    mask = np.zeros(self.row_count, dtype=bool)
+                else:
+                    mask = self._codes[column] == code
+            self._masks[key] = mask
+        return mask
+
+    def mask(self, filters, exclude=()):
+        """
+        Máscara das linhas que satisfazem os filtros.
+
+        Args:
+            filters: Filtros (coluna -> lista de valores)
+            exclude: Colunas cujos filtros devem ser ignorados
+
+        Returns:
+            ndarray: Máscara booleana com uma posição por linha
+        """
+        result = np.ones(self.row_count, dtype=bool)
+        for column, values in (filters or {}).items():
+            if column in exclude or not values:
+                continue
+            column_mask = np.zeros(self.row_count, dtype=bool)
+            for value in values:
+                column_mask |= self.value_mask(column, value)
+            result &= column_mask
+        return result
+
+    def _count(self, column, mask):
+        """Conta os valores de uma coluna nas linhas selecionadas, como count_values()."""
+        codes = self._codes[column][mask]
+        codes = codes[codes >= 0]
+        categories = self._categories[column]
+        totals = np.bincount(codes, minlength=len(categories))
+        # Empates mantêm a ordem da primeira aparição entre as linhas selecionadas
+        present = pd.unique(codes)
+        counts = pd.Series(totals[present], index=categories.take(present), dtype='int64')
+        return counts.sort_values(ascending=False, kind='stable')
+
+    def count_values(self, filters, columns=None):
+        """
+        Conta os valores de cada coluna nas linhas selecionadas pelos filtros.
+
+        Cada coluna ignora o filtro sobre ela mesma (e sobre as colunas
+        derivadas dela, ver FILTER_SOURCES).
+
+        Args:
+            filters: Filtros (coluna -> lista de valores)
+            columns: Colunas a contar (padrão: todas as colunas do índice)
+
+        Returns:
+            dict: Coluna -> Série com as contagens
+        """
+        filtered = [column for column, values in (filters or {}).items() if values]
+        masks = {}
+        counts = {}
+        for column in columns or self.columns:
+            exclude = frozenset(name for name in filtered if FILTER_SOURCES.get(name, name) == column)
+            if exclude not in masks:
+                masks[exclude] = self.mask(filters, exclude)
+            counts[column] = self._count(column, masks[exclude])
+        return counts
+
+
+# Índice dos dados atuais; é recriado quando os dados ou a data mudam
+_current_key = None
+_current_index = None
+_current_lock = threading.Lock()
+
+
+def get_filter_index(snapshot, topic_table=None):
+    """
+    Retorna o índice de filtragem dos dados de um snapshot do DataStore.
+
+    Args:
+        snapshot: DataSnapshot com os dados atuais
+        topic_table: Função (frame) -> tabela de tópicos por resposta
+
+    Returns:
+        FilterIndex: Índice (compartilhado enquanto os dados não mudarem)
+    """
+    global _current_key, _current_index
+
+    key = (snapshot.content_key, date.today())
+    with _current_lock:
+        if key != _current_key:
+            frame = snapshot.frame
+            source = (lambda: topic_table(frame)) if topic_table is not None else None
+            _current_index = FilterIndex(frame, topic_table=source)
+            _current_key = key
+        return _current_index
@@ -0,0 +1,31 @@
+"""
+Configuração do gunicorn para o dashboard (ver wsgi.py).
+
+Uso:
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+Variáveis de ambiente:
+    DASHBOARD_BIND: endereço e porta (padrão: 0.0.0.0:8050)
+    DASHBOARD_WORKERS: quantidade de processos (padrão: um por CPU)
+    DASHBOARD_THREADS: threads por processo (padrão: 4)
+    DASHBOARD_PRELOAD: com 0, cada worker carrega os dados e aquece o
+        próprio cache, em vez de herdá-los do processo principal (padrão: 1)
+    DASHBOARD_TIMEOUT: segundos sem resposta até um worker ser reiniciado
+        (padrão: 120; sem preload, inclui o aquecimento de cada worker)
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('DASHBOARD_BIND', '0.0.0.0:8050')
+
+# Os callbacks usam CPU (pandas e Plotly, com o GIL): um processo por CPU, e
+# threads para que as requisições leves (layout, health check, respostas do
+# cache) não esperem as que constroem figuras
+workers = int(os.environ.get('DASHBOARD_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('DASHBOARD_THREADS', '4'))
+worker_class = 'gthread'
+
+# Dados, PLN e figuras carregados uma vez no processo principal (ver wsgi.py)
+preload_app = os.environ.get('DASHBOARD_PRELOAD', '1') != '0'
+timeout = int(os.environ.get('DASHBOARD_TIMEOUT', '120'))
@@ -0,0 +1,332 @@
+"""
+Tópicos das respostas "Impactos" pré-calculados fora do dashboard.
+
+A classificação com o spaCy é a parte mais cara do dashboard. Este módulo a
+executa offline, em um pool de processos, e grava no próprio base.sqlite uma
+linha por par (resposta, tópico):
+
+    ImpactosTopicos(rowid_resposta, topico)
+    ImpactosTopicos_Progresso(chave, valor)
+
+rowid_resposta é o rowid da resposta em Planilha1. A tabela de progresso
+guarda o fingerprint da classificação (ver
+simple_nlp.classification_fingerprint) e o maior rowid já classificado, o que
+permite retomar uma execução interrompida e classificar apenas as respostas
+novas em execuções seguintes. Com a tabela completa, o dashboard obtém os
+totais por tópico com um GROUP BY, sem carregar o modelo de PLN.
+
+Uso:
+    python impact_topics.py [base.sqlite] [--workers N] [--chunk-size 2000]
+                            [--since-rowid N] [--full]
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from db import DB_PATH, connect_writer
+from schema import TABLE_NAME
+
+ASSIGNMENTS_TABLE = 'ImpactosTopicos'
+PROGRESS_TABLE = 'ImpactosTopicos_Progresso'
+
+# Quantidade de respostas por bloco enviado a um processo do pool
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def ensure_tables(conn):
+    """Cria as tabelas de tópicos e de progresso, se ainda não existirem."""
+    with conn:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {ASSIGNMENTS_TABLE} (
+                rowid_resposta INTEGER NOT NULL,
+                topico TEXT NOT NULL,
+                PRIMARY KEY (rowid_resposta, topico)
+            ) WITHOUT ROWID
+        """)
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{ASSIGNMENTS_TABLE}_topico "
+            f"ON {ASSIGNMENTS_TABLE} (topico, rowid_resposta)"
+        )
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {PROGRESS_TABLE} (chave TEXT PRIMARY KEY, valor TEXT)")
+
+
+def drop_tables(conn):
+    """Remove as tabelas de tópicos (por exemplo, quando Planilha1 é recriada)."""
+    with conn:
+        conn.execute(f"DROP TABLE IF EXISTS {ASSIGNMENTS_TABLE}")
+        conn.execute(f"DROP TABLE IF EXISTS {PROGRESS_TABLE}")
+
+
+def prune(conn, table=TABLE_NAME):
+    """
+    Remove as atribuições de respostas que não existem mais em Planilha1.
+
+    Usado quando linhas são substituídas (por exemplo, na ingestão com
+    --mode upsert): as respostas novas são classificadas na próxima execução.
+    """
+    progress = read_progress(conn)
+    if not progress:
+        return
+    with conn:
+        conn.execute(
+            f"DELETE FROM {ASSIGNMENTS_TABLE} WHERE rowid_resposta NOT IN (SELECT rowid FROM {table})"
+        )
+        linhas = conn.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE rowid <= ?", (int(progress['ultimo_rowid']),)
+        ).fetchone()[0]
+        _write_progress(conn, {'linhas': linhas})
+
+
+def read_progress(conn):
+    """
+    Lê o progresso da classificação.
+
+    Returns:
+        dict: Chaves 'fingerprint', 'ultimo_rowid' e 'linhas' (vazio se as
+        tabelas não existirem)
+    """
+    try:
+        return dict(conn.execute(f"SELECT chave, valor FROM {PROGRESS_TABLE}").fetchall())
+    except sqlite3.OperationalError:
+        return {}
+
+
+def _write_progress(conn, progress):
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {PROGRESS_TABLE} (chave, valor) VALUES (?, ?)",
+        [(key, str(value)) for key, value in progress.items()],
+    )
+
+
+def reset(conn, fingerprint):
+    """Apaga as atribuições existentes e recomeça a classificação do início."""
+    ensure_tables(conn)
+    with conn:
+        conn.execute(f"DELETE FROM {ASSIGNMENTS_TABLE}")
+        conn.execute(f"DELETE FROM {PROGRESS_TABLE}")
+        _write_progress(conn, {'fingerprint': fingerprint, 'ultimo_rowid': 0, 'linhas': 0})
+
+
+def write_chunk(conn, topic_table, fingerprint, table=TABLE_NAME):
+    """
+    Grava os tópicos de um bloco de respostas e avança o progresso.
+
+    O bloco deve conter todas as respostas do seu intervalo de rowids: as
+    atribuições anteriores desse intervalo são substituídas, na mesma
+    transação que atualiza o progresso. O progresso (maior rowid
+    classificado) só avança sobre intervalos contínuos de respostas.
+
+    Args:
+        conn: Conexão SQLite com permissão de escrita
+        topic_table: Tabela de classify_responses indexada pelo rowid
+        fingerprint: Fingerprint da classificação usada
+        table: Tabela com as respostas
+
+    Returns:
+        int: Quantidade de pares (resposta, tópico) gravados
+    """
+    if len(topic_table) == 0:
+        return 0
+
+    rows, columns = np.nonzero(topic_table.to_numpy())
+    rowids = topic_table.index.to_numpy()
+    pairs = list(zip(rowids[rows].tolist(), topic_table.columns[columns].tolist()))
+    first, last = int(rowids.min()), int(rowids.max())
+
+    with conn:
+        conn.execute(
+            f"DELETE FROM {ASSIGNMENTS_TABLE} WHERE rowid_resposta BETWEEN ? AND ?", (first, last)
+        )
+        conn.executemany(
+            f"INSERT INTO {ASSIGNMENTS_TABLE} (rowid_resposta, topico) VALUES (?, ?)", pairs
+        )
+        # O progresso só avança se não ficarem respostas sem classificar
+        # entre o último rowid processado e o bloco (ver --since-rowid)
+        done = int(read_progress(conn).get('ultimo_rowid', 0))
+        gap = conn.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE rowid > ? AND rowid < ?", (done, first)
+        ).fetchone()[0]
+        last = max(last, done) if gap == 0 else done
+        linhas = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE rowid <= ?", (last,)).fetchone()[0]
+        _write_progress(conn, {'fingerprint': fingerprint, 'ultimo_rowid': last, 'linhas': linhas})
+    return len(pairs)
+
+
+def is_complete(conn, fingerprint, table=TABLE_NAME):
+    """
+    Indica se todas as respostas atuais já foram classificadas com o fingerprint dado.
+
+    Args:
+        conn: Conexão SQLite
+        fingerprint: Fingerprint atual da classificação
+        table: Tabela com as respostas
+
+    Returns:
+        bool: True se as atribuições correspondem aos dados
+    """
+    progress = read_progress(conn)
+    if progress.get('fingerprint') != fingerprint:
+        return False
+    rows, max_rowid = conn.execute(f"SELECT COUNT(*), MAX(rowid) FROM {table}").fetchone()
+    # Linhas removidas ou a tabela recriada mudam a contagem até o último rowid
+    return int(progress['ultimo_rowid']) >= (max_rowid or 0) and progress.get('linhas') == str(rows)
+
+
+def load_topic_totals(conn, fingerprint, table=TABLE_NAME):
+    """
+    Calcula os totais por tópico com um GROUP BY sobre as atribuições.
+
+    Args:
+        conn: Conexão SQLite
+        fingerprint: Fingerprint atual da classificação
+        table: Tabela com as respostas
+
+    Returns:
+        DataFrame: Totais no formato de simple_nlp.topic_totals, ou None se
+        as atribuições estiverem incompletas ou desatualizadas
+    """
+    if not is_complete(conn, fingerprint, table):
+        return None
+
+    totals = pd.read_sql(
+        f"SELECT topico, COUNT(*) AS contagem, MIN(rowid_resposta) AS primeiro_rowid "
+        f"FROM {ASSIGNMENTS_TABLE} GROUP BY topico ORDER BY primeiro_rowid",
+        conn,
+        index_col='topico',
+    )
+    totals.index.name = None
+    # primeira_resposta é a posição da resposta (como em topic_totals), não o rowid
+    totals['primeira_resposta'] = [
+        conn.execute(f"SELECT COUNT(*) FROM {table} WHERE rowid < ?", (int(rowid),)).fetchone()[0]
+        for rowid in totals.pop('primeiro_rowid')
+    ]
+    return totals.astype('int64')
+
+
+def load_topic_table(conn, fingerprint, rowids, topics, table=TABLE_NAME):
+    """
+    Monta a tabela de tópicos por resposta a partir das atribuições.
+
+    Args:
+        conn: Conexão SQLite
+        fingerprint: Fingerprint atual da classificação
+        rowids: Rowids das respostas (índice da tabela resultante)
+        topics: Tópicos (colunas da tabela resultante)
+        table: Tabela com as respostas
+
+    Returns:
+        DataFrame: Tabela no formato de simple_nlp.classify_responses, ou None
+        se as atribuições estiverem incompletas ou desatualizadas
+    """
+    if not is_complete(conn, fingerprint, table):
+        return None
+
+    assignments = pd.read_sql(f"SELECT rowid_resposta, topico FROM {ASSIGNMENTS_TABLE}", conn)
+    index = pd.Index(rowids)
+    topics = list(topics)
+    rows = index.get_indexer(assignments['rowid_resposta'])
+    columns = pd.Index(topics).get_indexer(assignments['topico'])
+    known = (rows >= 0) & (columns >= 0)
+
+    values = np.zeros((len(index), len(topics)), dtype=np.uint8)
+    values[rows[known], columns[known]] = 1
+    return pd.DataFrame(values, index=index, columns=topics)
+
+
+def _read_chunks(conn, since_rowid, chunk_size, table=TABLE_NAME):
+    """Lê as respostas com rowid maior que since_rowid, em blocos ordenados pelo rowid."""
+    while True:
+        chunk = pd.read_sql(
+            f"SELECT rowid, Impactos FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            conn,
+            params=(since_rowid, chunk_size),
+            index_col='rowid',
+        )
+        if len(chunk) == 0:
+            return
+        since_rowid = int(chunk.index[-1])
+        yield chunk['Impactos']
+
+
+def precompute(conn, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, since_rowid=None, full=False,
+               table=TABLE_NAME):
+    """
+    Classifica as respostas ainda não processadas e grava seus tópicos.
+
+    Sem since_rowid, continua de onde a última execução parou. Se o
+    fingerprint da classificação tiver mudado (ou com full), tudo é
+    classificado de novo.
+
+    Args:
+        conn: Conexão SQLite com permissão de escrita
+        workers: Processos do pool (padrão: quantidade de CPUs)
+        chunk_size: Respostas por bloco
+        since_rowid: Reclassifica a partir deste rowid (exclusivo)
+        full: Se deve apagar as atribuições e recomeçar
+        table: Tabela com as respostas
+
+    Returns:
+        dict: Respostas e pares gravados, tempo e vazão
+    """
+    # Importado aqui para que a leitura das atribuições não dependa do spaCy
+    import simple_nlp
+
+    fingerprint = simple_nlp.classification_fingerprint()
+    ensure_tables(conn)
+    progress = read_progress(conn)
+    if full or progress.get('fingerprint') != fingerprint:
+        print("Classificando todas as respostas")
+        reset(conn, fingerprint)
+        progress = read_progress(conn)
+    if since_rowid is None:
+        since_rowid = int(progress['ultimo_rowid'])
+
+    workers = workers or os.cpu_count() or 1
+    pending = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE rowid > ?", (since_rowid,)).fetchone()[0]
+    print(f"{pending} respostas a partir do rowid {since_rowid}, {workers} processo(s)")
+
+    start = time.perf_counter()
+    responses = 0
+    pairs = 0
+    chunks = _read_chunks(conn, since_rowid, chunk_size, table)
+    for chunk, topic_table in simple_nlp.classify_chunks(chunks, workers=workers):
+        pairs += write_chunk(conn, topic_table, fingerprint, table)
+        responses += len(chunk)
+        elapsed = time.perf_counter() - start
+        print(f"  rowid {int(chunk.index[-1])}: {responses}/{pending} respostas "
+              f"({responses / elapsed:.0f} respostas/s)")
+
+    elapsed = time.perf_counter() - start
+    return {
+        'respostas': responses,
+        'pares': pairs,
+        'segundos': elapsed,
+        'respostas_por_segundo': responses / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('db', nargs='?', default=DB_PATH,
+                        help='Banco de dados do dashboard')
+    parser.add_argument('--workers', type=int, default=None, help='Processos do pool (padrão: CPUs)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Respostas por bloco')
+    parser.add_argument('--since-rowid', type=int, default=None,
+                        help='Classifica as respostas com rowid maior que este (padrão: continuar)')
+    parser.add_argument('--full', action='store_true', help='Apaga as atribuições e classifica tudo')
+    args = parser.parse_args()
+
+    conn = connect_writer(args.db)
+    try:
+        result = precompute(conn, workers=args.workers, chunk_size=args.chunk_size,
+                            since_rowid=args.since_rowid, full=args.full)
+    finally:
+        conn.close()
+
+    print(f"{result['respostas']} respostas classificadas ({result['pares']} tópicos) em "
+          f"{result['segundos']:.2f}s: {result['respostas_por_segundo']:.0f} respostas/s")
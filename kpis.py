@@ -0,0 +1,112 @@
+"""
+Indicadores (KPIs) exibidos nos cards do topo do dashboard.
+
+Todos os indicadores são calculados a partir das contagens por coluna do
+DataSnapshot (ver data_store.py), que já são mantidas a cada atualização dos
+dados: nenhum indicador percorre as respostas. O resultado é guardado por
+versão dos dados (content_key), de modo que exibir os KPIs custa uma
+consulta a um dicionário enquanto os dados não mudam.
+"""
+
+import threading
+
+# Valor exibido como resposta mais frequente quando não há respostas
+NO_ANSWER = '-'
+
+
+def percent(count, total, digits=None):
+    """
+    Porcentagem de um total, arredondada.
+
+    Args:
+        count: Quantidade
+        total: Total (0 resulta em 0%)
+        digits: Casas decimais (None arredonda para um inteiro)
+
+    Returns:
+        int ou float: Porcentagem
+    """
+    if not total:
+        return 0
+    return round(count / total * 100, digits)
+
+
+def most_frequent(counts):
+    """
+    Valor mais frequente de uma coluna.
+
+    Args:
+        counts: Série valor -> quantidade (ver data_store.count_values)
+
+    Returns:
+        tuple: (valor, quantidade); (NO_ANSWER, 0) se não houver respostas
+    """
+    if counts is None or len(counts) == 0:
+        return NO_ANSWER, 0
+    return counts.idxmax(), int(counts.max())
+
+
+def compute_kpis(counts, total_respondentes):
+    """
+    Calcula os indicadores exibidos nos cards do topo do dashboard.
+
+    Args:
+        counts: Dicionário coluna -> Série de contagens
+        total_respondentes: Quantidade de respostas
+
+    Returns:
+        dict: Nome do indicador -> valor
+    """
+    escala_6x1_count = int(counts['Escala6x1'].get('Sim', 0))
+
+    # Porcentagem de homens e mulheres entre os que responderam o sexo
+    sexo_counts = counts['Sexo']
+    total_sexo = int(sexo_counts.sum())
+    homens_count = int(sexo_counts.get('Masculino', 0))
+    mulheres_count = int(sexo_counts.get('Feminino', 0))
+
+    kpis = {
+        'total_respondentes': total_respondentes,
+        'escala_6x1_count': escala_6x1_count,
+        'escala_6x1_percent': percent(escala_6x1_count, total_respondentes, 1),
+        'homens_count': homens_count,
+        'mulheres_count': mulheres_count,
+        'homens_percent': percent(homens_count, total_sexo),
+        'mulheres_percent': percent(mulheres_count, total_sexo),
+    }
+
+    # Resposta mais frequente de cada pergunta de impacto
+    for prefix, column in [('familia', 'ImpactoVidaFamiliar'),
+                           ('fisica', 'ImpactoSaudeFisica'),
+                           ('mental', 'ImpactoSaudeMental')]:
+        value, count = most_frequent(counts[column])
+        kpis[f'{prefix}_resposta_frequente'] = value
+        kpis[f'{prefix}_resposta_count'] = count
+        kpis[f'{prefix}_resposta_percent'] = percent(count, total_respondentes)
+    return kpis
+
+
+# KPIs dos dados atuais; são recalculados quando os dados mudam
+_current_key = None
+_current_kpis = None
+_current_lock = threading.Lock()
+
+
+def get_kpis(snapshot):
+    """
+    Retorna os KPIs dos dados de um snapshot do DataStore.
+
+    Args:
+        snapshot: DataSnapshot com os dados atuais
+
+    Returns:
+        dict: Nome do indicador -> valor (compartilhado enquanto os dados não
+        mudarem; não deve ser alterado)
+    """
+    global _current_key, _current_kpis
+
+    with _current_lock:
+        if snapshot.content_key != _current_key:
+            _current_kpis = compute_kpis(snapshot.counts, snapshot.row_count)
+            _current_key = snapshot.content_key
+        return _current_kpis
@@ -0,0 +1,336 @@
+"""
+Medição do tempo dos callbacks do Dash, por etapa.
+
+Cada callback decorado com timed() tem a duração registrada, separada nas
+etapas marcadas com phase() durante a sua execução:
+
+    banco        leitura do SQLite (snapshot dos dados, consultas, tópicos
+                 pré-calculados)
+    agregacao    contagens dos respondentes filtrados (pandas ou SQL)
+    pln          classificação das respostas em tópicos
+    figuras      construção das figuras (ou leitura do cache de figuras)
+    outros       o restante do callback (montagem dos componentes)
+    serializacao conversão da resposta em JSON pelo Dash, medida entre o
+                 fim do callback e o fim da requisição (ver finish_request)
+
+As etapas podem ser aninhadas (por exemplo, a agregação dentro da construção
+das figuras): o tempo de cada uma exclui o das etapas internas, de modo que a
+soma das etapas é a duração total. Também é registrado o tamanho da resposta
+em bytes.
+
+Para cada callback e etapa são mantidas as últimas WINDOW medições, das
+quais saem os percentis p50, p95 e p99, além de totais acumulados. render()
+gera o texto no formato do Prometheus (exposto em /metrics pelo app.py), e
+cada chamada produz uma linha de log em JSON no logger 'dashboard.metrics'
+(nível INFO), que pode ser configurado ou desligado como qualquer logger.
+
+As medições são por processo. Com vários workers (ver gunicorn.conf.py),
+cada um mede só as próprias requisições, e /metrics responde com as séries
+do worker que atendeu a requisição, com o pid dele como rótulo: cada coleta
+vê cerca de 1/N do tráfego. Os contadores (_count, _sum e
+dashboard_callback_calls_total) devem ser somados entre os pids ao longo
+das coletas (por exemplo, sum without (pid) (rate(...)) no Prometheus); os
+percentis valem para cada worker e não podem ser somados.
+
+Variáveis de ambiente:
+    DASHBOARD_METRICS_WINDOW: medições mantidas por série (padrão: 1024)
+    DASHBOARD_METRICS_LOG: nível do logger 'dashboard.metrics' (padrão:
+        INFO); com 0, as linhas de log não são escritas
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import flask
+from dash.exceptions import PreventUpdate
+
+WINDOW = int(os.environ.get('DASHBOARD_METRICS_WINDOW', '1024'))
+
+# Uma linha de log em JSON por chamada de callback. Sem configuração própria
+# (por exemplo, logging.config), as linhas vão para a saída padrão
+logger = logging.getLogger('dashboard.metrics')
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.propagate = False
+_log_level = os.environ.get('DASHBOARD_METRICS_LOG') or 'INFO'
+if _log_level == '0':
+    logger.disabled = True
+elif logger.level == logging.NOTSET:
+    logger.setLevel('INFO' if _log_level == '1' else _log_level.upper())
+
+# Percentis expostos
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Etapa com o tempo não atribuído a nenhuma outra
+OTHER_PHASE = 'outros'
+SERIALIZATION_PHASE = 'serializacao'
+
+# Medição do callback em execução na thread (ou contexto) atual
+_current = contextvars.ContextVar('metrics_callback', default=None)
+
+
+class CallbackTiming:
+    """
+    Medição de uma chamada de callback.
+
+    Attributes:
+        callback: Nome do callback
+        status: 'ok', 'sem_atualizacao' (PreventUpdate) ou 'erro'
+        phases: Etapa -> segundos (sem o tempo das etapas internas)
+        duration: Duração total, em segundos (inclui a serialização)
+        response_bytes: Tamanho da resposta, se medido
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.status = 'ok'
+        self.phases = {}
+        self.duration = None
+        self.response_bytes = None
+        self._start = time.perf_counter()
+        self._end = None
+        self._stack = []
+
+    def enter(self):
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def leave(self, name):
+        start, inner = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed - inner
+        if self._stack:
+            self._stack[-1][1] += elapsed
+
+    def finish_callback(self):
+        """Encerra a execução do callback; o tempo não atribuído vai para 'outros'."""
+        self._end = time.perf_counter()
+        self.duration = self._end - self._start
+        self.phases[OTHER_PHASE] = max(self.duration - sum(self.phases.values()), 0.0)
+
+    def finish_response(self, response_bytes):
+        """Registra a serialização da resposta (do fim do callback até agora)."""
+        serialization = time.perf_counter() - self._end
+        self.phases[SERIALIZATION_PHASE] = serialization
+        self.duration += serialization
+        self.response_bytes = response_bytes
+
+    def as_log(self):
+        """Linha de log estruturada (JSON)."""
+        return json.dumps({
+            'evento': 'callback',
+            'callback': self.callback,
+            'status': self.status,
+            'duracao_ms': round(self.duration * 1000, 2),
+            'fases_ms': {name: round(seconds * 1000, 2) for name, seconds in self.phases.items()},
+            'bytes': self.response_bytes,
+            'pid': os.getpid(),
+        }, ensure_ascii=False)
+
+
+class RollingSeries:
+    """Últimas medições de uma série (para os percentis) e totais acumulados."""
+
+    def __init__(self, window=WINDOW):
+        self.values = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.values.append(value)
+        self.count += 1
+        self.total += value
+
+    def quantiles(self):
+        """Percentis de QUANTILES das medições na janela (interpolação linear)."""
+        ordered = sorted(self.values)
+        result = {}
+        for quantile in QUANTILES:
+            position = quantile * (len(ordered) - 1)
+            lower = int(position)
+            upper = min(lower + 1, len(ordered) - 1)
+            result[quantile] = ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+        return result
+
+
+class Registry:
+    """Medições de todos os callbacks do processo."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._phases = {}
+        self._sizes = {}
+        self._calls = {}
+
+    def _series(self, table, key):
+        series = table.get(key)
+        if series is None:
+            series = table[key] = RollingSeries(self.window)
+        return series
+
+    def observe(self, timing):
+        """Registra uma chamada; as interrompidas por PreventUpdate só entram na contagem."""
+        with self._lock:
+            key = (timing.callback, timing.status)
+            self._calls[key] = self._calls.get(key, 0) + 1
+            if timing.status == 'sem_atualizacao':
+                return
+            self._series(self._durations, timing.callback).add(timing.duration)
+            for name, seconds in timing.phases.items():
+                self._series(self._phases, (timing.callback, name)).add(seconds)
+            if timing.response_bytes is not None:
+                self._series(self._sizes, timing.callback).add(timing.response_bytes)
+
+    def render(self, extra=()):
+        """
+        Texto no formato de exposição do Prometheus (versão 0.0.4).
+
+        Args:
+            extra: Linhas adicionais (métricas de outros componentes), já formatadas
+
+        Returns:
+            str: Métricas
+        """
+        pid = os.getpid()
+        lines = []
+
+        def summary(name, help_text, table, labels):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} summary')
+            for key, series in sorted(table.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                label_text = ','.join(f'{label}="{_escape(value)}"' for label, value in zip(labels, key))
+                label_text = f'{label_text},pid="{pid}"'
+                for quantile, value in series.quantiles().items():
+                    lines.append(f'{name}{{{label_text},quantile="{quantile}"}} {value:.6g}')
+                lines.append(f'{name}_sum{{{label_text}}} {series.total:.6g}')
+                lines.append(f'{name}_count{{{label_text}}} {series.count}')
+
+        with self._lock:
+            summary('dashboard_callback_seconds',
+                    f'Duração dos callbacks do Dash (percentis das últimas {self.window} chamadas)',
+                    self._durations, ('callback',))
+            summary('dashboard_callback_phase_seconds',
+                    'Duração de cada etapa dos callbacks (banco, agregacao, pln, figuras, outros, serializacao)',
+                    self._phases, ('callback', 'fase'))
+            summary('dashboard_callback_response_bytes',
+                    'Tamanho das respostas dos callbacks, em bytes',
+                    self._sizes, ('callback',))
+            lines.append('# HELP dashboard_callback_calls_total Chamadas dos callbacks, por resultado')
+            lines.append('# TYPE dashboard_callback_calls_total counter')
+            for (callback, status), count in sorted(self._calls.items()):
+                lines.append(f'dashboard_callback_calls_total{{callback="{_escape(callback)}",'
+                             f'status="{status}",pid="{pid}"}} {count}')
+        lines.extend(extra)
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    """Escapa o valor de um rótulo do Prometheus."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def metric_lines(name, metric_type, help_text, value):
+    """
+    Linhas de uma métrica sem rótulos próprios, no formato de Registry.render().
+
+    Args:
+        name: Nome da métrica
+        metric_type: 'counter' ou 'gauge'
+        help_text: Descrição
+        value: Valor atual
+
+    Returns:
+        list: Linhas HELP, TYPE e o valor (com o pid do processo como rótulo)
+    """
+    return [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}', f'{name}{{pid="{os.getpid()}"}} {value}']
+
+
+# Registro compartilhado pelo processo
+registry = Registry()
+
+
+def _finish(timing):
+    registry.observe(timing)
+    if timing.status != 'sem_atualizacao' and logger.isEnabledFor(logging.INFO):
+        logger.info(timing.as_log())
+
+
+@contextmanager
+def phase(name):
+    """
+    Atribui o tempo do bloco with a uma etapa do callback em execução.
+
+    Fora de um callback decorado com timed(), não faz nada.
+
+    Args:
+        name: Nome da etapa (banco, agregacao, pln, figuras)
+    """
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    timing.enter()
+    try:
+        yield
+    finally:
+        timing.leave(name)
+
+
+def timed(func):
+    """
+    Decorador que mede as chamadas de um callback (ver CallbackTiming).
+
+    Dentro de uma requisição, a medição é concluída por finish_request(),
+    que acrescenta a serialização da resposta; fora dela (chamadas diretas,
+    como as de utils/benchmark.py), ao final da chamada.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        timing = CallbackTiming(func.__name__)
+        token = _current.set(timing)
+        try:
+            return func(*args, **kwargs)
+        except PreventUpdate:
+            timing.status = 'sem_atualizacao'
+            raise
+        except Exception:
+            timing.status = 'erro'
+            raise
+        finally:
+            _current.reset(token)
+            timing.finish_callback()
+            if flask.has_request_context():
+                flask.g.callback_timing = timing
+            else:
+                _finish(timing)
+
+    return wrapper
+
+
+def finish_request(response):
+    """
+    Conclui a medição do callback da requisição (registrar com after_request).
+
+    Args:
+        response: Resposta do Flask
+
+    Returns:
+        Response: A mesma resposta
+    """
+    timing = flask.g.pop('callback_timing', None)
+    if timing is not None:
+        timing.finish_response(response.calculate_content_length())
+        _finish(timing)
+    return response
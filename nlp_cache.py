@@ -0,0 +1,163 @@
+"""
+Cache persistente da classificação de tópicos das respostas "Impactos".
+
+As respostas da pesquisa não mudam depois de enviadas, então o resultado
+da classificação de cada texto é guardado em um arquivo SQLite separado
+(nlp_cache.sqlite). A chave é o hash do texto normalizado combinado com uma
+impressão digital (fingerprint) da configuração de NLP: dicionário de
+tópicos, stopwords e modelo do spaCy. Qualquer mudança nessa configuração
+gera um fingerprint novo, e as entradas antigas são descartadas ao abrir o
+cache.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+# Caminho padrão do arquivo de cache: ao lado deste arquivo, como o banco
+# (db.DB_PATH), qualquer que seja o diretório de onde o processo foi iniciado
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nlp_cache.sqlite')
+
+# Quantidade máxima de parâmetros por consulta (limite do SQLite)
+_MAX_QUERY_PARAMS = 500
+
+
+def normalize_text(text):
+    """
+    Normaliza o texto de uma resposta para compor a chave do cache.
+
+    A classificação trabalha sempre sobre o texto em minúsculas, então
+    respostas que diferem apenas em maiúsculas/minúsculas compartilham a
+    mesma entrada.
+
+    Args:
+        text: Texto da resposta
+
+    Returns:
+        str: Texto normalizado
+    """
+    return str(text).lower()
+
+
+def text_hash(text):
+    """
+    Calcula o hash do texto normalizado.
+
+    Args:
+        text: Texto da resposta
+
+    Returns:
+        str: Hash SHA-1 em hexadecimal
+    """
+    return hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def compute_fingerprint(topics, stop_words, model_name, model_version, extra=None):
+    """
+    Calcula a impressão digital da configuração de classificação.
+
+    Args:
+        topics: Dicionário de tópicos e palavras-chave
+        stop_words: Stopwords usadas no pré-processamento (a própria lista ou
+            uma identificação da sua origem)
+        model_name: Nome do modelo do spaCy
+        model_version: Versão do modelo do spaCy
+        extra: Informações adicionais que também invalidam o cache
+
+    Returns:
+        str: Hash SHA-256 em hexadecimal
+    """
+    payload = json.dumps({
+        'topics': list(topics.items()),
+        'stop_words': sorted(stop_words),
+        'model': [model_name, model_version],
+        'extra': extra,
+    }, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ClassificationCache:
+    """
+    Cache de classificações em SQLite, indexado por (fingerprint, hash do texto).
+
+    Os tópicos de cada resposta são guardados como uma lista de
+    identificadores separados por vírgula. A conexão é compartilhada entre as
+    threads do servidor e protegida por um lock.
+    """
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS TopicosCache (
+                fingerprint TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                topics TEXT NOT NULL,
+                PRIMARY KEY (fingerprint, text_hash)
+            ) WITHOUT ROWID
+        """)
+        # Entradas de configurações anteriores não serão mais consultadas
+        with self._conn:
+            self._conn.execute("DELETE FROM TopicosCache WHERE fingerprint != ?", (fingerprint,))
+
+    def get_many(self, keys):
+        """
+        Busca as classificações já conhecidas.
+
+        Args:
+            keys: Lista de hashes de texto
+
+        Returns:
+            dict: Hash -> lista de tópicos, apenas para as chaves encontradas
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _MAX_QUERY_PARAMS):
+                chunk = keys[start:start + _MAX_QUERY_PARAMS]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, topics FROM TopicosCache "
+                    f"WHERE fingerprint = ? AND text_hash IN ({placeholders})",
+                    [self.fingerprint, *chunk],
+                )
+                for key, topics in rows:
+                    found[key] = topics.split(',') if topics else []
+        return found
+
+    def put_many(self, items):
+        """
+        Grava novas classificações.
+
+        Args:
+            items: Iterável de pares (hash do texto, lista de tópicos)
+        """
+        rows = [(self.fingerprint, key, ','.join(topics)) for key, topics in items]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO TopicosCache (fingerprint, text_hash, topics) VALUES (?, ?, ?)",
+                rows,
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM TopicosCache WHERE fingerprint = ?", (self.fingerprint,)
+            ).fetchone()[0]
+
+    def clear(self):
+        """Remove todas as entradas do cache."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM TopicosCache")
+
+    def close(self):
+        """Fecha a conexão com o arquivo de cache."""
+        with self._lock:
+            self._conn.close()
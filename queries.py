@@ -0,0 +1,168 @@
+"""
+Contagens dos gráficos calculadas pelo próprio SQLite.
+
+Cada gráfico conta os valores de uma coluna. Em vez de carregar todas as
+linhas em memória e chamar value_counts(), as funções deste módulo executam
+um SELECT coluna, COUNT(*) ... GROUP BY coluna, com um WHERE montado a
+partir dos filtros do dashboard (ver filter_index.py para a semântica dos
+filtros). As colunas filtradas e agrupadas são indexadas na ingestão
+(utils/excel_to_sqlite.py), e a memória usada por consulta é proporcional à
+quantidade de valores distintos, e não de linhas.
+
+A faixa etária é calculada em SQL a partir de DataNascimento, com a mesma
+regra de ages.age_groups (dias completos / 365.25, truncado), e o filtro
+por tópico usa os tópicos pré-calculados em ImpactosTopicos (ver
+impact_topics.py).
+
+A ordem das contagens é a de data_store.count_values: contagem decrescente,
+com empates na ordem da primeira aparição (o menor rowid).
+"""
+
+from datetime import datetime
+
+import pandas as pd
+
+from ages import min_days
+from filter_index import FILTER_SOURCES, TOPICS_FILTER
+from impact_topics import ASSIGNMENTS_TABLE
+from schema import AGE_BINS, AGE_GROUP_COLUMN, AGE_LABELS, BIRTH_DATE_COLUMN, COUNT_COLUMNS, TABLE_NAME
+
+
+def _age_group_sql(today):
+    """
+    Expressão SQL da faixa etária de cada linha.
+
+    Cada limite das faixas (idade >= k) é convertido em um limite sobre o dia
+    juliano da data de nascimento, de modo que a expressão só compara números.
+
+    Returns:
+        tuple: (expressão, parâmetros)
+    """
+    now = pd.Timestamp(today).to_julian_date()
+    born = f'julianday("{BIRTH_DATE_COLUMN}")'
+
+    # Nascidos depois do limite da primeira faixa (idade negativa) ficam de fora
+    cases = [f'WHEN {born} > ? THEN NULL']
+    params = [now - min_days(AGE_BINS[0])]
+    for label, upper in zip(AGE_LABELS, AGE_BINS[1:]):
+        cases.append(f'WHEN {born} > ? THEN ?')
+        params += [now - min_days(upper), label]
+    return f"(CASE {' '.join(cases)} END)", params
+
+
+def _column_sql(column, today):
+    """Expressão SQL de uma coluna (real ou derivada) e seus parâmetros."""
+    if column == AGE_GROUP_COLUMN:
+        return _age_group_sql(today)
+    return f'"{column}"', []
+
+
+def where_clause(filters, exclude=(), today=None, table=TABLE_NAME):
+    """
+    Monta o WHERE correspondente aos filtros do dashboard.
+
+    Valores da mesma coluna são combinados com OU, colunas diferentes com E.
+
+    Args:
+        filters: Filtros (coluna -> lista de valores)
+        exclude: Colunas cujos filtros devem ser ignorados
+        today: Data de referência para as faixas etárias
+        table: Tabela com as respostas
+
+    Returns:
+        tuple: (cláusula WHERE, ou '' sem filtros, e seus parâmetros)
+    """
+    today = today or datetime.now()
+    conditions = []
+    params = []
+    for column, values in (filters or {}).items():
+        if column in exclude or not values:
+            continue
+        placeholders = ', '.join('?' for _ in values)
+        if column == TOPICS_FILTER:
+            conditions.append(
+                f'{table}.rowid IN (SELECT rowid_resposta FROM {ASSIGNMENTS_TABLE} '
+                f'WHERE topico IN ({placeholders}))'
+            )
+            params += list(values)
+            continue
+        expression, expression_params = _column_sql(column, today)
+        conditions.append(f'{expression} IN ({placeholders})')
+        params += expression_params + list(values)
+
+    if not conditions:
+        return '', []
+    return 'WHERE ' + ' AND '.join(conditions), params
+
+
+def _excluded_filters(filters, column):
+    """Filtros que o gráfico de uma coluna ignora: o da própria coluna e os derivados dela."""
+    source = FILTER_SOURCES.get(column, column)
+    return frozenset(name for name in (filters or {}) if FILTER_SOURCES.get(name, name) == source)
+
+
+def count_column(conn, column, filters=None, today=None, table=TABLE_NAME):
+    """
+    Conta os valores de uma coluna nas linhas selecionadas pelos filtros.
+
+    O filtro da própria coluna é ignorado, como em FilterIndex.count_values.
+
+    Args:
+        conn: Conexão SQLite
+        column: Coluna (ou AGE_GROUP_COLUMN)
+        filters: Filtros (coluna -> lista de valores)
+        today: Data de referência para as faixas etárias
+        table: Tabela com as respostas
+
+    Returns:
+        Series: Contagens no formato de data_store.count_values
+    """
+    today = today or datetime.now()
+    expression, params = _column_sql(column, today)
+    where, where_params = where_clause(filters, _excluded_filters(filters, column), today, table)
+    rows = conn.execute(
+        f"SELECT valor, contagem FROM ("
+        f"  SELECT {expression} AS valor, COUNT(*) AS contagem, MIN(rowid) AS primeira_linha"
+        f"  FROM {table} {where} GROUP BY valor"
+        f") WHERE valor IS NOT NULL ORDER BY contagem DESC, primeira_linha",
+        params + where_params,
+    ).fetchall()
+    return pd.Series([count for _, count in rows], index=[value for value, _ in rows], dtype='int64')
+
+
+def count_columns(conn, filters=None, columns=COUNT_COLUMNS, today=None, table=TABLE_NAME):
+    """
+    Conta os valores de várias colunas (ver count_column).
+
+    Returns:
+        dict: Coluna -> Série com as contagens
+    """
+    today = today or datetime.now()
+    return {column: count_column(conn, column, filters, today, table) for column in columns}
+
+
+def topic_totals(conn, filters=None, today=None, table=TABLE_NAME):
+    """
+    Totais por tópico das respostas selecionadas pelos filtros.
+
+    Requer os tópicos pré-calculados completos (ver
+    impact_topics.is_complete). O filtro por tópico é ignorado, como nos
+    demais gráficos.
+
+    Returns:
+        DataFrame: Totais no formato de simple_nlp.topic_totals
+    """
+    where, params = where_clause(filters, (TOPICS_FILTER,), today, table)
+    # primeira_resposta é a posição da resposta entre as selecionadas
+    totals = pd.read_sql(
+        f"SELECT t.topico, COUNT(*) AS contagem, MIN(p.posicao) AS primeira_resposta "
+        f"FROM {ASSIGNMENTS_TABLE} t JOIN ("
+        f"  SELECT rowid, ROW_NUMBER() OVER (ORDER BY rowid) - 1 AS posicao FROM {table} {where}"
+        f") p ON p.rowid = t.rowid_resposta "
+        f"GROUP BY t.topico ORDER BY primeira_resposta",
+        conn,
+        params=params,
+        index_col='topico',
+    )
+    totals.index.name = None
+    return totals.astype('int64')
@@ -0,0 +1,165 @@
+"""
+Atualização dos dados e das figuras em segundo plano.
+
+Sem o atualizador, cada callback chama store.snapshot(): quando o banco
+mudou, o usuário que clicou espera a leitura das linhas novas, a
+classificação dos tópicos e a construção das figuras. O BackgroundRefresher
+faz esse trabalho em uma thread própria: a cada intervalo ele verifica o
+banco (ver DataStore.sync), e, se algo mudou, atualiza as contagens e os
+tópicos, constrói as figuras sem filtros de todas as abas e só então publica
+o novo snapshot. Os callbacks leem apenas o snapshot publicado, que já tem as
+figuras no cache; a troca é a atribuição de uma única referência, de modo que
+cada callback vê os dados antigos ou os novos, nunca uma mistura.
+
+Variáveis de ambiente:
+    DASHBOARD_REFRESH_SECONDS: intervalo entre as verificações (padrão: 30).
+        Com 0, a thread não é iniciada e cada callback verifica o banco, como
+        antes.
+"""
+
+import os
+import threading
+import time
+from datetime import date
+
+# Intervalo padrão entre as verificações do banco, em segundos
+DEFAULT_INTERVAL = float(os.environ.get('DASHBOARD_REFRESH_SECONDS', '30'))
+
+
+def data_version(snapshot, day=None):
+    """
+    Versão dos dados exibidos, enviada ao navegador para detectar mudanças.
+
+    Inclui a data, da qual dependem as faixas etárias.
+
+    Args:
+        snapshot: DataSnapshot
+        day: Data de referência (padrão: hoje)
+
+    Returns:
+        str: Versão (content_key do snapshot e data)
+    """
+    return f"{snapshot.content_key}:{(day or date.today()).isoformat()}"
+
+
+class BackgroundRefresher:
+    """
+    Thread que mantém atualizado o snapshot lido pelos callbacks.
+
+    Args:
+        store: DataStore com os dados
+        warm: Função (snapshot) -> None chamada com cada novo snapshot antes
+            de publicá-lo (constrói as figuras no cache)
+        interval: Segundos entre as verificações; com 0, nada é feito em
+            segundo plano e snapshot() consulta o DataStore diretamente
+    """
+
+    def __init__(self, store, warm=None, interval=DEFAULT_INTERVAL):
+        self.store = store
+        self.warm = warm
+        self.interval = interval
+        self.refresh_count = 0
+        self.last_refresh_s = None
+        self._published = None
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._cycles = threading.Condition()
+        self._started = 0
+        self._finished = 0
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    @property
+    def running(self):
+        """Indica se a thread de atualização foi iniciada."""
+        return self._thread is not None
+
+    def start(self):
+        """Inicia (uma única vez) a thread de atualização, se o intervalo for positivo."""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='data-refresher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cycles:
+                self._started += 1
+            try:
+                self.refresh()
+            except Exception as error:
+                # Uma falha (por exemplo, banco sendo substituído) não
+                # interrompe a thread; o snapshot publicado continua valendo
+                print(f"Falha na atualização em segundo plano: {error}")
+            with self._cycles:
+                self._finished += 1
+                self._cycles.notify_all()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def refresh(self):
+        """
+        Verifica o banco e, se os dados ou a data mudaram, prepara e publica o novo snapshot.
+
+        Returns:
+            bool: True se um novo snapshot foi publicado
+        """
+        with self._refresh_lock:
+            snapshot = self.store.snapshot()
+            today = date.today()
+            published = self._published
+            if published is not None and published[0] is snapshot and published[1] == today:
+                return False
+
+            start = time.perf_counter()
+            if self.warm is not None:
+                self.warm(snapshot)
+            self._published = (snapshot, today)
+            self.refresh_count += 1
+            self.last_refresh_s = time.perf_counter() - start
+            print(f"Dados atualizados em segundo plano: {snapshot.row_count} respondentes, "
+                  f"figuras prontas em {self.last_refresh_s:.2f}s")
+            return True
+
+    def request_refresh(self, timeout=None):
+        """
+        Pede uma verificação imediata do banco, sem esperar o próximo intervalo.
+
+        Args:
+            timeout: Segundos a esperar pela verificação (e pela publicação, se
+                algo mudou); None não espera
+
+        Returns:
+            bool: True se a verificação terminou dentro do tempo
+        """
+        if self._thread is None:
+            return False
+        with self._cycles:
+            # Um ciclo já em andamento pode ter verificado o banco antes do pedido
+            target = self._started + 1
+            self._wake.set()
+            if timeout is None:
+                return False
+            return self._cycles.wait_for(lambda: self._finished >= target, timeout)
+
+    def snapshot(self):
+        """
+        Retorna o último snapshot publicado, sem consultar o banco.
+
+        Returns:
+            DataSnapshot: Dados atuais (do DataStore, enquanto nenhum snapshot
+            tiver sido publicado ou se a thread não estiver em execução)
+        """
+        published = self._published
+        if published is None or self._thread is None:
+            return self.store.snapshot()
+        return published[0]
+
+    def version(self):
+        """Versão dos dados de snapshot() (ver data_version)."""
+        published = self._published
+        if published is None or self._thread is None:
+            return data_version(self.store.snapshot())
+        return data_version(*published)
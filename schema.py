@@ -0,0 +1,103 @@
+"""
+Definições da tabela de respostas da pesquisa (Planilha1).
+
+Centraliza os nomes da tabela e das colunas usados pelo carregamento dos
+dados, pelas agregações e pelo dashboard.
+"""
+
+# Tabela com as respostas da pesquisa
+TABLE_NAME = 'Planilha1'
+
+# Coluna de texto livre, analisada com PLN
+TEXT_COLUMN = 'Impactos'
+
+# Coluna com a data de nascimento dos respondentes
+BIRTH_DATE_COLUMN = 'DataNascimento'
+
+# Colunas cujas contagens são mantidas para os gráficos e KPIs
+COUNT_COLUMNS = [
+    'Escala6x1', 'TempoEscala6x1', 'ContratoTrabalho', 'HorasTrabalho',
+    'Occupation_Respostas', 'CnaeDivision_Respostas', 'EstadoTrabalho',
+    'DataNascimento', 'Sexo', 'CorRaca', 'EstadoCivil', 'TemFilhos',
+    'Rendimento', 'Escolaridade', 'ImpactoVidaFamiliar',
+    'ImpactoSaudeFisica', 'ImpactoSaudeMental',
+]
+
+# Coluna derivada com a faixa etária (calculada a partir de DataNascimento)
+AGE_GROUP_COLUMN = 'FaixaEtaria'
+
+# Faixas etárias de 10 em 10 anos até 60 anos; o último limite vai até 150
+# para capturar todas as idades
+AGE_BINS = [0, 20, 30, 40, 50, 60, 150]
+AGE_LABELS = [
+    'Até 19 anos',
+    'Entre 20 e 29 anos',
+    'Entre 30 e 39 anos',
+    'Entre 40 e 49 anos',
+    'Entre 50 e 59 anos',
+    'Acima de 60 anos'
+]
+
+# Ordem fixa das respostas das perguntas de escala, usada nos gráficos e
+# como ordem das categorias na representação em memória
+TEMPO_ORDER = [
+    'menos de um ano',
+    'entre um e dois anos',
+    'entre dois e três anos',
+    'entre três e quatro anos',
+    'entre quatro e cinco anos',
+    'mais de cinco anos'
+]
+
+HORAS_ORDER = [
+    'Menos de 6 horas',
+    '6 horas até menos de 7 horas',
+    '7 horas até menos de 8 horas',
+    '8 horas até menos de 9 horas',
+    '9 horas até menos de 10 horas',
+    '10 horas ou mais'
+]
+
+ESCOLARIDADE_ORDER = [
+    'Ensino Fundamental Incompleto',
+    'Ensino Fundamental Completo',
+    'Ensino Médio Incompleto',
+    'Ensino Médio Completo',
+    'Ensino Superior Incompleto',
+    'Ensino Superior Completo',
+    'Pós-Graduação Incompleto',
+    'Pós-Graduação'  # Mantido para compatibilidade com dados existentes
+]
+
+RENDIMENTO_ORDER = [
+    '1,00 A 500,00',
+    '501,00 A 1.000,00',
+    '1.001,00 A 2.000,00',
+    '2.001,00 A 3.000,00',
+    '3.001,00 A 5.000,00',
+    '5.001,00 A 10.000,00',
+    '10.001,00 OU MAIS'
+]
+
+IMPACTO_SAUDE_ORDER = [
+    'Discordo totalmente',
+    'Discordo',
+    'Nem concordo nem discordo',
+    'Concordo',
+    'Concordo totalmente'
+]
+
+# Colunas de múltipla escolha, mantidas em memória como pandas.Categorical
+# (todas exceto a data de nascimento e o texto livre de TEXT_COLUMN)
+CATEGORICAL_COLUMNS = ['Confirmacao'] + [column for column in COUNT_COLUMNS if column != BIRTH_DATE_COLUMN]
+
+# Ordem inicial das categorias; valores fora dessas listas (e os das demais
+# colunas) são acrescentados na ordem em que aparecem nos dados
+CATEGORY_ORDERS = {
+    'TempoEscala6x1': TEMPO_ORDER,
+    'HorasTrabalho': HORAS_ORDER,
+    'Escolaridade': ESCOLARIDADE_ORDER,
+    'Rendimento': RENDIMENTO_ORDER,
+    'ImpactoSaudeFisica': IMPACTO_SAUDE_ORDER,
+    'ImpactoSaudeMental': IMPACTO_SAUDE_ORDER,
+}
@@ -4,23 +4,22 @@ Este script implementa uma abordagem simples de PLN para analisar e agrupar
 semanticamente as respostas de texto livre da coluna "Impactos".
 """
 
+import os
 import sqlite3
 import pandas as pd
+import numpy as np
 import re
-import spacy
-from collections import Counter
-from nltk.corpus import stopwords
-import nltk
-
-# Garantir que os recursos do NLTK estejam disponíveis
-try:
-    stopwords.words('portuguese')
-except LookupError:
-    nltk.download('stopwords')
-    nltk.download('punkt')
-
-# Carregar o modelo em português do spaCy
-nlp = spacy.load('pt_core_news_sm')
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+from nlp_cache import ClassificationCache, DEFAULT_CACHE_PATH, compute_fingerprint, text_hash
+
+# Modelo em português do spaCy. O spaCy e o NLTK só são importados e
+# carregados no primeiro uso (ver get_nlp e start_background_load), para não
+# atrasar a inicialização de quem importa este módulo.
+MODEL_NAME = 'pt_core_news_sm'
 
 # Definir tópicos predefinidos que esperamos encontrar nas respostas
 predefined_topics = {
@@ -152,6 +151,306 @@ predefined_topics = {
     ]
 }
 
+class KeywordMatcher:
+    """
+    Autômato único que identifica todos os tópicos de uma resposta.
+
+    As palavras-chave são compiladas uma só vez em:
+      - um dicionário lema -> tópicos, para a comparação exata com os tokens;
+      - uma expressão regular em forma de trie, que encontra em uma única
+        passada sobre o texto a palavra-chave mais longa que começa em cada
+        posição. Cada palavra-chave carrega também os tópicos das
+        palavras-chave contidas nela, de modo que o resultado é o mesmo de
+        testar `keyword in text_lower` para cada palavra-chave.
+
+    Os tópicos são representados internamente como máscaras de bits, na
+    ordem de predefined_topics.
+    """
+
+    def __init__(self, topics):
+        self.topic_ids = list(topics)
+
+        # Máscara de bits dos tópicos de cada palavra-chave
+        keyword_masks = {}
+        for position, keywords in enumerate(topics.values()):
+            for keyword in keywords:
+                keyword_masks[keyword] = keyword_masks.get(keyword, 0) | (1 << position)
+        self.token_masks = keyword_masks
+
+        # Palavras-chave com maiúsculas nunca aparecem no texto em minúsculas,
+        # então só participam da comparação com os tokens
+        phrases = [keyword for keyword in keyword_masks if keyword == keyword.lower()]
+
+        # Encontrar uma palavra-chave implica encontrar todas as contidas nela
+        self.phrase_masks = {}
+        for phrase in phrases:
+            mask = 0
+            for other in phrases:
+                if other in phrase:
+                    mask |= keyword_masks[other]
+            self.phrase_masks[phrase] = mask
+
+        self.pattern = re.compile('(?=(' + self._trie_pattern(phrases) + '))')
+
+    @staticmethod
+    def _trie_pattern(words):
+        """
+        Monta uma expressão regular em forma de trie para as palavras dadas.
+
+        Os ramos de cada nó começam por caracteres distintos e os finais de
+        palavra são opcionais gulosos, então a regex casa sempre a palavra
+        mais longa possível a partir da posição atual.
+        """
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        def build(node):
+            is_end = '' in node
+            branches = [re.escape(char) + build(child)
+                        for char, child in sorted(node.items()) if char != '']
+            if not branches:
+                return ''
+            if len(branches) == 1 and not is_end:
+                return branches[0]
+            group = '(?:' + '|'.join(branches) + ')'
+            return group + '?' if is_end else group
+
+        return build(trie)
+
+    def match_mask(self, tokens, text_lower):
+        """
+        Retorna a máscara de bits dos tópicos presentes na resposta.
+
+        Args:
+            tokens: Lemas da resposta (ver preprocess_text)
+            text_lower: Texto original em minúsculas
+
+        Returns:
+            int: Máscara com um bit por tópico encontrado
+        """
+        mask = 0
+        token_masks = self.token_masks
+        for token in tokens:
+            mask |= token_masks.get(token, 0)
+
+        phrase_masks = self.phrase_masks
+        for found in self.pattern.finditer(text_lower):
+            mask |= phrase_masks[found.group(1)]
+
+        return mask
+
+    def match(self, tokens, text_lower):
+        """
+        Identifica os tópicos presentes em uma resposta já pré-processada.
+
+        Args:
+            tokens: Lemas da resposta (ver preprocess_text)
+            text_lower: Texto original em minúsculas
+
+        Returns:
+            dict: Dicionário com os tópicos encontrados e suas contagens
+        """
+        mask = self.match_mask(tokens, text_lower)
+        return {topic: 1 for position, topic in enumerate(self.topic_ids) if mask >> position & 1}
+
+# Autômato compilado a partir de predefined_topics
+keyword_matcher = KeywordMatcher(predefined_topics)
+
+# Nomes de exibição dos tópicos
+TOPIC_NAMES = {
+    'saude_mental': 'Saúde Mental',
+    'saude_fisica': 'Saúde Física',
+    'familia': 'Família',
+    'vida_social': 'Vida Social',
+    'autocuidado_e_lazer': 'Autocuidado e Lazer',
+    'jornada_e_carga_horaria': 'Jornada e Carga Horária',
+    'ambiente_de_trabalho': 'Ambiente de Trabalho',
+    'remuneracao_e_direitos': 'Remuneração e Direitos',
+    'tarefas_domesticas': 'Tarefas Domésticas',
+    'logistica_e_transportes': 'Logística e Transportes',
+    'alimentacao_e_sono': 'Alimentação e Sono',
+    'dificuldade_em_estudar': 'Dificuldade em Estudar',
+    'profissionalizacao': 'Profissionalização',
+    'desigualdade_de_genero': 'Desigualdade de Gênero',
+    'precarizacao_financeira': 'Precarização Financeira',
+    'acesso_a_servicos_publicos': 'Acesso a Serviços Públicos',
+    'criticas_a_escala_6x1': 'Críticas à Escala 6x1',
+    'grupos_vulneraveis': 'Grupos Vulneráveis'
+}
+
+# Componentes do pipeline que não participam da lematização e podem ser
+# desativados no processamento em lote (o lematizador só depende do
+# tok2vec, do morphologizer e do attribute_ruler)
+LEMMA_DISABLED_COMPONENTS = ['parser', 'ner']
+
+# Tamanho padrão dos lotes enviados ao nlp.pipe
+DEFAULT_BATCH_SIZE = 256
+
+# Partes por processo na classificação em paralelo (ver analyze_impacts)
+SHARDS_PER_WORKER = 4
+
+# Versão da lógica de classificação; deve ser incrementada sempre que o
+# pré-processamento, as stopwords ou a identificação de tópicos mudarem, para
+# invalidar o cache
+CLASSIFIER_VERSION = 2
+
+# Caminho do cache persistente de classificações
+CACHE_PATH = os.environ.get('NLP_CACHE_PATH', DEFAULT_CACHE_PATH)
+
+# Modelo do spaCy e conjunto de stopwords, carregados uma única vez
+_nlp = None
+_stop_words = None
+_load_lock = threading.Lock()
+
+# Thread de carregamento em segundo plano (ver start_background_load) e o
+# erro que interrompeu o carregamento, se houver (ver load_error)
+_loader_thread = None
+_loader_lock = threading.Lock()
+_load_error = None
+
+# Erros do carregamento do PLN: spaCy ou NLTK não instalados (ImportError),
+# stopwords do NLTK ausentes e sem download possível (LookupError) e modelo
+# do spaCy não instalado (OSError)
+LOAD_ERRORS = (ImportError, LookupError, OSError)
+
+# Cache de classificações, aberto na primeira utilização
+_classification_cache = None
+_cache_lock = threading.Lock()
+
+def get_stop_words():
+    """
+    Retorna o conjunto de stopwords em português, carregando-o na primeira chamada.
+
+    Returns:
+        set: Conjunto de stopwords
+    """
+    global _stop_words
+    with _load_lock:
+        if _stop_words is None:
+            import nltk
+            from nltk.corpus import stopwords
+
+            # Garantir que os recursos do NLTK estejam disponíveis
+            try:
+                stopwords.words('portuguese')
+            except LookupError:
+                nltk.download('stopwords')
+                nltk.download('punkt')
+            _stop_words = set(stopwords.words('portuguese'))
+    return _stop_words
+
+def get_nlp():
+    """
+    Retorna o modelo do spaCy, carregando-o na primeira chamada.
+
+    Returns:
+        Language: Modelo em português do spaCy
+    """
+    global _nlp
+    with _load_lock:
+        if _nlp is None:
+            import spacy
+            _nlp = spacy.load(MODEL_NAME)
+    return _nlp
+
+def is_ready():
+    """
+    Indica se o modelo do spaCy e as stopwords já foram carregados.
+
+    Returns:
+        bool: True se a classificação pode ser feita sem esperar o carregamento
+    """
+    return _nlp is not None and _stop_words is not None
+
+def load_error():
+    """
+    Retorna o erro que interrompeu o carregamento em segundo plano.
+
+    Returns:
+        Exception: Erro do carregamento (ver LOAD_ERRORS), ou None se o
+        carregamento não falhou (ou ainda não terminou)
+    """
+    return _load_error
+
+def start_background_load(on_ready=None):
+    """
+    Carrega o modelo do spaCy e as stopwords em uma thread em segundo plano.
+
+    Chamadas repetidas não iniciam novos carregamentos. Se o carregamento
+    falhar, o erro fica disponível em load_error() e on_ready não é chamado.
+
+    Args:
+        on_ready: Função sem argumentos chamada (na mesma thread) quando o
+            carregamento terminar
+    """
+    global _loader_thread
+
+    def load():
+        global _load_error
+        start = time.perf_counter()
+        try:
+            get_stop_words()
+            get_nlp()
+        except LOAD_ERRORS as error:
+            _load_error = error
+            print(f"Erro ao carregar o modelo de PLN: {error!r}")
+            return
+        print(f"Modelo de PLN carregado em {time.perf_counter() - start:.2f}s")
+        if on_ready is not None:
+            on_ready()
+
+    with _loader_lock:
+        if _loader_thread is None:
+            _loader_thread = threading.Thread(target=load, name='nlp-loader', daemon=True)
+            _loader_thread.start()
+
+def wait_background_load(timeout=None):
+    """
+    Espera o carregamento iniciado por start_background_load (e o on_ready) terminar.
+
+    Args:
+        timeout: Segundos a esperar (None espera o quanto for necessário)
+
+    Returns:
+        bool: True se o modelo de PLN estiver carregado
+    """
+    thread = _loader_thread
+    if thread is not None:
+        thread.join(timeout)
+    return is_ready()
+
+def clean_text(text):
+    """
+    Converte o texto para minúsculas e remove caracteres especiais.
+
+    Args:
+        text: Texto a ser limpo
+
+    Returns:
+        str: Texto limpo, pronto para o spaCy
+    """
+    return re.sub(r'[^\w\s]', ' ', str(text).lower())
+
+def tokens_from_doc(doc):
+    """
+    Extrai os lemas relevantes de um documento processado pelo spaCy.
+
+    Args:
+        doc: Documento do spaCy
+
+    Returns:
+        list: Lista de lemas sem stopwords, pontuação e palavras curtas
+    """
+    stop_words = get_stop_words()
+    return [token.lemma_ for token in doc
+            if token.text.lower() not in stop_words
+            and not token.is_punct
+            and len(token.text) > 2]
+
 def preprocess_text(text):
     """
     Pré-processa o texto para análise.
@@ -165,20 +464,21 @@ def preprocess_text(text):
     if pd.isna(text) or text == '':
         return []
 
-    # Converter para minúsculas e remover caracteres especiais
-    text = re.sub(r'[^\w\s]', ' ', str(text).lower())
+    # Processar com spaCy e remover stopwords e lematizar
+    return tokens_from_doc(get_nlp()(clean_text(text)))
 
-    # Processar com spaCy
-    doc = nlp(text)
+def match_topics(tokens, text_lower):
+    """
+    Identifica os tópicos presentes em uma resposta já pré-processada.
 
-    # Remover stopwords e lematizar
-    stop_words = set(stopwords.words('portuguese'))
-    tokens = [token.lemma_ for token in doc
-              if token.text.lower() not in stop_words
-              and not token.is_punct
-              and len(token.text) > 2]
+    Args:
+        tokens: Lemas da resposta (ver preprocess_text)
+        text_lower: Texto original em minúsculas
 
-    return tokens
+    Returns:
+        dict: Dicionário com os tópicos encontrados e suas contagens
+    """
+    return keyword_matcher.match(tokens, text_lower)
 
 def classify_response(text):
     """
@@ -193,94 +493,336 @@ def classify_response(text):
     if pd.isna(text) or text == '':
         return {}
 
-    # Pré-processar o texto
-    tokens = preprocess_text(text)
-    text_lower = text.lower()
+    return match_topics(preprocess_text(text), str(text).lower())
 
-    # Verificar cada tópico
-    found_topics = {}
+def classification_fingerprint():
+    """
+    Calcula a impressão digital da configuração atual de classificação.
 
-    for topic, keywords in predefined_topics.items():
-        # Verificar se alguma palavra-chave está presente nos tokens
-        if any(token in keywords for token in tokens):
-            found_topics[topic] = 1
-            continue
+    Qualquer resultado de classificação guardado (cache, agregados) só é
+    válido para o mesmo fingerprint. As versões vêm dos metadados dos
+    pacotes instalados, sem carregar o modelo nem as stopwords; as stopwords
+    entram pela origem e pela versão do NLTK.
 
-        # Verificar se alguma palavra-chave está presente no texto original
-        # (para capturar frases compostas)
-        if any(keyword in text_lower for keyword in keywords):
-            found_topics[topic] = 1
+    Returns:
+        str: Hash da configuração (tópicos, stopwords, modelo e versões)
+    """
+    return compute_fingerprint(
+        predefined_topics,
+        ['nltk:portuguese'],
+        MODEL_NAME,
+        _package_version(MODEL_NAME),
+        extra={
+            'classifier': CLASSIFIER_VERSION,
+            'spacy': _package_version('spacy'),
+            'nltk': _package_version('nltk'),
+        },
+    )
+
+def _package_version(name):
+    """Versão instalada de um pacote, ou None se ele não estiver instalado."""
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+def get_classification_cache():
+    """
+    Retorna o cache persistente de classificações, abrindo-o na primeira chamada.
 
-    return found_topics
+    Returns:
+        ClassificationCache: Cache associado à configuração atual de NLP
+    """
+    global _classification_cache
+    with _cache_lock:
+        if _classification_cache is None:
+            _classification_cache = ClassificationCache(CACHE_PATH, classification_fingerprint())
+    return _classification_cache
 
-def analyze_impacts(df):
+def close_classification_cache():
     """
-    Analisa as respostas da coluna "Impactos" e retorna a contagem de tópicos.
+    Fecha o cache de classificações; a próxima chamada a get_classification_cache() o reabre.
+
+    Usado antes de criar processos com fork (ver wsgi.py): uma conexão SQLite
+    não deve ser compartilhada entre processos.
+    """
+    global _classification_cache
+    with _cache_lock:
+        if _classification_cache is not None:
+            _classification_cache.close()
+            _classification_cache = None
+
+def _lemmatize_and_match(texts, batch_size, n_process):
+    """
+    Executa o spaCy em lote e retorna a máscara de tópicos de cada texto.
 
     Args:
-        df: DataFrame com a coluna 'Impactos'
+        texts: Lista de textos não vazios
+        batch_size: Quantidade de textos por lote enviado ao spaCy
+        n_process: Número de processos usados pelo nlp.pipe
 
     Returns:
-        dict: Dicionário com os tópicos e suas contagens
+        list: Máscara de bits dos tópicos de cada texto (ver KeywordMatcher)
     """
-    # Filtrar apenas as respostas não vazias
-    df_impacts = df[df['Impactos'].notna() & (df['Impactos'] != '')]
+    nlp = get_nlp()
+    disabled = [name for name in LEMMA_DISABLED_COMPONENTS if name in nlp.pipe_names]
+    docs = nlp.pipe(
+        (clean_text(text) for text in texts),
+        batch_size=batch_size,
+        n_process=n_process,
+        disable=disabled,
+    )
+    return [keyword_matcher.match_mask(tokens_from_doc(doc), str(text).lower())
+            for text, doc in zip(texts, docs)]
+
+def classify_responses(texts, batch_size=DEFAULT_BATCH_SIZE, n_process=1, use_cache=True):
+    """
+    Classifica um conjunto de respostas em lote usando nlp.pipe.
 
-    # Se não houver respostas, retornar um dicionário vazio
-    if len(df_impacts) == 0:
-        return {}
+    Apenas os componentes necessários para a lematização são executados
+    (ver LEMMA_DISABLED_COMPONENTS). Com use_cache, respostas já
+    classificadas anteriormente são lidas do cache persistente e apenas as
+    novas passam pelo spaCy.
+
+    Args:
+        texts: Série (ou lista) com os textos das respostas
+        batch_size: Quantidade de textos por lote enviado ao spaCy
+        n_process: Número de processos usados pelo nlp.pipe
+        use_cache: Se deve consultar e alimentar o cache de classificações
+
+    Returns:
+        DataFrame: Uma linha por resposta (mesmo índice de texts) e uma
+        coluna por tópico, com 1 quando o tópico foi encontrado e 0 caso contrário
+    """
+    texts = pd.Series(texts, dtype=object)
+    topic_columns = list(predefined_topics)
+    topic_positions = {topic: i for i, topic in enumerate(topic_columns)}
+
+    # Respostas vazias não passam pelo spaCy e ficam com a linha zerada
+    valid = (texts.notna() & (texts != '')).to_numpy()
+    rows = np.flatnonzero(valid)
+    valid_texts = texts.iloc[rows].tolist()
+
+    # Máscara de tópicos por texto normalizado (respostas repetidas são classificadas uma vez)
+    keys = [text_hash(text) for text in valid_texts]
+    masks_by_key = {}
+    if use_cache:
+        cache = get_classification_cache()
+        for key, topics in cache.get_many(keys).items():
+            masks_by_key[key] = sum(1 << topic_positions[topic] for topic in topics)
+
+    pending = {}
+    for key, text in zip(keys, valid_texts):
+        if key not in masks_by_key:
+            pending.setdefault(key, text)
+
+    if pending:
+        new_masks = _lemmatize_and_match(list(pending.values()), batch_size, n_process)
+        masks_by_key.update(zip(pending, new_masks))
+        if use_cache:
+            cache.put_many(
+                (key, [topic for position, topic in enumerate(topic_columns) if mask >> position & 1])
+                for key, mask in zip(pending, new_masks)
+            )
+
+    # Expandir as máscaras em uma coluna por tópico
+    masks = np.zeros(len(texts), dtype=np.int64)
+    masks[rows] = [masks_by_key[key] for key in keys]
+    table = ((masks[:, None] >> np.arange(len(topic_columns))) & 1).astype(np.uint8)
+
+    return pd.DataFrame(table, index=texts.index, columns=topic_columns)
+
+def _init_worker():
+    """Carrega o modelo e as stopwords uma única vez em cada processo do pool."""
+    get_stop_words()
+    get_nlp()
+
+def _classify_chunk(texts, batch_size):
+    """Classifica um bloco de respostas em um processo do pool."""
+    return classify_responses(texts, batch_size=batch_size, use_cache=False)
+
+def classify_chunks(chunks, workers=1, batch_size=DEFAULT_BATCH_SIZE, use_cache=True):
+    """
+    Classifica blocos de respostas, em paralelo, mantendo a ordem dos blocos.
+
+    Com mais de um processo, cada processo do pool carrega o próprio modelo e
+    o cache persistente não é usado (para evitar escritas concorrentes).
+    Apenas alguns blocos por processo ficam em andamento ao mesmo tempo, de
+    modo que chunks pode ser um gerador sobre uma tabela grande.
+
+    Args:
+        chunks: Iterável de Séries com os textos das respostas
+        workers: Número de processos (1 classifica no próprio processo)
+        batch_size: Quantidade de textos por lote enviado ao spaCy
+        use_cache: Se deve usar o cache de classificações (só com workers=1)
+
+    Yields:
+        tuple: (bloco, tabela de classify_responses do bloco)
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, classify_responses(chunk, batch_size=batch_size, use_cache=use_cache)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(_classify_chunk, chunk, batch_size)))
+            if len(pending) >= 2 * workers:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+
+def topic_totals(topic_table, offset=0):
+    """
+    Resume a tabela de classificação em totais por tópico.
+
+    Args:
+        topic_table: DataFrame retornado por classify_responses
+        offset: Posição da primeira linha de topic_table no conjunto completo
+            de respostas (usado ao combinar totais calculados por partes)
+
+    Returns:
+        DataFrame: Indexado pelo tópico, com as colunas 'contagem' e
+        'primeira_resposta' (posição da primeira resposta que cita o tópico)
+    """
+    values = topic_table.to_numpy()
+    if len(values) == 0:
+        return pd.DataFrame({'contagem': pd.Series(dtype='int64'),
+                             'primeira_resposta': pd.Series(dtype='int64')})
+
+    counts = values.sum(axis=0, dtype=np.int64)
+    first_seen = values.argmax(axis=0).astype(np.int64) + offset
+
+    # Apenas tópicos encontrados em pelo menos uma resposta
+    present = counts > 0
+    return pd.DataFrame(
+        {'contagem': counts[present], 'primeira_resposta': first_seen[present]},
+        index=topic_table.columns[present],
+    )
+
+def merge_topic_totals(current, new):
+    """
+    Combina dois resultados de topic_totals.
+
+    Args:
+        current: Totais já acumulados
+        new: Totais de um novo conjunto de respostas (com o offset correto)
 
-    # Classificar cada resposta
-    all_topics = {}
+    Returns:
+        DataFrame: Totais combinados
+    """
+    combined = pd.concat([current, new])
+    return combined.groupby(level=0, sort=False).agg({'contagem': 'sum', 'primeira_resposta': 'min'})
+
+def format_topic_totals(totals):
+    """
+    Ordena e formata os totais por tópico para exibição.
 
-    for _, row in df_impacts.iterrows():
-        topics = classify_response(row['Impactos'])
-        for topic in topics:
-            all_topics[topic] = all_topics.get(topic, 0) + 1
+    A ordem do resultado é por contagem (decrescente); empates mantêm a ordem
+    em que cada tópico apareceu pela primeira vez nas respostas.
 
-    # Ordenar por contagem (decrescente)
-    sorted_topics = {k: v for k, v in sorted(all_topics.items(), key=lambda item: item[1], reverse=True)}
+    Args:
+        totals: DataFrame retornado por topic_totals ou merge_topic_totals
+
+    Returns:
+        dict: Dicionário com os nomes formatados dos tópicos e suas contagens
+    """
+    topic_positions = {topic: i for i, topic in enumerate(predefined_topics)}
+    order = sorted(
+        totals.index,
+        key=lambda topic: (-totals.at[topic, 'contagem'], totals.at[topic, 'primeira_resposta'],
+                           topic_positions.get(topic, len(topic_positions))),
+    )
 
     # Formatar os nomes dos tópicos para exibição
     formatted_topics = {}
-    topic_names = {
-        'saude_mental': 'Saúde Mental',
-        'saude_fisica': 'Saúde Física',
-        'familia': 'Família',
-        'vida_social': 'Vida Social',
-        'autocuidado_e_lazer': 'Autocuidado e Lazer',
-        'jornada_e_carga_horaria': 'Jornada e Carga Horária',
-        'ambiente_de_trabalho': 'Ambiente de Trabalho',
-        'remuneracao_e_direitos': 'Remuneração e Direitos',
-        'tarefas_domesticas': 'Tarefas Domésticas',
-        'logistica_e_transportes': 'Logística e Transportes',
-        'alimentacao_e_sono': 'Alimentação e Sono',
-        'dificuldade_em_estudar': 'Dificuldade em Estudar',
-        'profissionalizacao': 'Profissionalização',
-        'desigualdade_de_genero': 'Desigualdade de Gênero',
-        'precarizacao_financeira': 'Precarização Financeira',
-        'acesso_a_servicos_publicos': 'Acesso a Serviços Públicos',
-        'criticas_a_escala_6x1': 'Críticas à Escala 6x1',
-        'grupos_vulneraveis': 'Grupos Vulneráveis'
-    }
-
-    for topic, count in sorted_topics.items():
-        formatted_name = topic_names.get(topic, topic.replace('_', ' ').title())
-        formatted_topics[formatted_name] = count
+    for topic in order:
+        formatted_name = TOPIC_NAMES.get(topic, topic.replace('_', ' ').title())
+        formatted_topics[formatted_name] = int(totals.at[topic, 'contagem'])
 
     return formatted_topics
 
-def get_impact_data_for_graph(df):
+def summarize_topic_table(topic_table):
+    """
+    Converte a tabela de classificação em contagens por tópico formatadas.
+
+    Args:
+        topic_table: DataFrame retornado por classify_responses
+
+    Returns:
+        dict: Dicionário com os nomes formatados dos tópicos e suas contagens
+    """
+    return format_topic_totals(topic_totals(topic_table))
+
+def analyze_impacts(df, batch_size=DEFAULT_BATCH_SIZE, n_process=1, use_cache=True, workers=1):
+    """
+    Analisa as respostas da coluna "Impactos" e retorna a contagem de tópicos.
+
+    Com workers > 1, as respostas não vazias são divididas em partes
+    classificadas por um pool de processos (ver classify_chunks). Os totais
+    de cada parte são combinados na ordem das partes, o que dá exatamente o
+    mesmo resultado da classificação em um único processo.
+
+    Args:
+        df: DataFrame com a coluna 'Impactos'
+        batch_size: Quantidade de textos por lote enviado ao spaCy
+        n_process: Número de processos usados pelo nlp.pipe
+        use_cache: Se deve usar o cache persistente de classificações
+            (apenas com workers=1)
+        workers: Número de processos do pool
+
+    Returns:
+        dict: Dicionário com os tópicos e suas contagens
+    """
+    # Filtrar apenas as respostas não vazias
+    df_impacts = df[df['Impactos'].notna() & (df['Impactos'] != '')]
+
+    # Se não houver respostas, retornar um dicionário vazio
+    if len(df_impacts) == 0:
+        return {}
+
+    if workers <= 1:
+        # Classificar as respostas em lote
+        topic_table = classify_responses(df_impacts['Impactos'], batch_size=batch_size,
+                                         n_process=n_process, use_cache=use_cache)
+        return summarize_topic_table(topic_table)
+
+    # Algumas partes por processo, para equilibrar a carga entre eles
+    texts = df_impacts['Impactos']
+    shard_size = -(-len(texts) // (workers * SHARDS_PER_WORKER))
+    shards = (texts.iloc[start:start + shard_size] for start in range(0, len(texts), shard_size))
+
+    totals = None
+    offset = 0
+    for shard, topic_table in classify_chunks(shards, workers=workers, batch_size=batch_size):
+        partial = topic_totals(topic_table, offset)
+        totals = partial if totals is None else merge_topic_totals(totals, partial)
+        offset += len(shard)
+    return format_topic_totals(totals)
+
+def get_impact_data_for_graph(df, topic_table=None, totals=None):
     """
     Prepara os dados para o gráfico de barras.
 
     Args:
         df: DataFrame com a coluna 'Impactos'
+        topic_table: Tabela de classificação já calculada (ver
+            classify_responses). Se omitida, é calculada a partir de df.
+        totals: Totais por tópico já calculados (ver topic_totals). Têm
+            precedência sobre topic_table.
 
     Returns:
         tuple: (topics, counts) para criar o gráfico
     """
-    topic_counts = analyze_impacts(df)
+    if totals is not None:
+        topic_counts = format_topic_totals(totals)
+    elif topic_table is not None:
+        topic_counts = summarize_topic_table(topic_table)
+    else:
+        topic_counts = analyze_impacts(df)
 
     # Preparar listas para o gráfico
     topics = list(topic_counts.keys())
@@ -0,0 +1,277 @@
+"""
+Exportação do dashboard como um pacote HTML estático.
+
+A maior parte dos acessos só visualiza os números sem filtros, que são os
+mesmos para todos enquanto os dados não mudam. O pacote exportado (ver
+`python app.py --export DIR`) pode ser servido por qualquer servidor de
+arquivos ou CDN, sem Python a cada requisição; o Dash continua necessário
+apenas para a filtragem cruzada.
+
+O próprio layout do Dash (KPIs, abas, textos) é convertido em HTML: os
+componentes html.* viram as tags correspondentes, os componentes do
+dcc só aparecem quando há um conteúdo para eles (as abas), e os contêineres
+dos gráficos recebem as figuras já construídas, desenhadas pelo plotly.js.
+
+Estrutura do pacote:
+    index.html          Página com os KPIs, as abas e as figuras embutidas
+    plotly.min.js       Biblioteca do Plotly usada pela página
+    figuras/<id>.json   Cada figura em JSON (formato do Plotly)
+    manifest.json       Versão dos dados, data da exportação, tempo e tamanhos
+"""
+
+import json
+import os
+import re
+import tempfile
+import time
+from html import escape
+
+import plotly.io as pio
+from dash.development.base_component import Component
+from plotly.offline import get_plotlyjs
+
+# Propriedades de estilo numéricas que não recebem 'px' (como no React)
+UNITLESS_STYLES = {'opacity', 'zIndex', 'fontWeight', 'lineHeight', 'flex', 'flexGrow', 'flexShrink', 'order'}
+
+# Tags sem conteúdo nem tag de fechamento
+VOID_TAGS = {'hr', 'br', 'img', 'input'}
+
+# Troca de aba e desenho das figuras (cada aba é desenhada na primeira
+# vez em que é exibida, para que o plotly.js conheça o tamanho do gráfico)
+SCRIPT = """
+(function () {
+  var dados = JSON.parse(document.getElementById('figuras').textContent);
+  function desenhar(secao) {
+    secao.querySelectorAll('[data-figura]').forEach(function (div) {
+      if (div.dataset.desenhada) { return; }
+      var figura = dados.figuras[div.dataset.figura];
+      if (!figura.layout.template) { figura.layout.template = dados.modelo; }
+      Plotly.newPlot(div, figura.data, figura.layout, {displayModeBar: false, responsive: true});
+      div.dataset.desenhada = '1';
+    });
+  }
+  function mostrar(valor) {
+    document.querySelectorAll('[data-aba]').forEach(function (botao) {
+      var ativa = botao.dataset.aba === valor;
+      botao.style.cssText = ativa ? botao.dataset.estiloSelecionado : botao.dataset.estilo;
+    });
+    document.querySelectorAll('[data-conteudo-aba]').forEach(function (secao) {
+      var ativa = secao.dataset.conteudoAba === valor;
+      secao.style.display = ativa ? '' : 'none';
+      if (ativa) { desenhar(secao); }
+    });
+  }
+  document.querySelectorAll('[data-aba]').forEach(function (botao) {
+    botao.addEventListener('click', function () { mostrar(botao.dataset.aba); });
+  });
+  mostrar(document.body.dataset.abaInicial);
+})();
+"""
+
+
+def css(style):
+    """
+    Converte um dicionário de estilo do Dash (camelCase) em CSS.
+
+    Args:
+        style: Estilo, por exemplo {'marginTop': '10px'}
+
+    Returns:
+        str: Declarações CSS, por exemplo 'margin-top: 10px'
+    """
+    declarations = []
+    for name, value in (style or {}).items():
+        if isinstance(value, (int, float)) and value != 0 and name not in UNITLESS_STYLES:
+            value = f'{value}px'
+        property_name = re.sub('([A-Z])', r'-\1', name).lower()
+        declarations.append(f'{property_name}: {value}')
+    return '; '.join(declarations)
+
+
+def find_component(component, component_id):
+    """
+    Procura um componente pelo id em uma árvore de componentes do Dash.
+
+    Returns:
+        Component: Componente encontrado, ou None
+    """
+    if isinstance(component, (list, tuple)):
+        for child in component:
+            found = find_component(child, component_id)
+            if found is not None:
+                return found
+        return None
+    if not isinstance(component, Component):
+        return None
+    if getattr(component, 'id', None) == component_id:
+        return component
+    return find_component(getattr(component, 'children', None), component_id)
+
+
+def render_component(component, slots=None, skip=()):
+    """
+    Converte uma árvore de componentes do Dash em HTML.
+
+    Args:
+        component: Componente, lista de componentes, texto ou número
+        slots: id -> HTML já pronto. Para componentes html.*, substitui o
+            conteúdo do elemento; para os demais, o próprio elemento
+        skip: ids de componentes que não devem aparecer (botões etc.)
+
+    Returns:
+        str: HTML
+    """
+    slots = slots or {}
+    if component is None:
+        return ''
+    if isinstance(component, (list, tuple)):
+        return ''.join(render_component(child, slots, skip) for child in component)
+    if not isinstance(component, Component):
+        return escape(str(component))
+
+    props = component.to_plotly_json()['props']
+    component_id = props.get('id')
+    if component_id in skip:
+        return ''
+    if component._namespace != 'dash_html_components':
+        # Componentes interativos (dcc) só aparecem com um conteúdo estático
+        return slots.get(component_id, '')
+
+    tag = component._type.lower()
+    attributes = ''
+    if component_id is not None:
+        attributes += f' id="{escape(str(component_id))}"'
+    if props.get('className'):
+        attributes += f' class="{escape(props["className"])}"'
+    if props.get('style'):
+        attributes += f' style="{escape(css(props["style"]))}"'
+    if tag in VOID_TAGS:
+        return f'<{tag}{attributes}>'
+
+    if component_id in slots:
+        children = slots[component_id]
+    else:
+        children = render_component(props.get('children'), slots, skip)
+    return f'<{tag}{attributes}>{children}</{tag}>'
+
+
+def render_tabs(tabs, contents, slots=None, skip=()):
+    """
+    Converte um dcc.Tabs em botões de aba e nas seções com o conteúdo de cada aba.
+
+    Args:
+        tabs: Componente dcc.Tabs (com um dcc.Tab por aba)
+        contents: Valor da aba -> componentes do conteúdo da aba
+        slots, skip: Ver render_component
+
+    Returns:
+        tuple: (HTML dos botões, HTML das seções)
+    """
+    buttons = []
+    sections = []
+    for tab in tabs.children:
+        style = css(getattr(tab, 'style', None))
+        selected = css({**(getattr(tab, 'style', None) or {}), **(getattr(tab, 'selected_style', None) or {})})
+        buttons.append(
+            f'<button type="button" data-aba="{escape(tab.value)}" style="{escape(style)}" '
+            f'data-estilo="{escape(style)}" data-estilo-selecionado="{escape(selected)}">{escape(tab.label)}</button>'
+        )
+        sections.append(
+            f'<section data-conteudo-aba="{escape(tab.value)}">'
+            f'{render_component(contents[tab.value], slots, skip)}</section>'
+        )
+    return f'<nav style="display: flex">{"".join(buttons)}</nav>', ''.join(sections)
+
+
+def graph_placeholder(chart):
+    """Elemento onde a figura de um gráfico é desenhada pela página exportada."""
+    return f'<div data-figura="{escape(chart)}"></div>'
+
+
+def _write_file(path, content):
+    """Grava um arquivo de forma atômica (texto em UTF-8) e retorna o seu tamanho em bytes."""
+    data = content.encode('utf-8')
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # Legível pelo servidor de arquivos (mkstemp cria com permissão 0600)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return len(data)
+
+
+def write_bundle(directory, layout, figures, slots, title, version, initial_tab, skip=(), metadata=None):
+    """
+    Grava o pacote estático do dashboard.
+
+    Os arquivos são gravados de forma atômica, e index.html e manifest.json
+    por último: um servidor lendo o diretório durante a exportação nunca vê
+    uma página que aponta para figuras ainda não gravadas.
+
+    Args:
+        directory: Diretório de destino (criado se necessário)
+        layout: Layout do Dash (app.layout) com os contêineres dos gráficos
+        figures: Identificador do gráfico -> figura do Plotly
+        slots: id -> HTML dos contêineres e abas (ver render_component)
+        title: Título da página
+        version: Versão dos dados exportados (ver DataSnapshot.content_key)
+        initial_tab: Valor da aba exibida ao abrir a página
+        skip: ids de componentes que não devem aparecer (ver render_component)
+        metadata: Informações extras gravadas no manifest.json
+
+    Returns:
+        dict: Conteúdo do manifest.json (inclui os tamanhos dos arquivos)
+    """
+    start = time.perf_counter()
+    sizes = {'plotly.min.js': _write_file(os.path.join(directory, 'plotly.min.js'), get_plotlyjs())}
+
+    # Cada figura é gravada completa; na página, o modelo de estilo (template)
+    # comum a todas é embutido uma única vez
+    embedded = {'modelo': None, 'figuras': {}}
+    for chart, figure in figures.items():
+        text = pio.to_json(figure, validate=False)
+        sizes[f'figuras/{chart}.json'] = _write_file(os.path.join(directory, 'figuras', f'{chart}.json'), text)
+        figure_dict = json.loads(text)
+        template = figure_dict['layout'].get('template')
+        if embedded['modelo'] is None:
+            embedded['modelo'] = template
+        if template == embedded['modelo']:
+            del figure_dict['layout']['template']
+        embedded['figuras'][chart] = figure_dict
+
+    # '</' dentro do JSON encerraria a tag <script>
+    embedded = json.dumps(embedded, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    body = render_component(layout, slots, skip)
+    page = (
+        '<!DOCTYPE html>\n'
+        '<html lang="pt-BR">\n<head>\n'
+        '<meta charset="utf-8">\n'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">\n'
+        f'<meta name="versao-dados" content="{escape(version)}">\n'
+        f'<title>{escape(title)}</title>\n'
+        '<script src="plotly.min.js"></script>\n'
+        '</head>\n'
+        f'<body style="margin: 0" data-aba-inicial="{escape(initial_tab)}">\n{body}\n'
+        f'<script type="application/json" id="figuras">{embedded}</script>\n'
+        f'<script>{SCRIPT}</script>\n'
+        '</body>\n</html>\n'
+    )
+    sizes['index.html'] = _write_file(os.path.join(directory, 'index.html'), page)
+
+    manifest = {
+        'versao': version,
+        'gerado_em': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'figuras': list(figures),
+        **(metadata or {}),
+        'arquivos': sizes,
+        'tamanho_total_bytes': sum(sizes.values()),
+        'tempo_gravacao_s': round(time.perf_counter() - start, 3),
+    }
+    _write_file(os.path.join(directory, 'manifest.json'), json.dumps(manifest, indent=2, ensure_ascii=False))
+    return manifest
@@ -0,0 +1,79 @@
+"""
+Configuração comum dos testes: módulos do dashboard e um banco pequeno.
+
+Uso:
+    python -m pytest -q tests
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Permite importar os módulos do dashboard (data_store.py, filter_index.py...)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from schema import COUNT_COLUMNS, TABLE_NAME, TEXT_COLUMN  # noqa: E402
+
+COLUMNS = ['Sexo', 'Escala6x1', 'DataNascimento', 'Impactos']
+
+# Respostas do banco de teste, na ordem dos rowids
+ROWS = [
+    ('Feminino', 'Sim', '1990-05-01 00:00:00', 'ansiedade e cansaço'),
+    ('Masculino', 'Não', '1980-01-15 00:00:00', 'pouco tempo com a família'),
+    ('Feminino', 'Sim', '2001-12-31 00:00:00', None),
+    (None, 'Sim', '1975-07-20 00:00:00', 'dores nas costas'),
+    ('Masculino', 'Sim', None, 'nenhum'),
+    ('Feminino', None, '1962-03-03 00:00:00', 'estresse'),
+    ('Outro', 'Não', '1999-09-09 00:00:00', 'sem tempo para os amigos'),
+    ('Feminino', 'Não', 'data inválida', 'família'),
+]
+
+
+def write_rows(db_path, rows, replace=False):
+    """Grava respostas no banco de teste, recriando a tabela se replace for True."""
+    conn = sqlite3.connect(db_path)
+    if replace:
+        conn.execute(f"DROP TABLE IF EXISTS {TABLE_NAME}")
+    column_list = ', '.join(f'"{column}" TEXT' for column in COLUMNS)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {TABLE_NAME} ({column_list})")
+    conn.executemany(f"INSERT INTO {TABLE_NAME} VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+    conn.commit()
+    conn.close()
+
+
+# Todas as colunas usadas pelo dashboard: as de COLUMNS vêm de ROWS e as
+# demais alternam entre dois valores e nulo
+FULL_COLUMNS = COUNT_COLUMNS + [TEXT_COLUMN]
+FULL_ROWS = [
+    tuple(row[COLUMNS.index(column)] if column in COLUMNS else [f'{column} A', f'{column} B', None][index % 3]
+          for column in FULL_COLUMNS)
+    for index, row in enumerate(ROWS)
+]
+
+
+def write_full_rows(db_path, rows):
+    """Grava respostas com todas as colunas de FULL_COLUMNS."""
+    conn = sqlite3.connect(db_path)
+    column_list = ', '.join(f'"{column}" TEXT' for column in FULL_COLUMNS)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {TABLE_NAME} ({column_list})")
+    conn.executemany(f"INSERT INTO {TABLE_NAME} VALUES ({', '.join('?' * len(FULL_COLUMNS))})", rows)
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def full_db_path(tmp_path):
+    """Banco SQLite com as respostas de FULL_ROWS."""
+    path = str(tmp_path / 'completo.sqlite')
+    write_full_rows(path, FULL_ROWS)
+    return path
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Banco SQLite com as respostas de ROWS."""
+    path = str(tmp_path / 'teste.sqlite')
+    write_rows(path, ROWS)
+    return path
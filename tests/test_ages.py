@@ -0,0 +1,64 @@
+"""Testes das faixas etárias (ages.py), comparadas com o cálculo original do app.py."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ages import age_group_counts, age_groups, ages
+from schema import AGE_BINS, AGE_LABELS
+
+TODAY = pd.Timestamp('2024-02-29 15:30:00')
+
+
+def baseline_age_group_counts(birth_dates, today):
+    """Cálculo original: idade linha a linha e pd.cut com right=False."""
+    dates = pd.to_datetime(pd.Series(birth_dates), errors='coerce')
+    age = dates.apply(lambda x: int((today - x).days / 365.25) if pd.notna(x) else None).dropna()
+    groups = pd.cut(age, bins=AGE_BINS, labels=AGE_LABELS, right=False)
+    return groups.value_counts().reindex(AGE_LABELS, fill_value=0)
+
+
+def boundary_dates():
+    """Datas em volta de cada limite das faixas, inclusive 29/02 e datas futuras."""
+    dates = []
+    for age in AGE_BINS + [-1]:
+        anniversary = TODAY.normalize() - pd.Timedelta(days=round(age * 365.25))
+        dates.extend(anniversary + pd.Timedelta(days=offset) for offset in range(-2, 3))
+    dates += [pd.Timestamp('2000-02-29'), pd.Timestamp('1960-02-29'), TODAY + pd.Timedelta(days=400)]
+    return [date.strftime('%Y-%m-%d %H:%M:%S') for date in dates]
+
+
+def test_age_group_counts_match_baseline_on_boundaries():
+    dates = boundary_dates() + [None, 'data inválida']
+    counts = pd.Series(dates).value_counts(dropna=True)
+    expected = baseline_age_group_counts(np.repeat(counts.index, counts.to_numpy()), TODAY)
+    result = age_group_counts(counts, TODAY)
+    assert result.tolist() == expected.tolist()
+    assert list(result.index) == AGE_LABELS
+
+
+def test_age_group_counts_match_baseline_on_random_dates():
+    rng = np.random.default_rng(0)
+    days = rng.integers(-800, 160 * 366, size=2000)
+    dates = pd.Series(TODAY.normalize() - pd.to_timedelta(days, unit='D')).dt.strftime('%Y-%m-%d %H:%M:%S')
+    counts = dates.value_counts()
+    expected = baseline_age_group_counts(dates, TODAY)
+    assert age_group_counts(counts, TODAY).tolist() == expected.tolist()
+
+
+@pytest.mark.parametrize('birth_date, expected', [
+    # 20 anos são 7305 dias (20 * 365.25): completados exatamente em 29/02/2024
+    ('2004-02-29 00:00:00', 'Entre 20 e 29 anos'),
+    ('2004-03-01 00:00:00', 'Até 19 anos'),
+    ('1964-02-28 00:00:00', 'Acima de 60 anos'),
+])
+def test_age_groups_on_birthdays(birth_date, expected):
+    assert age_groups([birth_date], TODAY)[0] == expected
+    baseline = baseline_age_group_counts([birth_date], TODAY)
+    assert baseline[expected] == 1
+
+
+def test_invalid_and_out_of_range_dates_have_no_group():
+    result = age_groups([None, 'data inválida', '1800-01-01', '2030-01-01'], TODAY)
+    assert pd.isna(result).all()
+    assert np.isnan(ages([None], TODAY)).all()
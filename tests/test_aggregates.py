@@ -0,0 +1,58 @@
+"""Testes das contagens materializadas (aggregates.py) lidas pelo DataStore."""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from aggregates import build_aggregates
+from conftest import FULL_ROWS, write_full_rows
+from data_store import DataStore, count_values
+from schema import COUNT_COLUMNS, TABLE_NAME
+
+
+@pytest.fixture
+def store(full_db_path, monkeypatch):
+    # Sem arquivo Arrow: as linhas vêm do SQLite
+    monkeypatch.setenv('ARROW_SNAPSHOT_PATH', '')
+    conn = sqlite3.connect(full_db_path)
+    build_aggregates(conn, include_topics=False)
+    conn.close()
+    store = DataStore(full_db_path)
+    store.enable_aggregates('fingerprint-atual')
+    yield store
+    store.close()
+
+
+def expected_counts(db_path):
+    conn = sqlite3.connect(db_path)
+    frame = pd.read_sql(f"SELECT * FROM {TABLE_NAME}", conn)
+    conn.close()
+    return count_values(frame, COUNT_COLUMNS)
+
+
+def test_counts_come_from_aggregates_without_topics(store, full_db_path):
+    snapshot = store.snapshot()
+    # As linhas não foram lidas: as contagens vêm dos agregados
+    assert snapshot._frame is None
+    assert snapshot.row_count == len(FULL_ROWS)
+    assert snapshot.accumulated['topicos'] is None
+    expected = expected_counts(full_db_path)
+    for column in COUNT_COLUMNS:
+        pd.testing.assert_series_equal(snapshot.counts[column], expected[column], check_names=False,
+                                       check_index_type=False)
+
+
+def test_topic_totals_fall_back_to_the_accumulator(store):
+    store.add_accumulator('topicos', lambda delta, offset: len(delta), lambda current, new: current + new)
+    snapshot = store.snapshot()
+    assert snapshot.accumulated['topicos'] == len(FULL_ROWS)
+    assert snapshot.row_count == len(FULL_ROWS)
+
+
+def test_stale_aggregates_are_ignored(store, full_db_path):
+    store.snapshot()
+    write_full_rows(full_db_path, FULL_ROWS[:2])
+    snapshot = store.snapshot()
+    assert snapshot.row_count == len(FULL_ROWS) + 2
+    assert snapshot._frame is not None
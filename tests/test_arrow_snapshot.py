@@ -0,0 +1,100 @@
+"""Testes do arquivo Arrow das respostas (arrow_snapshot.py)."""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from conftest import ROWS
+from schema import TABLE_NAME
+
+pytest.importorskip('pyarrow')
+
+from arrow_snapshot import read_snapshot, write_snapshot  # noqa: E402
+from data_store import IncrementalLoader, _comparable  # noqa: E402
+
+# Tabela com colunas numéricas, como as declaradas pela ingestão
+# (ver utils/excel_to_sqlite.py column_type)
+NUMERIC_ROWS = [
+    (row[0], row[1], row[2], index if index % 3 else None, index * 1.5 if index % 4 else None)
+    for index, row in enumerate(ROWS, start=1)
+]
+
+
+@pytest.fixture
+def numeric_db(tmp_path):
+    path = str(tmp_path / 'numerico.sqlite')
+    conn = sqlite3.connect(path)
+    conn.execute(f'CREATE TABLE {TABLE_NAME} ("Sexo" TEXT, "Escala6x1" TEXT, "DataNascimento" TIMESTAMP, '
+                 f'"Filhos" INTEGER, "Horas" REAL)')
+    conn.executemany(f"INSERT INTO {TABLE_NAME} VALUES (?, ?, ?, ?, ?)", NUMERIC_ROWS)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def write(db_path, arrow_path, batch_size=3):
+    conn = sqlite3.connect(db_path)
+    try:
+        return write_snapshot(conn, arrow_path, batch_size=batch_size)
+    finally:
+        conn.close()
+
+
+def test_numeric_columns_round_trip(numeric_db, tmp_path):
+    arrow_path = str(tmp_path / 'numerico.arrow')
+    assert write(numeric_db, arrow_path) == len(NUMERIC_ROWS)
+
+    frame = read_snapshot(arrow_path)
+    conn = sqlite3.connect(numeric_db)
+    expected = pd.read_sql(f"SELECT rowid, * FROM {TABLE_NAME}", conn, index_col='rowid')
+    conn.close()
+    assert _comparable(frame).equals(_comparable(expected))
+
+
+def test_text_in_numeric_column_is_rejected(numeric_db, tmp_path):
+    conn = sqlite3.connect(numeric_db)
+    conn.execute(f"INSERT INTO {TABLE_NAME} VALUES ('Feminino', 'Sim', NULL, 'dois', NULL)")
+    conn.commit()
+    conn.close()
+
+    arrow_path = tmp_path / 'numerico.arrow'
+    with pytest.raises(ValueError, match='Filhos'):
+        write(numeric_db, str(arrow_path))
+    assert list(tmp_path.glob('*.arrow')) == [] and list(tmp_path.glob('*.tmp')) == []
+
+
+def test_loader_starts_from_the_snapshot(numeric_db, tmp_path):
+    arrow_path = str(tmp_path / 'numerico.arrow')
+    write(numeric_db, arrow_path)
+    loader = IncrementalLoader(numeric_db, count_columns=['Sexo', 'Filhos'], categorical_columns=['Sexo', 'Escala6x1'],
+                               snapshot_path=arrow_path)
+    try:
+        assert len(loader.refresh()) == 0
+        assert loader.row_count == len(NUMERIC_ROWS)
+        with loader.pool.connection() as conn:
+            assert loader._is_consistent(conn)
+    finally:
+        loader.pool.close()
+
+
+def test_stale_snapshot_is_discarded_before_loading(numeric_db, tmp_path):
+    arrow_path = str(tmp_path / 'numerico.arrow')
+    write(numeric_db, arrow_path)
+    conn = sqlite3.connect(numeric_db)
+    conn.execute(f"UPDATE {TABLE_NAME} SET \"Sexo\" = 'Outro' WHERE rowid = {len(NUMERIC_ROWS)}")
+    conn.commit()
+    conn.close()
+
+    loader = IncrementalLoader(numeric_db, count_columns=['Sexo'], categorical_columns=['Sexo'],
+                               snapshot_path=arrow_path)
+    computed = []
+    loader.add_accumulator('linhas', lambda delta, offset: computed.append(len(delta)) or len(delta),
+                           lambda current, new: current + new)
+    try:
+        loader.refresh()
+    finally:
+        loader.pool.close()
+    # As linhas do arquivo desatualizado não passam pelas agregações
+    assert computed == [len(NUMERIC_ROWS)]
+    assert loader.counts['Sexo']['Outro'] == 2
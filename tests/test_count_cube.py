@@ -0,0 +1,115 @@
+"""Testes do cubo de contagens (count_cube.py), comparado com pd.crosstab."""
+
+import itertools
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import count_cube
+from ages import age_groups
+from conftest import FULL_COLUMNS, FULL_ROWS
+from count_cube import CUBE_COLUMNS, CountCube, cube_key, get_count_cube
+from data_store import DataStore
+from schema import AGE_GROUP_COLUMN, BIRTH_DATE_COLUMN
+
+TODAY = date(2024, 6, 30)
+TRIPLE = ('Sexo', 'Escala6x1', AGE_GROUP_COLUMN)
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame(FULL_ROWS, columns=FULL_COLUMNS)
+
+
+@pytest.fixture
+def cube(frame):
+    return CountCube.build(frame, 'chave', triples=[TRIPLE], today=TODAY)
+
+
+def values(frame, column):
+    """Valores de uma coluna do cubo, com a faixa etária calculada da data."""
+    if column == AGE_GROUP_COLUMN:
+        return pd.Series(age_groups(frame[BIRTH_DATE_COLUMN], TODAY), index=frame.index).astype(object)
+    return frame[column]
+
+
+def labelled(cube, *columns):
+    """Marginal do cubo como Série indexada pelas categorias."""
+    array = cube.marginal(*columns)
+    if len(columns) == 1:
+        index = pd.Index(cube.categories[columns[0]], name=columns[0])
+    else:
+        index = pd.MultiIndex.from_product([cube.categories[column] for column in columns], names=columns)
+    return pd.Series(array.ravel(), index=index)
+
+
+def expected_counts(frame, *columns):
+    """Contagens com o pandas (linhas com nulos ficam de fora, como no cubo)."""
+    data = pd.DataFrame({column: values(frame, column) for column in columns}).dropna()
+    return data.groupby(list(columns)).size()
+
+
+@pytest.mark.parametrize('columns', [(column,) for column in CUBE_COLUMNS[:6]]
+                         + list(itertools.combinations(['Sexo', 'Escala6x1', AGE_GROUP_COLUMN, 'Rendimento'], 2))
+                         + [TRIPLE, (AGE_GROUP_COLUMN, 'Sexo', 'Escala6x1')])
+def test_marginals_match_pandas(cube, frame, columns):
+    counts = labelled(cube, *columns)
+    expected = expected_counts(frame, *columns)
+    assert counts.sum() == expected.sum()
+    # Combinações ausentes dos dados têm contagem zero no cubo
+    assert counts[counts > 0].to_dict() == expected.to_dict()
+
+
+def test_marginal_follows_the_requested_axis_order(cube):
+    np.testing.assert_array_equal(cube.marginal('Escala6x1', 'Sexo'), cube.marginal('Sexo', 'Escala6x1').T)
+    np.testing.assert_array_equal(cube.marginal(*reversed(TRIPLE)), cube.marginal(*TRIPLE).transpose(2, 1, 0))
+
+
+def test_crosstab_matches_pandas(cube, frame):
+    table = cube.crosstab('Sexo', AGE_GROUP_COLUMN)
+    expected = pd.crosstab(values(frame, 'Sexo'), values(frame, AGE_GROUP_COLUMN))
+    pd.testing.assert_frame_equal(table.sort_index().sort_index(axis=1),
+                                  expected.sort_index().sort_index(axis=1), check_names=False, check_dtype=False)
+    # A faixa etária mantém a ordem das faixas
+    assert list(table.columns) == [label for label in cube.categories[AGE_GROUP_COLUMN] if label in table.columns]
+
+
+def test_missing_combination_raises(cube):
+    with pytest.raises(KeyError):
+        cube.marginal('Sexo', 'Rendimento', 'Escolaridade')
+    with pytest.raises(KeyError):
+        cube.marginal('Sexo', 'Sexo')
+
+
+def test_save_and_load_round_trip(cube, tmp_path):
+    path = str(tmp_path / 'cubo.npz')
+    cube.save(path)
+    loaded = CountCube.load(path, 'chave')
+    assert loaded.categories == cube.categories
+    assert loaded.combinations == cube.combinations
+    for combination in cube.combinations:
+        np.testing.assert_array_equal(loaded.marginal(*combination), cube.marginal(*combination))
+    assert CountCube.load(path, 'outra chave') is None
+    assert CountCube.load(str(tmp_path / 'inexistente.npz')) is None
+
+
+def test_stale_file_is_rebuilt(full_db_path, tmp_path, frame, monkeypatch):
+    monkeypatch.setenv('ARROW_SNAPSHOT_PATH', '')
+    monkeypatch.setattr(count_cube, '_current_key', None)
+    monkeypatch.setattr(count_cube, '_current_cube', None)
+    store = DataStore(full_db_path)
+    try:
+        snapshot = store.snapshot()
+        path = str(tmp_path / 'base_cubo.npz')
+        # Arquivo de outra versão dos dados, com contagens que não batem
+        CountCube.build(frame.head(2), 'versao antiga', today=TODAY).save(path)
+
+        cube = get_count_cube(snapshot, path, today=TODAY)
+        assert cube.key == cube_key(snapshot, TODAY)
+        assert cube.marginal('Sexo').sum() == frame['Sexo'].notna().sum()
+        # O arquivo foi regravado com a versão atual
+        assert CountCube.load(path, cube.key) is not None
+    finally:
+        store.close()
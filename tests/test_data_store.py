@@ -0,0 +1,102 @@
+"""Testes do IncrementalLoader (data_store.py)."""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from conftest import ROWS, write_rows
+from data_store import IncrementalLoader, count_values
+from schema import TABLE_NAME
+
+COUNT_COLUMNS = ['Sexo', 'Escala6x1', 'DataNascimento']
+CATEGORICAL_COLUMNS = ['Sexo', 'Escala6x1']
+
+
+@pytest.fixture
+def loader(db_path):
+    loader = IncrementalLoader(db_path, count_columns=COUNT_COLUMNS, categorical_columns=CATEGORICAL_COLUMNS)
+    yield loader
+    loader.pool.close()
+
+
+def read_table(db_path):
+    """Tabela inteira lida com pandas, como a versão sem carga incremental."""
+    conn = sqlite3.connect(db_path)
+    frame = pd.read_sql(f"SELECT * FROM {TABLE_NAME}", conn)
+    conn.close()
+    return frame
+
+
+def assert_counts_match(loader, db_path):
+    expected = count_values(read_table(db_path), COUNT_COLUMNS)
+    for column in COUNT_COLUMNS:
+        pd.testing.assert_series_equal(loader.counts[column], expected[column], check_names=False)
+
+
+def is_consistent(loader):
+    with loader.pool.connection() as conn:
+        return loader._is_consistent(conn)
+
+
+def test_first_refresh_loads_everything(loader, db_path):
+    delta = loader.refresh()
+    assert len(delta) == len(ROWS)
+    assert loader.row_count == len(ROWS)
+    assert loader.high_water_mark == len(ROWS)
+    assert list(loader.frame.index) == list(range(1, len(ROWS) + 1))
+    assert isinstance(loader.frame['Sexo'].dtype, pd.CategoricalDtype)
+    assert_counts_match(loader, db_path)
+
+
+def test_append_reads_only_new_rows(loader, db_path):
+    loader.refresh()
+    write_rows(db_path, [('Masculino', 'Sim', '1995-02-02 00:00:00', 'cansaço'), ('Nova', 'Talvez', None, None)])
+
+    assert is_consistent(loader)
+    delta = loader.refresh()
+    assert list(delta.index) == [len(ROWS) + 1, len(ROWS) + 2]
+    assert loader.row_count == len(ROWS) + 2
+    # Valores novos entram ao final das categorias
+    assert loader.frame['Sexo'].cat.categories[-1] == 'Nova'
+    assert_counts_match(loader, db_path)
+
+
+def test_refresh_without_changes_reads_nothing(loader):
+    loader.refresh()
+    assert len(loader.refresh()) == 0
+    assert loader.row_count == len(ROWS)
+
+
+def test_rewritten_table_is_reloaded(loader, db_path):
+    loader.refresh()
+    # Mesma quantidade de linhas, conteúdo diferente (tabela recriada)
+    rewritten = [('Masculino', 'Não', row[2], row[3]) for row in ROWS]
+    write_rows(db_path, rewritten, replace=True)
+
+    assert not is_consistent(loader)
+    loader.refresh()
+    assert loader.row_count == len(ROWS)
+    assert loader.counts['Sexo'].to_dict() == {'Masculino': len(ROWS)}
+    assert_counts_match(loader, db_path)
+
+
+def test_deleted_rows_reset_the_loader(loader, db_path):
+    loader.refresh()
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"DELETE FROM {TABLE_NAME} WHERE rowid = 2")
+    conn.commit()
+    conn.close()
+
+    assert not is_consistent(loader)
+    loader.refresh()
+    assert loader.row_count == len(ROWS) - 1
+    assert_counts_match(loader, db_path)
+
+
+def test_accumulator_is_merged_across_refreshes(loader, db_path):
+    loader.add_accumulator('linhas', lambda delta, offset: len(delta), lambda current, new: current + new)
+    loader.refresh()
+    write_rows(db_path, ROWS[:3])
+    loader.refresh()
+    assert loader.accumulated('linhas') == len(ROWS) + 3
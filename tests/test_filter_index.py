@@ -0,0 +1,90 @@
+"""Testes do FilterIndex (filter_index.py), comparado com filtros do pandas."""
+
+import pandas as pd
+import pytest
+
+from ages import age_groups
+from conftest import COLUMNS, ROWS
+from data_store import count_values
+from filter_index import TOPICS_FILTER, FilterIndex, filters_key, toggle_filter
+from schema import AGE_GROUP_COLUMN
+
+COUNT_COLUMNS = ['Sexo', 'Escala6x1', 'DataNascimento']
+TODAY = pd.Timestamp('2024-06-30')
+
+# Tópicos por resposta, alinhados com ROWS
+TOPICS = pd.DataFrame({
+    'saude_mental': [1, 0, 0, 0, 0, 1, 0, 0],
+    'familia': [0, 1, 0, 0, 0, 0, 0, 1],
+}, dtype='uint8')
+
+
+@pytest.fixture
+def frame():
+    frame = pd.DataFrame(ROWS, columns=COLUMNS)
+    # As colunas de múltipla escolha chegam como Categorical do IncrementalLoader
+    for column in ('Sexo', 'Escala6x1'):
+        frame[column] = frame[column].astype('category')
+    return frame
+
+
+@pytest.fixture
+def index(frame):
+    return FilterIndex(frame, columns=COUNT_COLUMNS, today=TODAY, topic_table=lambda: TOPICS)
+
+
+def pandas_mask(frame, filters, exclude=()):
+    """Filtragem direta com o pandas: OU entre valores, E entre colunas."""
+    mask = pd.Series(True, index=frame.index)
+    for column, values in filters.items():
+        if column in exclude or not values:
+            continue
+        if column == AGE_GROUP_COLUMN:
+            selected = pd.Series(age_groups(frame['DataNascimento'], TODAY), index=frame.index).isin(values)
+        elif column == TOPICS_FILTER:
+            selected = TOPICS[values].to_numpy().any(axis=1)
+        else:
+            selected = frame[column].isin(values)
+        mask &= selected
+    return mask.to_numpy()
+
+
+# Filtros comparados com o pandas (e com o SQL, em test_queries.py)
+FILTERS = [
+    {},
+    {'Sexo': ['Feminino']},
+    {'Sexo': ['Feminino', 'Outro']},
+    {'Sexo': ['Feminino'], 'Escala6x1': ['Não']},
+    {'Escala6x1': ['Sim'], AGE_GROUP_COLUMN: ['Entre 20 e 29 anos', 'Entre 30 e 39 anos']},
+    {TOPICS_FILTER: ['familia']},
+    {'Sexo': ['Valor que não existe']},
+]
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_counts_match_pandas_filter(frame, index, filters):
+    counts = index.count_values(filters)
+    for column in COUNT_COLUMNS:
+        # Cada gráfico ignora o filtro da própria coluna (a faixa etária vem da data)
+        exclude = {column, AGE_GROUP_COLUMN} if column == 'DataNascimento' else {column}
+        expected = count_values(frame[pandas_mask(frame, filters, exclude)], [column])[column]
+        pd.testing.assert_series_equal(counts[column], expected, check_names=False, check_index_type=False)
+
+
+def test_mask_matches_pandas_filter(frame, index):
+    filters = {'Sexo': ['Masculino', 'Feminino'], TOPICS_FILTER: ['saude_mental', 'familia']}
+    assert (index.mask(filters) == pandas_mask(frame, filters)).all()
+    assert (index.mask(filters, exclude=('Sexo',)) == pandas_mask(frame, filters, exclude=('Sexo',))).all()
+
+
+def test_toggle_filter_adds_and_removes_values():
+    filters = toggle_filter({}, 'Sexo', 'Feminino')
+    assert filters == {'Sexo': ['Feminino']}
+    filters = toggle_filter(filters, 'Sexo', 'Outro')
+    assert filters == {'Sexo': ['Feminino', 'Outro']}
+    assert toggle_filter(toggle_filter(filters, 'Sexo', 'Feminino'), 'Sexo', 'Outro') == {}
+
+
+def test_filters_key_ignores_order_and_empty_filters():
+    assert filters_key({'Sexo': ['Outro', 'Feminino'], 'Escala6x1': []}) == filters_key({'Sexo': ['Feminino', 'Outro']})
+    assert filters_key(None) == filters_key({})
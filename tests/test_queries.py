@@ -0,0 +1,61 @@
+"""Testes do backend SQL (queries.py), comparado com o FilterIndex."""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from conftest import COLUMNS, ROWS
+from filter_index import TOPICS_FILTER, FilterIndex
+from impact_topics import ASSIGNMENTS_TABLE, ensure_tables
+from schema import AGE_GROUP_COLUMN
+from simple_nlp import get_impact_data_for_graph, topic_totals
+from test_filter_index import COUNT_COLUMNS, FILTERS, TODAY, TOPICS
+import queries
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    # Tópicos pré-calculados de cada resposta, os mesmos de TOPICS
+    ensure_tables(conn)
+    pairs = [(rowid, topic) for topic in TOPICS for rowid in TOPICS.index[TOPICS[topic] != 0] + 1]
+    conn.executemany(f"INSERT INTO {ASSIGNMENTS_TABLE} (rowid_resposta, topico) VALUES (?, ?)",
+                     [(int(rowid), topic) for rowid, topic in pairs])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def index():
+    frame = pd.DataFrame(ROWS, columns=COLUMNS)
+    for column in ('Sexo', 'Escala6x1'):
+        frame[column] = frame[column].astype('category')
+    return FilterIndex(frame, columns=COUNT_COLUMNS, today=TODAY, topic_table=lambda: TOPICS)
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_counts_match_filter_index(conn, index, filters):
+    counts = queries.count_columns(conn, filters, COUNT_COLUMNS, today=TODAY)
+    expected = index.count_values(filters)
+    for column in COUNT_COLUMNS:
+        pd.testing.assert_series_equal(counts[column], expected[column], check_names=False, check_index_type=False)
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_age_groups_match_filter_index(conn, index, filters):
+    counts = queries.count_column(conn, AGE_GROUP_COLUMN, filters, today=TODAY)
+    mask = index.mask(filters, exclude=(AGE_GROUP_COLUMN,))
+    expected = index._count(AGE_GROUP_COLUMN, mask)
+    pd.testing.assert_series_equal(counts, expected, check_names=False, check_index_type=False)
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_topic_totals_match_filter_index(conn, index, filters):
+    totals = queries.topic_totals(conn, filters, today=TODAY)
+    expected = topic_totals(index.topic_table[index.mask(filters, exclude=(TOPICS_FILTER,))])
+    pd.testing.assert_frame_equal(totals.sort_index(), expected.sort_index(), check_dtype=False,
+                                  check_index_type=False)
+    # O gráfico de tópicos (ordem e desempates) é o mesmo nos dois caminhos
+    assert get_impact_data_for_graph(None, totals=totals) == get_impact_data_for_graph(None, totals=expected)
@@ -0,0 +1,366 @@
+"""
+Benchmark do dashboard com dados sintéticos em escala.
+
+Gera bancos com a tabela Planilha1 em vários tamanhos (padrão: 500, 50 mil e
+1 milhão de linhas), sorteando cada coluna com a distribuição real de
+base.sqlite e as respostas "Impactos" entre os textos reais. Para cada
+tamanho, um processo separado importa o dashboard apontando para o banco
+gerado (DASHBOARD_DB) e mede:
+
+- startup: importação de app.py (carga dos dados e KPIs iniciais)
+- nlp_ready: carregamento do modelo de PLN em segundo plano e classificação
+  inicial das respostas
+- kpis: contagens a partir das linhas + compute_kpis
+- age_groups: faixa etária de cada respondente a partir das datas de
+  nascimento (ages.py)
+- count_cube: cálculo do cubo de contagens (count_cube.py)
+- crosstab_cube / crosstab_pandas: um cruzamento de duas colunas lido do
+  cubo e calculado com pd.crosstab
+- create_*_graphs: construção dos gráficos de cada aba a partir das linhas
+- callback_*: callbacks de atualização de cada aba, chamados diretamente,
+  com o cache de figuras vazio e (sufixo _cached) com o cache preenchido
+- warm_figures: construção, pela atualização em segundo plano, das figuras
+  sem filtros de todas as abas (refresher.py), com o cache de figuras vazio
+- analyze_impacts: classificação das respostas com o cache de NLP vazio e
+  (sufixo _cached) com o cache preenchido; com --nlp-workers, também a
+  classificação em paralelo (sufixo _workers_N, sem o cache)
+
+Para cada etapa são registrados o tempo (melhor de --repeat execuções), o
+pico de memória alocada (tracemalloc; para startup, o RSS máximo do
+processo) e as linhas por segundo. O resultado é gravado em JSON, para
+comparar commits diferentes.
+
+Uso:
+    python utils/benchmark.py [--db base.sqlite] [--sizes 500 50000 1000000]
+                              [--repeat 3] [--output benchmark.json]
+                              [--workdir DIR] [--aggregates] [--arrow]
+                              [--nlp-workers 4 16]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from schema import BIRTH_DATE_COLUMN, TABLE_NAME, TEXT_COLUMN
+
+DEFAULT_SIZES = [500, 50_000, 1_000_000]
+
+# Quantidade de linhas gravadas por transação ao gerar os bancos
+WRITE_CHUNK = 50_000
+
+# Tempo máximo de espera pelo modelo de PLN e pelos tópicos, em segundos
+NLP_TIMEOUT = 600
+
+
+def generate_rows(source, rows, seed=0):
+    """
+    Gera respostas sintéticas sorteando cada coluna com a distribuição real.
+
+    As colunas são sorteadas de forma independente, a partir da frequência
+    de cada valor (inclusive nulos) nos dados de origem.
+
+    Args:
+        source: DataFrame com as respostas reais
+        rows: Quantidade de linhas a gerar
+        seed: Semente do gerador aleatório
+
+    Returns:
+        DataFrame: Respostas sintéticas com as mesmas colunas de source
+    """
+    rng = np.random.default_rng(seed)
+    generated = {}
+    for column in source.columns:
+        frequencies = source[column].value_counts(dropna=False, normalize=True)
+        values = frequencies.index.to_numpy(dtype=object)
+        choices = rng.choice(len(values), size=rows, p=frequencies.to_numpy())
+        generated[column] = values[choices]
+    return pd.DataFrame(generated)
+
+
+def write_database(path, create_sql, frame, build_aggregates=False, write_arrow=False):
+    """
+    Grava as respostas sintéticas em um banco novo com o esquema original.
+
+    Args:
+        path: Caminho do banco a ser criado
+        create_sql: Comando CREATE TABLE da tabela de origem
+        frame: Respostas a gravar
+        build_aggregates: Se deve materializar as contagens (aggregates.py),
+            como faz a ingestão
+        write_arrow: Se deve gravar o arquivo Arrow (arrow_snapshot.py), como
+            faz a ingestão
+    """
+    from arrow_snapshot import snapshot_path, write_snapshot
+
+    arrow_path = snapshot_path(path)
+    for existing in (path, arrow_path):
+        if existing and os.path.exists(existing):
+            os.remove(existing)
+    conn = sqlite3.connect(path)
+    conn.execute(create_sql)
+    placeholders = ','.join('?' * len(frame.columns))
+    columns = ','.join(f'"{column}"' for column in frame.columns)
+    for start in range(0, len(frame), WRITE_CHUNK):
+        chunk = frame.iloc[start:start + WRITE_CHUNK].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        with conn:
+            conn.executemany(
+                f"INSERT INTO {TABLE_NAME} ({columns}) VALUES ({placeholders})",
+                chunk.itertuples(index=False, name=None),
+            )
+    if build_aggregates:
+        from aggregates import build_aggregates as build
+        build(conn)
+    if write_arrow and arrow_path and write_snapshot(conn, arrow_path) is None:
+        print("pyarrow não está instalado, arquivo Arrow não gravado", file=sys.stderr)
+    conn.close()
+
+
+def measure(fn, rows, repeat, setup=None):
+    """
+    Mede o tempo e o pico de memória de uma etapa.
+
+    Args:
+        fn: Função sem argumentos a medir
+        rows: Quantidade de linhas processadas (para linhas/segundo)
+        repeat: Número de execuções; o tempo reportado é o menor
+        setup: Função chamada antes de cada execução, fora da medição
+
+    Returns:
+        dict: wall_s, wall_mean_s, peak_mem_mb e rows_per_s
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    # Uma execução separada mede a memória, pois o tracemalloc deixa o código mais lento
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    best = min(times)
+    return {
+        'wall_s': round(best, 6),
+        'wall_mean_s': round(sum(times) / len(times), 6),
+        'peak_mem_mb': round(peak / 2**20, 3),
+        'rows_per_s': round(rows / best) if best > 0 else None,
+    }
+
+
+def run_worker(db_path, rows, repeat, result_path, workdir, nlp_workers=()):
+    """
+    Mede todas as etapas sobre um banco; executado em um processo próprio.
+
+    Args:
+        db_path: Banco com os dados sintéticos
+        rows: Quantidade de linhas do banco
+        repeat: Número de execuções de cada etapa
+        result_path: Arquivo JSON onde o resultado é gravado
+        workdir: Diretório para os caches usados durante a medição
+        nlp_workers: Quantidades de processos para medir analyze_impacts em paralelo
+    """
+    os.environ['DASHBOARD_DB'] = db_path
+    os.environ['NLP_CACHE_PATH'] = os.path.join(workdir, f'nlp_cache_{rows}.sqlite')
+    os.environ.pop('FIGURE_CACHE_DIR', None)
+    os.chdir(ROOT)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    import app
+    startup = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    import simple_nlp
+    from ages import age_groups
+    from data_store import count_values
+    from count_cube import CountCube
+    from kpis import compute_kpis
+
+    # O modelo de PLN é carregado em segundo plano; as medições seguintes
+    # esperam o carregamento e a classificação inicial terminarem
+    start = time.perf_counter()
+    app.start_nlp_loading()
+    while not app.topics_available(app.store.snapshot(), {}):
+        if simple_nlp.load_error() is not None:
+            raise SystemExit(f"Modelo de PLN indisponível: {simple_nlp.load_error()!r}")
+        if time.perf_counter() - start > NLP_TIMEOUT:
+            raise SystemExit("Os tópicos não ficaram prontos a tempo")
+        time.sleep(0.01)
+    nlp_ready = time.perf_counter() - start
+
+    frame = app.store.snapshot().frame
+    phases = {
+        'startup': {
+            'wall_s': round(startup, 6),
+            'wall_mean_s': round(startup, 6),
+            # ru_maxrss é em kilobytes no Linux
+            'peak_mem_mb': round((rss_after - rss_before) / 1024, 3),
+            'rows_per_s': round(rows / startup) if startup > 0 else None,
+        },
+        'nlp_ready': {
+            'wall_s': round(nlp_ready, 6),
+            'wall_mean_s': round(nlp_ready, 6),
+            'peak_mem_mb': None,
+            'rows_per_s': round(rows / nlp_ready) if nlp_ready > 0 else None,
+        },
+        'kpis': measure(lambda: compute_kpis(count_values(frame), len(frame)), rows, repeat),
+        'age_groups': measure(lambda: age_groups(frame[BIRTH_DATE_COLUMN]), rows, repeat),
+        'count_cube': measure(lambda: CountCube.build(frame, 'benchmark'), rows, repeat),
+    }
+    cube = CountCube.build(frame, 'benchmark')
+    phases['crosstab_cube'] = measure(lambda: cube.crosstab('ImpactoSaudeMental', 'Sexo'), rows, repeat)
+    phases['crosstab_pandas'] = measure(lambda: pd.crosstab(frame['ImpactoSaudeMental'], frame['Sexo']), rows, repeat)
+
+    for name, create in [('create_ocupacionais_graphs', app.create_ocupacionais_graphs),
+                         ('create_pessoais_graphs', app.create_pessoais_graphs),
+                         ('create_impacto_graphs', app.create_impacto_graphs)]:
+        phases[name] = measure(lambda create=create: create(frame), rows, repeat)
+
+    for name, callback, tab in [('callback_ocupacionais', app.update_ocupacionais_graphs, 'tab-1'),
+                                ('callback_pessoais', app.update_pessoais_graphs, 'tab-2'),
+                                ('callback_impacto', app.update_impacto_graphs, 'tab-3')]:
+        run = lambda callback=callback, tab=tab: callback(None, tab, {})
+        phases[name] = measure(run, rows, repeat, setup=app.figure_cache.clear)
+        phases[f'{name}_cached'] = measure(run, rows, repeat)
+
+    snapshot = app.store.snapshot()
+    phases['warm_figures'] = measure(lambda: app.warm_figures(snapshot), rows, repeat, setup=app.figure_cache.clear)
+
+    cache = simple_nlp.get_classification_cache()
+    phases['analyze_impacts'] = measure(lambda: simple_nlp.analyze_impacts(frame), rows, repeat, setup=cache.clear)
+    phases['analyze_impacts_cached'] = measure(lambda: simple_nlp.analyze_impacts(frame), rows, repeat)
+    for workers in nlp_workers:
+        phases[f'analyze_impacts_workers_{workers}'] = measure(
+            lambda workers=workers: simple_nlp.analyze_impacts(frame, use_cache=False, workers=workers), rows, repeat
+        )
+
+    result = {
+        'rows': rows,
+        'unique_texts': int(frame[TEXT_COLUMN].nunique()),
+        'phases': phases,
+    }
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+
+def git_commit():
+    """Retorna o commit atual do repositório, se disponível."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    default_db = os.path.join(ROOT, 'base.sqlite')
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=default_db, help='Banco SQLite com os dados reais')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Quantidades de linhas')
+    parser.add_argument('--repeat', type=int, default=3, help='Número de execuções de cada etapa')
+    parser.add_argument('--output', help='Arquivo JSON com os resultados (padrão: apenas na saída)')
+    parser.add_argument('--workdir', help='Diretório para os bancos gerados (padrão: temporário, removido ao final)')
+    parser.add_argument('--aggregates', action='store_true',
+                        help='Materializar as contagens nos bancos gerados, como na ingestão')
+    parser.add_argument('--arrow', action='store_true',
+                        help='Gravar o arquivo Arrow nos bancos gerados, como na ingestão')
+    parser.add_argument('--seed', type=int, default=0, help='Semente do gerador aleatório')
+    parser.add_argument('--nlp-workers', type=int, nargs='*', default=[],
+                        help='Quantidades de processos para medir analyze_impacts em paralelo')
+    parser.add_argument('--worker', nargs=2, metavar=('DB', 'RESULTADO'), help=argparse.SUPPRESS)
+    parser.add_argument('--rows', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    # O arquivo Arrow de cada banco gerado fica ao lado dele (ver arrow_snapshot.snapshot_path)
+    os.environ.pop('ARROW_SNAPSHOT_PATH', None)
+
+    if args.worker:
+        run_worker(args.worker[0], args.rows, args.repeat, args.worker[1], args.workdir, args.nlp_workers)
+        return
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='benchmark_')
+    os.makedirs(workdir, exist_ok=True)
+
+    conn = sqlite3.connect(args.db)
+    source = pd.read_sql(f"SELECT * FROM {TABLE_NAME}", conn)
+    create_sql = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (TABLE_NAME,)
+    ).fetchone()[0]
+    conn.close()
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'source_rows': len(source),
+        'aggregates': args.aggregates,
+        'arrow': args.arrow,
+        'repeat': args.repeat,
+        'cpus': os.cpu_count(),
+        'results': {},
+    }
+
+    try:
+        for rows in args.sizes:
+            db_path = os.path.join(workdir, f'synthetic_{rows}.sqlite')
+            print(f"Gerando {rows} linhas em {db_path}...", file=sys.stderr)
+            start = time.perf_counter()
+            write_database(db_path, create_sql, generate_rows(source, rows, args.seed),
+                           args.aggregates, args.arrow)
+            print(f"  gerado em {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+            result_path = os.path.join(workdir, f'result_{rows}.json')
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--worker', db_path, result_path,
+                 '--rows', str(rows), '--repeat', str(args.repeat), '--workdir', workdir,
+                 '--nlp-workers', *map(str, args.nlp_workers)],
+                check=True,
+                stdout=subprocess.DEVNULL,
+            )
+            with open(result_path, encoding='utf-8') as f:
+                result = json.load(f)
+            report['results'][str(rows)] = result
+
+            print(f"  {'etapa':<34}{'tempo (s)':>12}{'memória (MB)':>15}{'linhas/s':>14}", file=sys.stderr)
+            for phase, values in result['phases'].items():
+                print(f"  {phase:<34}{values['wall_s']:>12.4f}{values['peak_mem_mb'] or 0:>15.1f}"
+                      f"{values['rows_per_s'] or 0:>14,}", file=sys.stderr)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"Resultados gravados em {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
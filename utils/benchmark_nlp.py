@@ -0,0 +1,104 @@
+"""
+Micro-benchmark da classificação de tópicos das respostas "Impactos".
+
+Compara, por resposta, o custo da etapa de identificação de tópicos
+(depois da lematização) entre a implementação original, que percorre a
+lista de palavras-chave de cada tópico, e o autômato compilado de
+simple_nlp.KeywordMatcher. A lematização é feita uma única vez, antes das
+medições, pois é idêntica nas duas abordagens.
+
+Uso:
+    python utils/benchmark_nlp.py [--db base.sqlite] [--repeat 5]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import simple_nlp
+
+
+def legacy_match_topics(tokens, text_lower):
+    """
+    Implementação original da identificação de tópicos (varredura por tópico).
+
+    Args:
+        tokens: Lemas da resposta
+        text_lower: Texto original em minúsculas
+
+    Returns:
+        dict: Dicionário com os tópicos encontrados e suas contagens
+    """
+    found_topics = {}
+
+    for topic, keywords in simple_nlp.predefined_topics.items():
+        if any(token in keywords for token in tokens):
+            found_topics[topic] = 1
+            continue
+
+        if any(keyword in text_lower for keyword in keywords):
+            found_topics[topic] = 1
+
+    return found_topics
+
+
+def time_matcher(match, samples, repeat):
+    """
+    Mede o melhor tempo total de `repeat` execuções do matcher sobre as amostras.
+
+    Returns:
+        float: Tempo em segundos da execução mais rápida
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for tokens, text_lower in samples:
+            match(tokens, text_lower)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    default_db = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'base.sqlite')
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=default_db, help='Caminho do banco SQLite')
+    parser.add_argument('--repeat', type=int, default=5, help='Número de repetições de cada medição')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    df = pd.read_sql("SELECT Impactos FROM Planilha1", conn)
+    conn.close()
+
+    texts = df['Impactos'][df['Impactos'].notna() & (df['Impactos'] != '')].tolist()
+    print(f"Lematizando {len(texts)} respostas...")
+    samples = [(simple_nlp.preprocess_text(text), str(text).lower()) for text in texts]
+
+    # Os dois matchers precisam concordar em todas as respostas
+    mismatches = sum(
+        1 for tokens, text_lower in samples
+        if legacy_match_topics(tokens, text_lower) != simple_nlp.match_topics(tokens, text_lower)
+    )
+
+    legacy_time = time_matcher(legacy_match_topics, samples, args.repeat)
+    compiled_time = time_matcher(simple_nlp.match_topics, samples, args.repeat)
+
+    n = max(len(samples), 1)
+    print(f"\nRespostas: {len(samples)} (divergências: {mismatches})")
+    print(f"Implementação original: {legacy_time * 1e6 / n:8.1f} µs/resposta")
+    print(f"Autômato compilado:     {compiled_time * 1e6 / n:8.1f} µs/resposta")
+    if compiled_time > 0:
+        print(f"Ganho: {legacy_time / compiled_time:.1f}x")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
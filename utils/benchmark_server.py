@@ -0,0 +1,280 @@
+"""
+Mede a vazão do dashboard sob requisições concorrentes.
+
+Para cada configuração, o servidor é iniciado em um processo novo, a
+medição espera o health check (/healthz) responder 200 e então vários
+clientes simultâneos enviam requisições como as do navegador: o layout
+(/_dash-layout) e os callbacks dos gráficos das três abas, com filtros
+sorteados entre os valores mais frequentes de algumas colunas. São
+reportados:
+
+- pronto_s: do início do processo até o health check responder 200
+- req_s: requisições atendidas por segundo
+- p50_ms / p95_ms / p99_ms: latência das requisições
+- erros: respostas com status diferente de 200
+- memoria_mb: memória (PSS) somada de todos os processos do servidor, e
+  privada_mb, a parte que não é compartilhada entre eles
+
+Configurações (--configs):
+    dev         python app.py (servidor de desenvolvimento do Flask)
+    WxT         gunicorn com W processos e T threads (ver gunicorn.conf.py)
+    WxT-lazy    o mesmo, sem preload_app (cada worker carrega e aquece)
+
+Uso:
+    python utils/benchmark_server.py [--configs dev 1x4 4x4 4x4-lazy]
+                                     [--requests 2000] [--concurrency 16]
+                                     [--db base.sqlite] [--output servidor.json]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import sqlite3
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from schema import TABLE_NAME  # noqa: E402
+
+HOST = '127.0.0.1'
+PORT = 8050
+
+# Colunas usadas para sortear os filtros e valores sorteados de cada uma
+FILTER_COLUMNS = ['Sexo', 'Escala6x1', 'ContratoTrabalho', 'Escolaridade', 'ImpactoSaudeMental']
+VALUES_PER_COLUMN = 3
+
+# Abas e um contêiner do callback de cada uma (para encontrar o callback)
+TAB_CALLBACKS = {
+    'tab-1': 'tempo-escala-6x1-container',
+    'tab-2': 'sexo-container',
+    'tab-3': 'impacto-vida-familiar-container',
+}
+
+# Tempo máximo de espera pelo health check, em segundos
+READY_TIMEOUT = 300
+
+
+def filter_choices(db_path):
+    """Filtros sorteados nas requisições: nenhum, um ou dois valores frequentes."""
+    conn = sqlite3.connect(db_path)
+    values = {}
+    for column in FILTER_COLUMNS:
+        rows = conn.execute(
+            f'SELECT "{column}" FROM {TABLE_NAME} WHERE "{column}" IS NOT NULL '
+            f'GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT {VALUES_PER_COLUMN}'
+        ).fetchall()
+        values[column] = [value for (value,) in rows]
+    conn.close()
+
+    choices = [{}]
+    for column, column_values in values.items():
+        choices.extend({column: [value]} for value in column_values)
+    for first, second in zip(FILTER_COLUMNS, FILTER_COLUMNS[1:]):
+        choices.append({first: values[first][:1], second: values[second][:1]})
+    return choices
+
+
+def start_server(config, env):
+    """Inicia o servidor de uma configuração e retorna o processo."""
+    if config == 'dev':
+        command = [sys.executable, 'app.py']
+    else:
+        shape, _, mode = config.partition('-')
+        workers, threads = shape.split('x')
+        env = {**env, 'DASHBOARD_WORKERS': workers, 'DASHBOARD_THREADS': threads,
+               'DASHBOARD_PRELOAD': '0' if mode == 'lazy' else '1'}
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:server']
+    env = {**env, 'DASHBOARD_BIND': f'{HOST}:{PORT}'}
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, start_new_session=True)
+
+
+def request(conn, method, path, body=None):
+    """Envia uma requisição e retorna (status, corpo)."""
+    headers = {'Content-Type': 'application/json'} if body is not None else {}
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+def wait_ready(process):
+    """Espera o health check responder 200 e retorna o tempo desde o início do processo."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < READY_TIMEOUT:
+        if process.poll() is not None:
+            raise RuntimeError(f"O servidor terminou com o código {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection(HOST, PORT, timeout=5)
+            status, _ = request(conn, 'GET', '/healthz')
+            conn.close()
+            if status == 200:
+                return time.perf_counter() - start
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("O servidor não ficou pronto a tempo")
+
+
+def callback_bodies(choices):
+    """Corpos das requisições de callback (formato do Dash) para cada aba e filtro."""
+    conn = http.client.HTTPConnection(HOST, PORT, timeout=30)
+    _, content = request(conn, 'GET', '/_dash-dependencies')
+    conn.close()
+    dependencies = json.loads(content)
+
+    bodies = []
+    for tab, container in TAB_CALLBACKS.items():
+        dependency = next(item for item in dependencies if f'{container}.children' in item['output'])
+        outputs = [dict(zip(('id', 'property'), output.rsplit('.', 1)))
+                   for output in dependency['output'].strip('.').split('...')]
+        for filters in choices:
+            values = {'versao-dados': None, 'tabs-dashboard': tab, 'filtros': filters}
+            inputs = [{**item, 'value': values.get(item['id'])} for item in dependency['inputs']]
+            bodies.append(json.dumps({
+                'output': dependency['output'],
+                'outputs': outputs,
+                'inputs': inputs,
+                'changedPropIds': ['filtros.data'],
+                'state': [],
+            }))
+    return bodies
+
+
+def run_load(bodies, requests, concurrency, seed):
+    """Envia as requisições com clientes simultâneos e retorna as latências e os erros."""
+    rng = random.Random(seed)
+    # Cada "página": o layout e, na maioria das vezes, um callback de gráficos
+    plan = [('GET', '/_dash-layout', None) if rng.random() < 0.2 else
+            ('POST', '/_dash-update-component', rng.choice(bodies))
+            for _ in range(requests)]
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    position = iter(range(requests))
+
+    def client():
+        conn = http.client.HTTPConnection(HOST, PORT, timeout=120)
+        while True:
+            with lock:
+                index = next(position, None)
+            if index is None:
+                break
+            method, path, body = plan[index]
+            start = time.perf_counter()
+            try:
+                status, _ = request(conn, method, path, body)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(HOST, PORT, timeout=120)
+                status = None
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if status != 200:
+                    errors.append(status)
+        conn.close()
+
+    start = time.perf_counter()
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    return time.perf_counter() - start, latencies, errors
+
+
+def process_tree(pid):
+    """pids do processo e de todos os seus descendentes."""
+    pids = [pid]
+    for current in pids:
+        for task in os.listdir(f'/proc/{current}/task'):
+            with open(f'/proc/{current}/task/{task}/children') as f:
+                pids.extend(int(child) for child in f.read().split())
+    return pids
+
+
+def memory_mb(pid):
+    """Memória (PSS) e memória privada somadas da árvore de processos, em MB (Linux)."""
+    pss = private = 0
+    for current in process_tree(pid):
+        with open(f'/proc/{current}/smaps_rollup') as f:
+            for line in f:
+                name, value = line.split()[:2]
+                if name == 'Pss:':
+                    pss += int(value)
+                elif name in ('Private_Clean:', 'Private_Dirty:'):
+                    private += int(value)
+    return round(pss / 1024, 1), round(private / 1024, 1)
+
+
+def measure(config, env, bodies_for, requests, concurrency, seed):
+    """Mede uma configuração do servidor."""
+    process = start_server(config, env)
+    try:
+        ready = wait_ready(process)
+        bodies = bodies_for()
+        elapsed, latencies, errors = run_load(bodies, requests, concurrency, seed)
+        pss, private = memory_mb(process.pid)
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait()
+
+    cuts = statistics.quantiles(latencies, n=100)
+    return {
+        'pronto_s': round(ready, 2),
+        'req_s': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(cuts[49] * 1000, 1),
+        'p95_ms': round(cuts[94] * 1000, 1),
+        'p99_ms': round(cuts[98] * 1000, 1),
+        'erros': len(errors),
+        'memoria_mb': pss,
+        'privada_mb': private,
+    }
+
+
+def main():
+    default_db = os.path.join(ROOT, 'base.sqlite')
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--configs', nargs='+', default=['dev', '1x4', '4x4', '4x4-lazy'],
+                        help='Configurações do servidor (dev, WxT ou WxT-lazy)')
+    parser.add_argument('--requests', type=int, default=2000, help='Requisições por configuração')
+    parser.add_argument('--concurrency', type=int, default=16, help='Clientes simultâneos')
+    parser.add_argument('--db', default=default_db, help='Banco SQLite servido')
+    parser.add_argument('--seed', type=int, default=0, help='Semente do sorteio das requisições')
+    parser.add_argument('--output', help='Arquivo JSON com os resultados (padrão: apenas na saída)')
+    args = parser.parse_args()
+
+    env = {**os.environ, 'DASHBOARD_DB': os.path.abspath(args.db)}
+    choices = filter_choices(args.db)
+    bodies_for = lambda: callback_bodies(choices)  # noqa: E731
+
+    report = {'cpus': os.cpu_count(), 'requests': args.requests, 'concurrency': args.concurrency,
+              'db': args.db, 'resultados': {}}
+    print(f"{'config':<12}{'pronto (s)':>11}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'erros':>7}{'mem MB':>9}{'priv MB':>9}", file=sys.stderr)
+    for config in args.configs:
+        result = measure(config, env, bodies_for, args.requests, args.concurrency, args.seed)
+        report['resultados'][config] = result
+        print(f"{config:<12}{result['pronto_s']:>11.2f}{result['req_s']:>9.1f}{result['p50_ms']:>9.1f}"
+              f"{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}{result['erros']:>7}"
+              f"{result['memoria_mb']:>9.1f}{result['privada_mb']:>9.1f}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
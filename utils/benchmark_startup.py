@@ -0,0 +1,86 @@
+"""
+Mede o tempo de inicialização do dashboard.
+
+Cada medição roda em um processo novo, que importa app.py, faz a primeira
+requisição (a página inicial, pelo cliente de testes do Flask) e espera o
+modelo de PLN ficar pronto. São reportadas as medianas de:
+
+- import: importação de app.py (carga dos dados, KPIs e layout)
+- primeira_resposta: da importação até a resposta da primeira requisição
+- pln_pronto: da importação até o modelo de PLN estar carregado
+
+Uso:
+    python utils/benchmark_startup.py [--runs 5] [--repo .]
+
+Com --repo é possível medir outra cópia do repositório (por exemplo, um
+git worktree de um commit anterior) para comparar.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Tempo máximo de espera pelo modelo de PLN em cada processo, em segundos
+NLP_TIMEOUT = 300
+
+# Código executado em cada processo de medição
+CHILD = r'''
+import json, sys, time
+NLP_TIMEOUT = %d
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.server.test_client().get('/')
+first_response = time.perf_counter()
+assert response.status_code == 200, response.status_code
+
+import simple_nlp
+is_ready = getattr(simple_nlp, 'is_ready', lambda: True)
+load_error = getattr(simple_nlp, 'load_error', lambda: None)
+while not is_ready():
+    if load_error() is not None:
+        sys.exit(f"Modelo de PLN indisponível: {load_error()!r}")
+    if time.perf_counter() - start > NLP_TIMEOUT:
+        sys.exit("O modelo de PLN não ficou pronto a tempo")
+    time.sleep(0.01)
+nlp_ready = time.perf_counter()
+
+print(json.dumps({
+    'import': imported - start,
+    'primeira_resposta': first_response - start,
+    'pln_pronto': nlp_ready - start,
+}))
+''' % NLP_TIMEOUT
+
+
+def measure_once(repo):
+    """Executa uma medição em um processo novo e retorna os tempos (segundos)."""
+    completed = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=repo, capture_output=True, text=True, check=True,
+    )
+    # O dashboard também escreve na saída (inclusive a partir de outras threads)
+    lines = [line for line in completed.stdout.splitlines() if line.startswith('{')]
+    return json.loads(lines[-1])
+
+
+def main():
+    default_repo = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Número de processos medidos')
+    parser.add_argument('--repo', default=default_repo, help='Diretório do repositório a medir')
+    args = parser.parse_args()
+
+    runs = [measure_once(args.repo) for _ in range(args.runs)]
+    medians = {phase: statistics.median(run[phase] for run in runs) for phase in runs[0]}
+
+    for phase, value in medians.items():
+        print(f"{phase:<20}{value * 1000:>10.0f} ms")
+    print(json.dumps({'runs': args.runs, 'mediana_s': medians}))
+
+
+if __name__ == '__main__':
+    main()
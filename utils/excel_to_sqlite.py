@@ -1,86 +1,319 @@
-import pandas as pd
-import sqlite3
+"""
+Convert the survey spreadsheet (base.xlsx) into the dashboard database (base.sqlite).
+
+The workbook is streamed with openpyxl in read-only mode: rows are read one
+at a time and written in batches with executemany, so memory stays bounded
+even for exports of hundreds of MB. All sheets are written in a single
+transaction on a database in WAL mode, so a running dashboard keeps reading
+the previous data until the ingest commits.
+
+Each sheet becomes a table (named after the sheet) with declared column types,
+inferred from the first batch of rows. The columns the dashboard groups and
+filters by (schema.COUNT_COLUMNS) are indexed.
+
+After the responses table is written, the aggregate tables are rebuilt and,
+when pyarrow is installed, an Arrow snapshot of the responses is written next
+to the database (see arrow_snapshot.py).
+
+Modes:
+    replace  Recreate each table from the spreadsheet (default)
+    append   Add the spreadsheet rows to the existing tables
+    upsert   Like append, but rows whose --key value already exists replace
+             the existing row
+
+Usage:
+    python utils/excel_to_sqlite.py [base.xlsx] [base.sqlite]
+                                    [--mode replace|append|upsert] [--key COLUMN]
+                                    [--batch-size 5000]
+"""
+
+import argparse
+import datetime
 import os
 import sys
+import time
+from itertools import chain
 
-# Print current working directory
-print(f"Current working directory: {os.getcwd()}")
+from openpyxl import load_workbook
 
-# Path to the Excel file
-excel_file = 'base.xlsx'
+# Allow importing the dashboard modules (db.py, schema.py...) from utils/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-# Path to the SQLite database
-sqlite_file = 'base.sqlite'
+from db import connect_writer
+from schema import COUNT_COLUMNS, TABLE_NAME
 
-# Check if Excel file exists
-if not os.path.exists(excel_file):
-    print(f"Error: Excel file '{excel_file}' not found")
-    exit(1)
+# Rows per executemany call
+DEFAULT_BATCH_SIZE = 5000
 
-print(f"Reading Excel file: {excel_file}")
+# Print progress every this many rows
+PROGRESS_EVERY = 100000
 
-# Read the Excel file
-try:
-    # First, let's see what sheets are in the Excel file
-    xls = pd.ExcelFile(excel_file)
-    print(f"Excel sheets: {xls.sheet_names}")
+MODES = ['replace', 'append', 'upsert']
 
-    # Read all sheets into a dictionary of dataframes
-    dfs = {}
-    for sheet_name in xls.sheet_names:
-        print(f"Reading sheet: {sheet_name}")
-        try:
-            # Try to read with default settings
-            df = pd.read_excel(excel_file, sheet_name=sheet_name)
-        except Exception as sheet_error:
-            print(f"Error reading sheet '{sheet_name}': {str(sheet_error)}")
-            print("Trying with different parameters...")
-            try:
-                # Try with explicit engine
-                df = pd.read_excel(excel_file, sheet_name=sheet_name, engine='openpyxl')
-            except Exception as e:
-                print(f"Failed to read sheet '{sheet_name}': {str(e)}")
-                continue
-
-        # Check if dataframe is empty
-        if df.empty:
-            print(f"Sheet '{sheet_name}' is empty, skipping")
+
+def clean_name(name):
+    """Clean a sheet name to use as a table name (remove spaces, special chars)."""
+    return ''.join(c if c.isalnum() else '_' for c in name)
+
+
+def clean_columns(header):
+    """
+    Build the column names from the header row, as pandas + to_sql used to.
+
+    Empty headers become 'Unnamed:_N', repeated names get a '_1', '_2'...
+    suffix, and spaces and dots are replaced by underscores.
+    """
+    columns = []
+    seen = {}
+    for position, name in enumerate(header):
+        name = f'Unnamed: {position}' if name is None else str(name)
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        columns.append(name.replace(' ', '_').replace('.', '_'))
+    return columns
+
+
+def sql_value(value):
+    """Convert a cell value to a value SQLite can store."""
+    if isinstance(value, datetime.datetime):
+        # Same text format as the dates already in base.sqlite
+        return value.isoformat(sep=' ')
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time()).isoformat(sep=' ')
+    if isinstance(value, datetime.time):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def column_type(values):
+    """Declared SQLite type for a column, from a sample of its cell values."""
+    types = {type(value) for value in values if value is not None}
+    if not types:
+        return 'TEXT'
+    if types <= {datetime.datetime, datetime.date}:
+        return 'TIMESTAMP'
+    if types <= {bool, int}:
+        return 'INTEGER'
+    if types <= {bool, int, float}:
+        return 'REAL'
+    return 'TEXT'
+
+
+def read_batches(rows, width, batch_size):
+    """Group the sheet rows into batches, skipping empty rows."""
+    batch = []
+    for row in rows:
+        row = tuple(row[:width]) + (None,) * (width - len(row))
+        if all(value is None for value in row):
             continue
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def existing_columns(conn, table):
+    """Columns of an existing table (empty list if it does not exist)."""
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+def prepare_table(conn, table, columns, types, mode, key):
+    """Create (or extend) the destination table of a sheet before the rows are inserted."""
+    if mode == 'replace':
+        conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+
+    current = existing_columns(conn, table)
+    if not current:
+        definitions = ',\n'.join(f'"{column}" {types[column]}' for column in columns)
+        conn.execute(f'CREATE TABLE "{table}" (\n{definitions}\n)')
+    else:
+        # Columns that are new in the spreadsheet are added to the table
+        for column in columns:
+            if column not in current:
+                print(f"Adding column '{column}' ({types[column]}) to table '{table}'")
+                conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {types[column]}')
+
+    if mode == 'upsert':
+        conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "idx_{table}_{key}_unique" ON "{table}" ("{key}")')
 
-        dfs[sheet_name] = df
-        print(f"Sheet '{sheet_name}' has {len(df)} rows and {len(df.columns)} columns")
-        print(f"Columns: {df.columns.tolist()}")
-        print(f"First few rows:")
-        print(df.head(2))  # Just show 2 rows to keep output manageable
-        print("\n")
 
-    if not dfs:
-        print("No valid data found in the Excel file")
+def create_indexes(conn, table, columns):
+    """Index the columns the dashboard groups and filters by."""
+    if table != TABLE_NAME:
+        return
+    for column in columns:
+        if column in COUNT_COLUMNS:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_{column}" ON "{table}" ("{column}")')
+
+
+def ingest_sheet(conn, worksheet, mode='replace', key=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Stream one worksheet into its table.
+
+    Must be called inside a transaction; nothing is committed here.
+
+    Args:
+        conn: SQLite connection
+        worksheet: openpyxl read-only worksheet
+        mode: 'replace', 'append' or 'upsert'
+        key: Key column (required for 'upsert')
+        batch_size: Rows per executemany call
+
+    Returns:
+        tuple: (table name, rows written), or None if the sheet is empty
+    """
+    table = clean_name(worksheet.title)
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return None
+    columns = clean_columns(header)
+    if mode == 'upsert' and key not in columns:
+        raise ValueError(f"Key column '{key}' not found in sheet '{worksheet.title}'")
+
+    batches = read_batches(rows, len(columns), batch_size)
+    first = next(batches, None)
+    if first is None:
+        return None
+
+    types = {column: column_type(values) for column, values in zip(columns, zip(*first))}
+    prepare_table(conn, table, columns, types, mode, key)
+    print(f"Writing sheet '{worksheet.title}' to table '{table}' ({mode})")
+    print(f"Columns: {', '.join(f'{column} {types[column]}' for column in columns)}")
+
+    # Indexes are cheaper to build once, after the rows of a new table
+    if mode != 'replace':
+        create_indexes(conn, table, columns)
+
+    verb = 'INSERT OR REPLACE' if mode == 'upsert' else 'INSERT'
+    names = ', '.join(f'"{column}"' for column in columns)
+    placeholders = ', '.join('?' for _ in columns)
+    sql = f'{verb} INTO "{table}" ({names}) VALUES ({placeholders})'
+
+    start = time.perf_counter()
+    written = 0
+    next_report = PROGRESS_EVERY
+    for batch in chain([first], batches):
+        conn.executemany(sql, [tuple(sql_value(value) for value in row) for row in batch])
+        written += len(batch)
+        if written >= next_report:
+            print(f"  {written} rows ({written / (time.perf_counter() - start):.0f} rows/s)")
+            next_report += PROGRESS_EVERY
+
+    if mode == 'replace':
+        create_indexes(conn, table, columns)
+    return table, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('excel_file', nargs='?', default='base.xlsx', help='Source spreadsheet')
+    parser.add_argument('sqlite_file', nargs='?', default='base.sqlite', help='Destination database')
+    parser.add_argument('--mode', choices=MODES, default='replace', help='How existing tables are updated')
+    parser.add_argument('--key', help='Key column for --mode upsert')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per executemany call')
+    args = parser.parse_args()
+
+    if args.mode == 'upsert' and not args.key:
+        parser.error('--mode upsert requires --key')
+
+    # Print current working directory
+    print(f"Current working directory: {os.getcwd()}")
+
+    # Check if Excel file exists
+    if not os.path.exists(args.excel_file):
+        print(f"Error: Excel file '{args.excel_file}' not found")
         exit(1)
 
-    # Create a SQLite database
-    print(f"Creating SQLite database: {sqlite_file}")
-    conn = sqlite3.connect(sqlite_file)
+    start = time.perf_counter()
+    print(f"Reading Excel file: {args.excel_file}")
+    workbook = load_workbook(args.excel_file, read_only=True, data_only=True)
+    print(f"Excel sheets: {workbook.sheetnames}")
+
+    print(f"Writing SQLite database: {args.sqlite_file}")
+    conn = connect_writer(args.sqlite_file)
+    try:
+        # All sheets are written in one transaction
+        written = {}
+        conn.execute("BEGIN")
+        try:
+            for worksheet in workbook.worksheets:
+                result = ingest_sheet(conn, worksheet, args.mode, args.key, args.batch_size)
+                if result is None:
+                    print(f"Sheet '{worksheet.title}' is empty, skipping")
+                    continue
+                table, rows = result
+                written[table] = rows
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            workbook.close()
+
+        if not written:
+            print("No valid data found in the Excel file")
+            exit(1)
+        for table, rows in written.items():
+            print(f"Table '{table}': {rows} rows written")
+
+        if TABLE_NAME in written:
+            from aggregates import build_aggregates
+            from impact_topics import drop_tables, prune
+            from simple_nlp import LOAD_ERRORS
+
+            # The precomputed topics refer to rowids of Planilha1: a replaced
+            # table invalidates them, replaced rows leave stale assignments.
+            # Run `python impact_topics.py` to classify the new rows
+            if args.mode == 'replace':
+                drop_tables(conn)
+            elif args.mode == 'upsert':
+                prune(conn)
+
+            # Materialize the counts used by the dashboard charts and KPIs
+            print("Building aggregate tables")
+            try:
+                aggregates = build_aggregates(conn)
+            except LOAD_ERRORS as nlp_error:
+                # Without spaCy, its model or the NLTK stopwords, only the per-column counts are built
+                print(f"NLP unavailable ({nlp_error}), skipping topic aggregates")
+                aggregates = build_aggregates(conn, include_topics=False)
+            for aggregate_table, count in aggregates.items():
+                print(f"Table '{aggregate_table}': {count} rows")
 
-    # Write each dataframe to a table in the SQLite database
-    for sheet_name, df in dfs.items():
-        # Clean the sheet name to use as a table name (remove spaces, special chars)
-        table_name = ''.join(c if c.isalnum() else '_' for c in sheet_name)
-        print(f"Writing sheet '{sheet_name}' to table '{table_name}'")
+            # Columnar copy of the responses that dashboard workers memory-map
+            # at startup instead of reading the table (see arrow_snapshot.py)
+            from arrow_snapshot import snapshot_path, write_snapshot
 
-        # Handle potential issues with column names
-        df.columns = [str(col).replace(' ', '_').replace('.', '_') for col in df.columns]
+            arrow_path = snapshot_path(args.sqlite_file)
+            if arrow_path:
+                try:
+                    rows = write_snapshot(conn, arrow_path)
+                except ValueError as error:
+                    # A stale snapshot would only be discarded at startup;
+                    # without one the dashboard reads the table from SQLite
+                    print(f"Skipping Arrow snapshot: {error}")
+                    if os.path.exists(arrow_path):
+                        os.unlink(arrow_path)
+                else:
+                    if rows is None:
+                        print("pyarrow not installed, skipping Arrow snapshot")
+                    else:
+                        print(f"Arrow snapshot '{arrow_path}': {rows} rows")
+    finally:
+        conn.close()
 
-        # Write to SQLite
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
+    elapsed = time.perf_counter() - start
+    total = sum(written.values())
+    print(f"Conversion completed successfully in {elapsed:.2f}s ({total / elapsed:.0f} rows/s)")
 
-    # Close the connection
-    conn.close()
-    print("Conversion completed successfully!")
 
-except Exception as e:
-    print(f"Error: {str(e)}")
-    print(f"Exception type: {type(e).__name__}")
-    import traceback
-    traceback.print_exc()
-    exit(1)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""
+Ponto de entrada WSGI do dashboard para o servidor de produção.
+
+O servidor de desenvolvimento do Flask (python app.py) atende em um único
+processo. Em produção, o dashboard é servido pelo gunicorn, com vários
+processos (workers) e threads por processo (ver gunicorn.conf.py):
+
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+Com preload_app (padrão em gunicorn.conf.py), este módulo é importado uma
+única vez, no processo principal, antes do fork dos workers: os dados, os
+agregados e o modelo de PLN são carregados e as figuras sem filtros de
+todas as abas são construídas (ver app.warm_up) uma só vez, e os workers
+herdam tudo por copy-on-write. gc.freeze() tira esses objetos das coletas
+do coletor de lixo, que de outra forma escreveria nas páginas herdadas e as
+copiaria em cada worker. As conexões SQLite são fechadas antes do fork e
+reabertas por cada worker no primeiro uso.
+
+O health check (/healthz) só responde 200 depois do aquecimento.
+"""
+
+import gc
+
+from app import app, close_connections, warm_up
+
+warm_up()
+close_connections()
+gc.freeze()
+
+# Aplicação WSGI (Flask) do Dash
+server = app.server